@@ -0,0 +1,154 @@
+# agents/enricher.py
+from __future__ import annotations
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional
+import json
+import os
+import re
+import threading
+import time
+
+from agents.classifier import classify_event
+from agents.recommender import generate_recommendation
+from agents.summarizer import summarize_event
+from utils.logger import span
+
+# Batched enrichment: one structured LLM request fills summary / impact / confidence /
+# so_what for up to BATCH_SIZE events, instead of one call (or a random guess) per event.
+# Events the model skips or answers badly fall back to the per-event agents above.
+BATCH_SIZE = int(os.environ.get("INTEL_AGENT_ENRICH_BATCH", "20"))
+CONCURRENCY = int(os.environ.get("INTEL_AGENT_ENRICH_CONCURRENCY", "4"))
+RATE_PER_MIN = float(os.environ.get("INTEL_AGENT_ENRICH_RPM", "30"))  # Groq free tier is ~30 req/min
+RAW_CHARS = 600
+
+
+class RateLimiter:
+    """Token bucket shared by the batch workers: at most `per_minute` requests, small bursts allowed."""
+
+    def __init__(self, per_minute: float, burst: int = 2):
+        self.interval = 60.0 / per_minute if per_minute > 0 else 0.0
+        self.capacity = float(burst)
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        if not self.interval:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) / self.interval)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) * self.interval
+            time.sleep(wait)
+
+
+def _batch_prompt(company: str, industry: str, batch: List[Dict[str, Any]]) -> str:
+    lines = []
+    for i, e in enumerate(batch):
+        raw = " ".join((e.get("raw") or "").split())[:RAW_CHARS]
+        lines.append(json.dumps({"id": i, "competitor": e.get("competitor", "?"),
+                                 "title": e.get("title", ""), "text": raw}, ensure_ascii=False))
+    return (
+        f"You are a competitive intelligence analyst for {company} in {industry}.\n"
+        "For EACH signal below return an object with keys: id (same id), summary (<=40 words), "
+        "impact (integer 1-5, how much it matters to us), confidence (integer 0-100), "
+        "so_what (one actionable sentence for our team).\n"
+        'Respond with JSON only, shaped as {"items": [...]}, one item per signal.\n\n'
+        + "\n".join(lines)
+    )
+
+
+def _parse_items(text: Optional[str]) -> Dict[int, Dict[str, Any]]:
+    """Pull per-id items out of the reply, keeping only ones that validate."""
+    if not text:
+        return {}
+    m = re.search(r"[\[{].*[\]}]", text, re.S)  # models sometimes wrap JSON in prose/fences
+    if not m:
+        return {}
+    try:
+        data = json.loads(m.group(0))
+    except ValueError:
+        return {}
+    items = data.get("items", []) if isinstance(data, dict) else data
+    out: Dict[int, Dict[str, Any]] = {}
+    for it in items if isinstance(items, list) else []:
+        valid = _validate(it)
+        if valid is not None:
+            out[valid.pop("id")] = valid
+    return out
+
+
+def _validate(it: Any) -> Optional[Dict[str, Any]]:
+    if not isinstance(it, dict):
+        return None
+    try:
+        idx = int(it["id"])
+        impact = int(round(float(it["impact"])))
+        confidence = int(round(float(it["confidence"])))
+    except (KeyError, TypeError, ValueError):
+        return None
+    summary, so_what = it.get("summary"), it.get("so_what")
+    if not (isinstance(summary, str) and summary.strip() and isinstance(so_what, str) and so_what.strip()):
+        return None
+    return {
+        "id": idx,
+        "summary": summary.strip(),
+        "impact": max(1, min(5, impact)),
+        "confidence": max(0, min(100, confidence)),
+        "so_what": so_what.strip(),
+    }
+
+
+def _local(e: Dict[str, Any]) -> Dict[str, Any]:
+    return generate_recommendation(classify_event(summarize_event(e)))
+
+
+def enrich_events(events: List[Dict[str, Any]], company: str, industry: str,
+                  batch_size: int = BATCH_SIZE, concurrency: int = CONCURRENCY,
+                  limiter: Optional[RateLimiter] = None) -> List[Dict[str, Any]]:
+    """
+    Return copies of `events` with summary, impact, confidence and so_what filled in.
+    Batches run concurrently (at most `concurrency` in flight, paced by `limiter`);
+    each item is validated on its own, and misses get one retry in a fresh batch
+    before falling back to the local per-event agents.
+    """
+    from services.ai import complete, remote_enabled
+
+    out = [dict(e) for e in events]
+    if not out:
+        return out
+    if not remote_enabled():
+        return [_local(e) for e in out]
+
+    limiter = limiter or RateLimiter(RATE_PER_MIN)
+
+    def run(idxs: List[int], retry: bool = False) -> Dict[int, Dict[str, Any]]:
+        batch = [out[i] for i in idxs]
+        limiter.acquire()
+        with span("enrich.batch", events=len(batch), retry=retry):
+            # Only replies that validate for every item are cached, and a retry skips the
+            # cache lookup, so a malformed reply is neither reused nor kept.
+            got = _parse_items(complete([{"role": "user", "content": _batch_prompt(company, industry, batch)}],
+                                        use_cache=not retry,
+                                        validate=lambda text: len(_parse_items(text)) >= len(batch)))
+        return {idxs[j]: v for j, v in got.items() if 0 <= j < len(idxs)}
+
+    pending = list(range(len(out)))
+    with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="enrich") as pool:
+        for attempt in range(2):
+            batches = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+            for result in pool.map(lambda idxs: run(idxs, retry=attempt > 0), batches):
+                for i, fields in result.items():
+                    out[i].update(fields)
+                    out[i]["enriched"] = True
+            pending = [i for i in pending if not out[i].get("enriched")]
+            if not pending:
+                break
+    for i in pending:
+        _local(out[i])
+    return out
@@ -1,9 +1,6 @@
 # app.py  — PREMIUM HACKATHON VERSION (FIXED FOR STREAMLIT CLOUD)
 
 import os
-import base64
-import datetime as dt
-from typing import List, Dict, Any
 
 import streamlit as st
 from streamlit.components.v1 import html
@@ -11,6 +8,10 @@ from streamlit.components.v1 import html
 st.set_page_config(page_title="INTEL-AGENT", layout="wide", initial_sidebar_state="expanded")
 st.set_option("client.showErrorDetails", True)
 
+from utils import logger as metrics  # spans are no-ops unless INTEL_AGENT_METRICS=1
+metrics.serve()
+_run = metrics.begin_run()
+
 # ------------------------------------------------------------------
 # Session boot
 # ------------------------------------------------------------------
@@ -23,6 +24,7 @@ ss.setdefault("competitors", [])
 ss.setdefault("selected_competitors", [])
 ss.setdefault("safe_disable_bg", False)
 ss.setdefault("last_error", None)
+ss.setdefault("live_pages", 1)
 
 # ------------------------------------------------------------------
 # Helpers: error reporting
@@ -32,28 +34,24 @@ def show_error_box(prefix: str, err: Exception):
     with st.expander("⚠️ Show error details", expanded=False):
         st.exception(err)
 
-def _b64(path: str) -> str | None:
-    try:
-        with open(path, "rb") as f:
-            return base64.b64encode(f.read()).decode()
-    except Exception:
-        return None
-
 # ------------------------------------------------------------------
 # Background (IMAGE - robust)
 # ------------------------------------------------------------------
-def set_image_background(image_path: str, disabled: bool = False):
+from utils.assets import background_css, fonts_css
+
+def set_image_background(disabled: bool = False):
     try:
         if disabled:
             raise FileNotFoundError("Background disabled by user")
-        data = _b64(image_path)
-        if not data:
-            raise FileNotFoundError(image_path)
+        # Static URL (or a data: URI encoded once per process), not the 2 MB original per rerun.
+        bg = background_css()
+        if not bg:
+            raise FileNotFoundError("static/img_bg.*")
         st.markdown(
             f"""
             <style>
               .stApp {{
-                background: url(data:image/jpg;base64,{data});
+                {bg}
                 background-size: cover;
                 background-position: center;
                 background-repeat: no-repeat;
@@ -82,28 +80,19 @@ def set_image_background(image_path: str, disabled: bool = False):
             unsafe_allow_html=True,
         )
 
-set_image_background("assets/img_bg1.jpg", disabled=ss.safe_disable_bg)
+with metrics.span("render.background"):
+    set_image_background(disabled=ss.safe_disable_bg)
 
 # ------------------------------------------------------------------
 # Fonts & Core CSS
 # ------------------------------------------------------------------
 def embed_argentum_fonts():
-    fonts = [
-        ("assets/fonts/Argentumblack-8MG0.ttf", 900),
-        ("assets/fonts/Argentumshine-Yzpo.ttf", 600),
-        ("assets/fonts/Argentumwhite-rgL7.ttf", 300),
-    ]
-    blobs = []
-    for path, weight in fonts:
-        data = _b64(path)
-        if data:
-            blobs.append(
-                f"@font-face{{font-family:'Argentum';src:url(data:font/truetype;base64,{data}) format('truetype');font-weight:{weight};font-style:normal;font-display:swap;}}"
-            )
-    if blobs:
-        st.markdown("<style>"+ "\n".join(blobs) +"</style>", unsafe_allow_html=True)
+    css = fonts_css()
+    if css:
+        st.markdown("<style>" + css + "</style>", unsafe_allow_html=True)
 
-embed_argentum_fonts()
+with metrics.span("render.fonts"):
+    embed_argentum_fonts()
 
 core_css = """
 <link href="https://fonts.googleapis.com/css2?family=Orbitron:wght@400;700;900&family=Space+Grotesk:wght@300;400;600;700&family=JetBrains+Mono:wght@400;500&display=swap" rel="stylesheet">
@@ -154,8 +143,8 @@ with st.sidebar:
     gh_repo = st.text_input("🔗 Sample GitHub", "https://github.com/vercel/vercel", key="sb_gh")
     demo_mode = st.toggle("🎭 Demo Mode", value=False, key="sb_demo")
     try:
-        from services.storage import get_events, set_events, clear_events
-        count = len(get_events() or [])
+        from services.storage import count_events, clear_events
+        count = count_events()
     except Exception as e:
         count = 0
         show_error_box("Storage import", e)
@@ -183,6 +172,18 @@ with st.sidebar:
         except Exception as e:
             show_error_box("Clear data", e)
 
+    if metrics.ENABLED:
+        prev = ss.get("last_run")
+        with st.expander("⏱️ Last rerun", expanded=False):
+            if prev:
+                st.caption(f"Total {prev['total'] * 1000:.0f} ms")
+                rows = sorted(prev["stages"].items(), key=lambda kv: -kv[1]["seconds"])
+                st.table([{"stage": k, "calls": v["count"], "ms": round(v["seconds"] * 1000, 1)} for k, v in rows])
+                if prev["counters"]:
+                    st.json(prev["counters"])
+            else:
+                st.caption("No completed rerun yet.")
+
 # ------------------------------------------------------------------
 # (rest of your code continues exactly as before — all tabs, cards, fetch logic, etc.)
 
@@ -190,6 +191,7 @@ with st.sidebar:
 # ------------------------------------------------------------------
 # Shared UI helpers
 # ------------------------------------------------------------------
+@metrics.timed("render.card")
 def render_glass_card(title="", badge="", badge_type="primary", meta_items=None, content="", insight="", link="#"):
     bmap = {"primary": "", "danger": "danger", "warning": "warning", "success": "success"}
     bcls = bmap.get(badge_type, "")
@@ -216,136 +218,13 @@ def render_glass_card(title="", badge="", badge_type="primary", meta_items=None,
     )
 
 # ------------------------------------------------------------------
-# Built-in catalog
+# Built-in catalog + ingestion (shared with the headless worker)
 # ------------------------------------------------------------------
-CATALOG: Dict[str, List[Dict[str, Any]]] = {
-    "CRM": [
-        {"name": "Salesforce", "site": "https://salesforce.com", "rss": "https://www.salesforce.com/blog/feed/"},
-        {"name": "HubSpot", "site": "https://hubspot.com", "rss": "https://blog.hubspot.com/marketing/rss.xml"},
-        {"name": "Zoho CRM", "site": "https://zoho.com/crm", "rss": "https://www.zoho.com/blog/feed.xml"},
-        {"name": "Pipedrive", "site": "https://pipedrive.com", "rss": "https://www.pipedrive.com/en/blog/rss"},
-    ],
-    "DevTools": [
-        {"name": "Vercel", "site": "https://vercel.com", "rss": "https://vercel.com/changelog/rss.xml", "github": "https://github.com/vercel/vercel"},
-        {"name": "Netlify", "site": "https://netlify.com", "rss": "https://www.netlify.com/blog/index.xml"},
-        {"name": "Render", "site": "https://render.com", "rss": "https://render.com/blog/rss.xml"},
-    ],
-    "E-commerce": [
-        {"name": "Shopify", "site": "https://shopify.com", "rss": "https://www.shopify.com/partners/blog.atom"},
-        {"name": "BigCommerce", "site": "https://bigcommerce.com", "rss": "https://www.bigcommerce.com/blog/feed/"},
-        {"name": "WooCommerce", "site": "https://woocommerce.com", "rss": "https://woocommerce.com/feed/"},
-    ],
-    "Fintech": [
-        {"name": "Stripe", "site": "https://stripe.com", "rss": "https://stripe.com/blog/feed.rss"},
-        {"name": "Adyen", "site": "https://www.adyen.com", "rss": "https://www.adyen.com/blog/rss.xml"},
-        {"name": "Square", "site": "https://squareup.com", "rss": "https://squareup.com/us/en/press/feed"},
-    ],
-    "Design Tools": [
-        {"name": "Figma", "site": "https://figma.com", "rss": "https://www.figma.com/blog/feed.xml"},
-        {"name": "Sketch", "site": "https://www.sketch.com", "rss": "https://www.sketch.com/feed.xml"},
-        {"name": "Adobe XD", "site": "https://www.adobe.com/products/xd.html", "rss": ""},
-    ],
-    "Marketing Automation": [
-        {"name": "Mailchimp", "site": "https://mailchimp.com", "rss": "https://mailchimp.com/resources/rss/"},
-        {"name": "Klaviyo", "site": "https://www.klaviyo.com", "rss": "https://www.klaviyo.com/blog/rss.xml"},
-        {"name": "ActiveCampaign", "site": "https://www.activecampaign.com", "rss": "https://www.activecampaign.com/blog/feed"},
-    ],
-}
-
-def discover_competitors(industry_key: str) -> List[Dict[str, Any]]:
-    base = [dict(c) for c in CATALOG.get(industry_key, [])]
-    for c in base:
-        c.setdefault("rss", ""); c.setdefault("github", "")
-        c["selected"] = True; c["threat"] = "Medium"; c["threat_score"] = 50
-    return base
-
-def score_threats(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-    try:
-        import feedparser
-    except Exception:
-        feedparser = None
-    now = dt.datetime.utcnow()
-    for c in items:
-        score = 20 + (25 if c.get("rss") else 0) + (15 if c.get("github") else 0)
-        recent = 0
-        if feedparser and c.get("rss"):
-            try:
-                fp = feedparser.parse(c["rss"])
-                if getattr(fp, "entries", None):
-                    e = fp.entries[0]
-                    if getattr(e, "published_parsed", None):
-                        pub = dt.datetime(*e.published_parsed[:6])
-                        days = (now - pub).days
-                        recent = 10 if days <= 7 else 6 if days <= 30 else 3 if days <= 90 else 0
-            except Exception:
-                pass
-        score += recent
-        if c["name"].lower() in ("salesforce","shopify","stripe","figma","vercel","hubspot","square","adyen"):
-            score += 15
-        elif len(c["name"]) <= 6:
-            score += 5
-        score = max(0, min(100, score))
-        c["threat_score"] = score
-        c["threat"] = "Critical" if score >= 80 else "High" if score >= 65 else "Medium" if score >= 40 else "Low"
-    return items
-
-def fetch_competitor_updates(company: str, industry: str, selected: List[Dict[str, Any]], demo: bool=False) -> List[Dict[str, Any]]:
-    """Produce normalized events for the Live feed and digest.
-    - Always return at least 1 event per selected competitor in Demo Mode.
-    - Include consistent fields so storage never rejects/silently drops."""
-    events: List[Dict[str, Any]] = []
-    try:
-        import feedparser  # optional
-    except Exception:
-        feedparser = None
-
-    now_iso = dt.datetime.utcnow().isoformat() + "Z"
+from services.ingest import fetch_competitor_updates
+from services.threats import scored_competitors, warm_up
 
-    for c in selected:
-        # Real RSS if available + not demo
-        if not demo and feedparser and c.get("rss"):
-            try:
-                feed = feedparser.parse(c["rss"])
-                for e in (getattr(feed, "entries", []) or [])[:3]:
-                    title = getattr(e, "title", "Update")
-                    link  = getattr(e, "link", c.get("site", "#"))
-                    summary = (getattr(e, "summary", "") or "").strip()
-                    events.append({
-                        "company": company,
-                        "competitor": c["name"],
-                        "industry": industry,
-                        "source_type": "rss",
-                        "source_url": link,
-                        "title": f"{c['name']}: {title}",
-                        "raw": summary or title,
-                        "summary": "",
-                        "category": "Features",
-                        "impact": 3,            # default; classifier can update later
-                        "confidence": 70,       # %
-                        "published_at": now_iso
-                    })
-            except Exception:
-                # fail soft—continue into demo record if demo=True
-                pass
-
-        # Guaranteed demo record (and fallback if feedparser missing)
-        if demo or not feedparser or not c.get("rss"):
-            events.append({
-                "company": company,
-                "competitor": c["name"],
-                "industry": industry,
-                "source_type": "demo",
-                "source_url": c.get("site", "#"),
-                "title": f"{c['name']} announces new {industry} capabilities",
-                "raw": f"Demo intel: {c['name']} shipped automation & AI enhancements for {industry}.",
-                "summary": "",
-                "category": "Launch",
-                "impact": 3,
-                "confidence": 80,
-                "published_at": now_iso
-            })
-
-    return events
+if os.environ.get("INTEL_AGENT_THREAT_WARMUP", "1") != "0":
+    warm_up()  # background pre-scoring of every industry; a no-op once the cache is filled
 
 
 # ------------------------------------------------------------------
@@ -356,14 +235,14 @@ tab1, tab2, tab3, tab4 = st.tabs(["🎯 Discovery", "📊 Intelligence Digest",
 # ------------------------------------------------------------------
 # TAB 1: Discovery
 # ------------------------------------------------------------------
-with tab1:
+with tab1, metrics.span("tab.discovery"):
     st.markdown('<div class="section-title">🔍 Competitor Discovery</div>', unsafe_allow_html=True)
     
     if st.button("🚀 Auto-Discover Competitors", use_container_width=True):
         with st.spinner("Scanning competitive landscape..."):
             try:
-                ss.competitors = discover_competitors(industry)
-                ss.competitors = score_threats(ss.competitors)
+                # Process-wide, TTL'd and refreshed in the background (services.threats)
+                ss.competitors = scored_competitors(industry)
                 st.success(f"✓ Found {len(ss.competitors)} competitors in {industry}")
                 st.rerun()
             except Exception as e:
@@ -429,26 +308,20 @@ with tab1:
                 ss.last_fetch_ts = now_ts
                 with st.spinner("Gathering competitive intelligence..."):
                     try:
-                        events = fetch_competitor_updates(company, industry, ss.selected_competitors, demo_mode)
-
-                        from services.storage import get_events, set_events
-                        existing = get_events() or []
-                        combined = existing + events
-
-                        # Stronger de-dupe (competitor + normalized title)
-                        seen = set()
-                        deduped = []
-                        for e in combined:
-                            key = (e.get("competitor","").strip().lower(),
-                                   (e.get("title","") or "").strip().lower())
-                            if key in seen:
-                                continue
-                            seen.add(key)
-                            deduped.append(e)
-
-                        set_events(deduped)
-                        new_items = max(0, len(deduped) - len(existing))
+                        from services.cursors import CursorBatch
+                        cursors = CursorBatch()
+                        events, failures = fetch_competitor_updates(company, industry, ss.selected_competitors,
+                                                                    demo_mode, cursors=cursors)
+
+                        # Append-only; the store skips anything already seen under
+                        # (competitor + normalized title) or (title, source_url).
+                        from services.storage import insert_events_async
+                        new_items = insert_events_async(events).result()
+                        cursors.commit()  # sources resume past these only now that they are stored
                         st.success(f"✓ Saved {new_items} new intelligence item(s). Open the ⚡ Live Monitoring tab to view.")
+                        if failures:
+                            st.warning("Some feeds could not be fetched:\n" +
+                                       "\n".join(f"- {name}: {why}" for name, why in failures.items()))
                     except Exception as e:
                         show_error_box("Fetch intelligence", e)
 
@@ -456,25 +329,37 @@ with tab1:
 # ------------------------------------------------------------------
 # TAB 2: Intelligence Digest
 # ------------------------------------------------------------------
-with tab2:
+with tab2, metrics.span("tab.digest"):
     st.markdown('<div class="section-title">📊 Intelligence Digest</div>', unsafe_allow_html=True)
     
     if st.button("🧠 Generate AI Digest", use_container_width=True):
-        with st.spinner("AI analyzing competitive landscape..."):
-            try:
-                from services.storage import get_events
-                from services.ai import generate_digest
-                
-                events = get_events() or []
-                if not events:
-                    st.warning("No intelligence data available. Fetch updates first.")
-                else:
-                    digest = generate_digest(company, industry, events, demo_mode)
-                    ss.digest_data = digest
+        try:
+            from services.storage import snapshot
+            from services.ai import stream_digest, generate_hierarchical_digest, DIGEST_DIRECT_LIMIT
+            
+            events = snapshot()
+            if not events:
+                st.warning("No intelligence data available. Fetch updates first.")
+            elif len(events) > DIGEST_DIRECT_LIMIT:
+                # Too many signals for one prompt: summarize per competitor, then combine
+                bar = st.progress(0.0, text="AI analyzing competitive landscape...")
+                ss.digest_data = generate_hierarchical_digest(
+                    company, industry, events, demo_mode,
+                    progress=lambda done, total, label: bar.progress(done / total, text=f"{label} ({done}/{total})"),
+                )
+                st.success("✓ Digest generated")
+                st.rerun()
+            else:
+                # Stream the summary as it is written, then re-render as cards
+                stream = stream_digest(company, industry, events, demo_mode)
+                st.write_stream(stream)
+                ss.digest_data = stream.result
+                if stream.error is None:
                     st.success("✓ Digest generated")
                     st.rerun()
-            except Exception as e:
-                show_error_box("Generate digest", e)
+                st.warning("The digest stream was interrupted; showing the partial summary.")
+        except Exception as e:
+            show_error_box("Generate digest", e)
     
     if ss.digest_data:
         digest = ss.digest_data
@@ -528,7 +413,7 @@ with tab2:
 # ------------------------------------------------------------------
 # TAB 3: AI Chat
 # ------------------------------------------------------------------
-with tab3:
+with tab3, metrics.span("tab.chat"):
     st.markdown('<div class="section-title">💬 AI Intelligence Assistant</div>', unsafe_allow_html=True)
     
     # Display chat messages
@@ -544,32 +429,38 @@ with tab3:
             st.write(prompt)
         
         with st.chat_message("assistant"):
-            with st.spinner("Analyzing..."):
-                try:
-                    from services.storage import get_events
-                    from services.ai import chat_query
-                    
-                    events = get_events() or []
-                    response = chat_query(prompt, company, industry, events, demo_mode)
-                    st.write(response)
-                    ss.chat_messages.append({"role": "assistant", "content": response})
-                except Exception as e:
-                    error_msg = f"⚠️ Error: {str(e)}"
-                    st.error(error_msg)
-                    ss.chat_messages.append({"role": "assistant", "content": error_msg})
+            try:
+                from services.storage import snapshot
+                from services.ai import stream_chat_query
+                
+                events = snapshot()
+                # Render tokens as they arrive (time-to-first-token, not full generation)
+                stream = stream_chat_query(prompt, company, industry, events, demo_mode)
+                st.write_stream(stream)
+                ss.chat_messages.append({"role": "assistant", "content": stream.text})
+            except Exception as e:
+                error_msg = f"⚠️ Error: {str(e)}"
+                st.error(error_msg)
+                ss.chat_messages.append({"role": "assistant", "content": error_msg})
 
 # ------------------------------------------------------------------
 # TAB 4: Live Monitoring
 # ------------------------------------------------------------------
-with tab4:
+with tab4, metrics.span("tab.live"):
     st.markdown('<div class="section-title">⚡ Live Intelligence Feed</div>', unsafe_allow_html=True)
     
     try:
-        from services.storage import get_events
-        events = get_events() or []
-        
+        from services.storage import latest_page, alternate_sources
+        # Each page is a top-k read from the recency index; "Load more" follows the cursor.
+        events, cursor = latest_page(10)
+        for _ in range(ss.live_pages - 1):
+            if not cursor:
+                break
+            more, cursor = latest_page(10, cursor)
+            events += more
+
         if events:
-            for event in sorted(events, key=lambda x: x.get("published_at", ""), reverse=True)[:10]:
+            for event in events:
                 render_glass_card(
                     title=event.get("title", "Intelligence Update"),
                     badge=event.get("source_type", "unknown").upper(),
@@ -577,10 +468,13 @@ with tab4:
                     meta_items=[
                         event.get("competitor", "Unknown"),
                         event.get("published_at", "")[:10] if event.get("published_at") else "Recent"
-                    ],
+                    ] + ([f"+{n} sources"] if (n := len(alternate_sources(event))) else []),
                     content=event.get("raw", "")[:300] + ("..." if len(event.get("raw", "")) > 300 else ""),
                     link=event.get("source_url", "#")
                 )
+            if cursor and st.button("⬇️ Load more", key="live_more"):
+                ss.live_pages += 1
+                st.rerun()
         else:
             st.info("No intelligence data yet. Head to Discovery tab to start monitoring.")
     except Exception as e:
@@ -599,3 +493,6 @@ st.markdown(
     """,
     unsafe_allow_html=True
 )
+
+if _run is not None:
+    ss.last_run = metrics.end_run(_run)  # per session: shown in the sidebar on the next rerun
@@ -0,0 +1,258 @@
+# bench.py — micro-benchmarks for the hot paths, on seeded synthetic events
+#
+#   python bench.py                                   # 1k and 10k events, JSON store
+#   python bench.py --sizes 1k,10k,100k --backend json,sqlite,log,parts --out bench.json
+#   python bench.py --baseline bench.json             # exit 1 if anything got slower
+#
+# Each case is timed --repeat times (min and median kept), then run once more under
+# tracemalloc for its peak allocation. Results are one JSON document; with --baseline,
+# a case regresses when its min time grows by more than --tolerance (and by > 1 ms).
+
+import argparse
+import datetime as dt
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# Near-duplicate clustering has its own cases below; keep it out of the storage timings.
+os.environ.setdefault("INTEL_AGENT_DUP_THRESHOLD", "0")
+os.environ.setdefault("INTEL_AGENT_LLM_CACHE", "off")
+
+from services import storage  # noqa: E402
+from services import ai  # noqa: E402
+from services import retrieval  # noqa: E402
+from services.catalog import CATALOG  # noqa: E402
+from services.competitor import INDUSTRY_MAP  # noqa: E402
+from services.scores import summarize_activity  # noqa: E402
+
+NEAR_DUP_MAX = 100_000  # MinHash signing is pure Python; larger runs would dominate the suite
+SIZES = {"1k": 1_000, "10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+BACKENDS = {"json": "intel_data.json", "sqlite": "intel.db", "log": "log:intel_log", "parts": "parts:intel_parts"}
+
+_VERBS = ["announces", "launches", "ships", "previews", "expands", "updates", "acquires", "partners on", "prices"]
+_THINGS = ["AI assistant", "workflow automation", "analytics dashboard", "pricing tier", "mobile app",
+           "API platform", "security controls", "marketplace", "data connectors", "copilot features"]
+_WORDS = ("customers teams revenue pipeline integration enterprise release beta general availability region "
+          "latency model agents compliance onboarding partners developers self serve usage billing").split()
+
+
+# ---- synthetic events -----------------------------------------------------
+def _competitors():
+    seen = {}
+    for industry, comps in CATALOG.items():
+        for c in comps:
+            seen.setdefault(c["name"], (industry, c.get("site", "#")))
+    for industry, comps in INDUSTRY_MAP.items():
+        for c in comps:
+            seen.setdefault(c["name"], (industry, c.get("homepage", "#")))
+    return sorted((name, industry, site) for name, (industry, site) in seen.items())
+
+
+def synth_events(n, seed=0, company="Acme CRM"):
+    """`n` events shaped like intel_events.json, deterministic for a given seed."""
+    rng = random.Random(seed)
+    comps = _competitors()
+    start = dt.datetime(2025, 1, 1)
+    out = []
+    for i in range(n):
+        name, industry, site = comps[rng.randrange(len(comps))]
+        kind = rng.choice(("rss", "rss", "rss", "demo", "github"))
+        title = f"{name} {rng.choice(_VERBS)} {rng.choice(_THINGS)}"
+        out.append({
+            "company": company,
+            "competitor": name,
+            "industry": industry,
+            "source_type": kind,
+            "source_url": f"{site.rstrip('/')}/news/{i}",
+            "title": title if kind == "demo" else f"{name}: {title} #{i}",
+            "raw": " ".join([title] + rng.choices(_WORDS, k=rng.randint(15, 60))),
+            "summary": "",
+            "category": rng.choice(("Launch", "Features", "Pricing", "Partnership")),
+            "impact": rng.randint(1, 5),
+            "confidence": rng.randint(50, 95),
+            "published_at": (start + dt.timedelta(seconds=rng.randrange(365 * 86400))).isoformat() + "Z",
+        })
+    return out
+
+
+# ---- harness --------------------------------------------------------------
+def _use_store(path):
+    storage.STORE_PATH = path
+    storage._backend = None
+    storage._snap_sig = None
+
+
+def _measure(fn, setup, repeat):
+    times = []
+    for _ in range(repeat):
+        arg = setup() if setup else None
+        t0 = time.perf_counter()
+        fn(arg)
+        times.append(time.perf_counter() - t0)
+    arg = setup() if setup else None
+    tracemalloc.start()
+    try:
+        fn(arg)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {"min_s": min(times), "median_s": statistics.median(times), "peak_kb": peak // 1024, "runs": repeat}
+
+
+def cases(events, rng):
+    """(name, setup, fn) for one populated store. setup() runs untimed before each call."""
+    company, industry = "Acme CRM", "CRM"
+    snap = storage.snapshot()
+    counter = iter(range(10**9))
+
+    def fetch_batch():
+        # What Fetch Intelligence hands insert_events: half already stored, half new.
+        old = rng.sample(events, min(25, len(events)))
+        new = [dict(e, title=f"{e['title']} (follow-up {next(counter)})") for e in old]
+        return old + new
+
+    def burst():
+        # 16 sessions saving a small fetch at the same moment.
+        return [[dict(e, title=f"{e['title']} (burst {next(counter)})") for e in rng.sample(events, min(4, len(events)))]
+                for _ in range(16)]
+
+    def group_commit(batches):
+        futures = [storage.insert_events_async(b) for b in batches]
+        return [f.result() for f in futures]
+
+    def cold():
+        storage._snap_sig = None
+
+    return [
+        ("storage_read_cold", cold, lambda _: storage.get_events()),
+        ("storage_read_warm", None, lambda _: storage.get_events()),
+        ("fetch_dedupe_insert", fetch_batch, lambda batch: storage.insert_events(batch)),
+        ("burst16_insert_sync", burst, lambda batches: [storage.insert_events(b) for b in batches]),
+        ("burst16_insert_group", burst, group_commit),
+        ("live_sort_latest10", None, lambda _: storage.latest_events(10)),
+        ("count_events", None, lambda _: storage.count_events()),
+        ("summarize_activity", None, lambda _: summarize_activity(snap)),
+        ("digest_prompt", None, lambda _: ai._digest_prompt(company, industry, snap)),
+        ("map_prompts", None, lambda _: [ai._map_prompt(company, industry, "bench", snap[i:i + ai.MAP_CHUNK])
+                                         for i in range(0, min(len(snap), 100 * ai.MAP_CHUNK), ai.MAP_CHUNK)]),
+        ("bm25_build", lambda: setattr(retrieval, "_index", None), lambda _: retrieval.index_for(snap)),
+        ("chat_prompt_bm25", None,
+         lambda _: ai._chat_messages("pricing changes for AI assistant", company, industry, snap)),
+    ]
+
+
+def near_dup_build(events):
+    from services.near_dup import NearDupIndex, Pending
+    with tempfile.TemporaryDirectory() as tmp:
+        idx = NearDupIndex(os.path.join(tmp, "neardup.jsonl"), threshold=0.7)
+        pending = Pending()
+        fresh = idx.split([dict(e) for e in events], pending)
+        idx.commit(pending, fresh)
+        return len(idx)
+
+
+def run(sizes, backends, repeat, seed):
+    results = []
+    for label in sizes:
+        n = SIZES[label]
+        events = synth_events(n, seed)
+        if n <= NEAR_DUP_MAX:
+            # Backend-independent (the LSH sidecar is its own file), so measured once per size.
+            row = {"backend": "-", "size": n, "case": "near_dup_index"}
+            row.update(_measure(lambda _: near_dup_build(events), None, repeat))
+            results.append(row)
+            _report(row)
+        for backend in backends:
+            with tempfile.TemporaryDirectory() as tmp:
+                target = BACKENDS[backend]
+                if target.startswith(("log:", "parts:")):
+                    prefix, _, name = target.partition(":")
+                    _use_store(f"{prefix}:{os.path.join(tmp, name)}")
+                else:
+                    _use_store(os.path.join(tmp, target))
+                row = {"backend": backend, "size": n, "case": "storage_write"}
+                row.update(_measure(lambda _: storage.set_events(events), storage.clear_events, repeat))
+                results.append(row)
+                _report(row)
+                rng = random.Random(seed)
+                for name, setup, fn in cases(events, rng):
+                    row = {"backend": backend, "size": n, "case": name}
+                    row.update(_measure(fn, setup, repeat))
+                    results.append(row)
+                    _report(row)
+                closer = getattr(storage._store(), "close", None)
+                if closer:
+                    closer()
+                _use_store(BACKENDS["json"])
+    return results
+
+
+def _report(row):
+    print(f"{row['backend']:>6} {row['size']:>8} {row['case']:<22} min {row['min_s'] * 1000:9.2f} ms"
+          f"   median {row['median_s'] * 1000:9.2f} ms   peak {row['peak_kb']:>8} KiB", flush=True)
+
+
+def compare(results, baseline, tolerance):
+    """Regressed rows as (key, old_min, new_min)."""
+    old = {(r["backend"], r["size"], r["case"]): r["min_s"] for r in baseline.get("results", [])}
+    worse = []
+    for r in results:
+        key = (r["backend"], r["size"], r["case"])
+        prev = old.get(key)
+        if prev is not None and r["min_s"] > prev * (1 + tolerance) and r["min_s"] - prev > 0.001:
+            worse.append((key, prev, r["min_s"]))
+    return worse
+
+
+def main():
+    ap = argparse.ArgumentParser(description="INTEL-AGENT hot-path benchmarks")
+    ap.add_argument("--sizes", default="1k,10k", help=f"comma list of {','.join(SIZES)}")
+    ap.add_argument("--backend", default="json", help=f"comma list of {','.join(BACKENDS)}")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--out", default="bench.json")
+    ap.add_argument("--baseline", help="previous --out file to compare against")
+    ap.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown before failing (0.25 = +25%%)")
+    args = ap.parse_args()
+
+    sizes = [s.strip().lower() for s in args.sizes.split(",") if s.strip()]
+    backends = [b.strip().lower() for b in args.backend.split(",") if b.strip()]
+    unknown = [s for s in sizes if s not in SIZES] + [b for b in backends if b not in BACKENDS]
+    if unknown:
+        ap.error(f"unknown size/backend: {', '.join(unknown)}")
+
+    results = run(sizes, backends, max(1, args.repeat), args.seed)
+    doc = {
+        "meta": {
+            "created": dt.datetime.utcnow().isoformat() + "Z",
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": args.seed,
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    if args.out and os.path.abspath(args.out) != os.path.abspath(args.baseline or ""):
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(doc, f, indent=2)
+    if baseline is not None:
+        worse = compare(results, baseline, args.tolerance)
+        for (backend, size, case), prev, now in worse:
+            print(f"REGRESSION {backend}/{size}/{case}: {prev * 1000:.2f} ms -> {now * 1000:.2f} ms", file=sys.stderr)
+        if worse:
+            sys.exit(1)
+        print(f"no regressions vs {args.baseline} (tolerance {args.tolerance:.0%})")
+
+
+if __name__ == "__main__":
+    main()
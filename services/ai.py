@@ -1,6 +1,16 @@
 # services/ai.py
-from typing import List, Dict, Any, Optional
+from concurrent.futures import FIRST_COMPLETED, wait
+from typing import List, Dict, Any, Optional, Sequence, Mapping, Iterator, Callable, Tuple
+import datetime as dt
+import hashlib
+import json
 import os
+import time
+
+from services import http_client
+from services.llm_cache import cache_key, get_cache
+from services.retrieval import select_context
+from utils.logger import incr, record, span
 
 try:
     import streamlit as st  # type: ignore
@@ -8,6 +18,11 @@ except Exception:
     st = None  # type: ignore
 
 
+CHAT_CONTEXT_TOKENS = int(os.getenv("INTEL_AGENT_CHAT_CONTEXT_TOKENS", "1500"))
+
+_clients: Dict[str, Any] = {}  # api key -> Groq SDK client or HTTP shim
+
+
 def _get_secret(name: str) -> Optional[str]:
     val = None
     try:
@@ -18,6 +33,34 @@ def _get_secret(name: str) -> Optional[str]:
     return val or os.getenv(name)
 
 
+def _sse_chunks(resp) -> Iterator[Any]:
+    """
+    Parse an OpenAI-style text/event-stream body into SDK-shaped chunks
+    (chunk.choices[0].delta.content), stopping at `data: [DONE]`.
+    """
+    from types import SimpleNamespace
+
+    with resp:
+        # Decode ourselves: text/event-stream usually comes without a charset, and requests
+        # would then fall back to ISO-8859-1 and garble every non-ASCII token.
+        for line in resp.iter_lines():
+            raw = line.decode("utf-8", errors="replace") if isinstance(line, bytes) else line
+            if not raw or not raw.startswith("data:"):
+                continue  # blank separators, comments, event:/id: fields
+            data = raw[len("data:"):].strip()
+            if data == "[DONE]":
+                return
+            try:
+                obj = json.loads(data)
+            except ValueError:
+                continue
+            choices = [
+                SimpleNamespace(delta=SimpleNamespace(content=(c.get("delta") or {}).get("content")))
+                for c in obj.get("choices", [])
+            ]
+            yield SimpleNamespace(choices=choices)
+
+
 def _use_groq():
     """
     Return a 'client' with .chat.completions.create(...), or (None, reason).
@@ -33,10 +76,16 @@ def _use_groq():
     if not key:
         return None, "Missing GROQ_API_KEY"
 
+    # Clients are long-lived: building one per call would pay a new TCP+TLS handshake each time.
+    cached = _clients.get(key)
+    if cached is not None:
+        return cached, None
+
     # First try official SDK; if missing, use tiny HTTP shim.
     try:
         from groq import Groq  # type: ignore
-        return Groq(api_key=key), None
+        client = _clients[key] = Groq(api_key=key)
+        return client, None
     except Exception:
         pass
 
@@ -58,8 +107,7 @@ def _use_groq():
                 def __init__(self, outer_chat: "._GroqHTTPClient._Chat"):
                     self.outer_chat = outer_chat
 
-                def create(self, model: str, messages: list, temperature: float = 0.2):
-                    import requests
+                def create(self, model: str, messages: list, temperature: float = 0.2, stream: bool = False):
                     url = "https://api.groq.com/openai/v1/chat/completions"
                     headers = {
                         "Authorization": f"Bearer {self.outer_chat.outer.api_key}",
@@ -70,7 +118,14 @@ def _use_groq():
                         "messages": messages,
                         "temperature": temperature,
                     }
-                    resp = requests.post(url, headers=headers, json=payload, timeout=30)
+                    if stream:
+                        payload["stream"] = True
+                        resp = http_client.post(url, headers=headers, json=payload, stream=True,
+                                                timeout=(http_client.CONNECT_TIMEOUT, 30))
+                        resp.raise_for_status()
+                        return _sse_chunks(resp)
+                    resp = http_client.post(url, headers=headers, json=payload,
+                                            timeout=(http_client.CONNECT_TIMEOUT, 30))
                     resp.raise_for_status()
                     data = resp.json()
 
@@ -96,47 +151,160 @@ def _use_groq():
         def chat(self):
             return _GroqHTTPClient._Chat(self)
 
-    return _GroqHTTPClient(key), None
+    client = _clients[key] = _GroqHTTPClient(key)
+    return client, None
 
 
-def _groq_chat(client, messages: list[str | Dict[str, str]]) -> str:
+def _groq_chat(client, messages: list[str | Dict[str, str]], use_cache: bool = True,
+               validate: Optional[Callable[[str], bool]] = None) -> str:
     """
     Try one or more models. You can change default via env/secret:
       GROQ_MODEL="llama3-8b-8192"
     Fallback order is conservative for reliability.
+    use_cache=False skips the cache lookup (a retry after a bad reply); replies failing
+    `validate` are returned but never cached.
     """
     preferred = _get_secret("GROQ_MODEL") or "llama3-8b-8192"
     candidates = [preferred, "llama3-70b-8192"]
 
-    last_err = None
-    for model in candidates:
+    def call() -> Tuple[str, Optional[str]]:
+        last_err = None
+        for model in candidates:
+            try:
+                with span("llm.request", model=model):
+                    resp = client.chat.completions.create(
+                        model=model,
+                        messages=messages,
+                        temperature=0.2,
+                    )
+                text = resp.choices[0].message.content.strip()
+                ok = validate is None or validate(text)
+                # Cached under the model that answered, so a fallback reply never poses as the preferred model's.
+                return text, (cache_key(model, messages, 0.2) if ok else None)
+            except Exception as e:
+                last_err = e
+        raise RuntimeError(str(last_err) if last_err else "Unknown Groq error")
+
+    cache = get_cache()
+    if not use_cache:
+        text, store_key = call()
+        if store_key is not None:
+            cache.put(store_key, text)
+        return text
+    # Identical (model, messages, temperature) requests are answered from the
+    # response cache; concurrent identical misses share one upstream call.
+    return cache.get_or_call(cache_key(preferred, messages, 0.2), call)
+
+
+class _StreamNotStarted(RuntimeError):
+    """Every model failed before producing a token; callers may fall back cleanly."""
+
+
+def _groq_stream(client, messages: list[str | Dict[str, str]]) -> Iterator[str]:
+    """
+    Like _groq_chat but yields content deltas as they arrive (stream=True).
+    Model fallback only happens before the first token; a mid-stream failure is raised.
+    """
+    preferred = _get_secret("GROQ_MODEL") or "llama3-8b-8192"
+    candidates = [preferred, "llama3-70b-8192"]
+
+    cache = get_cache()
+    key = cache_key(preferred, messages, 0.2)
+    cached = cache.get(key)
+    if cached is not None:
+        incr("llm.stream_cache_hit")
+        yield cached
+        return
+    leader, flight = cache.begin(key)
+    if not leader:
         try:
-            resp = client.chat.completions.create(
-                model=model,
-                messages=messages,
-                temperature=0.2,
-            )
-            return resp.choices[0].message.content.strip()
+            value = cache.join(flight)
         except Exception as e:
-            last_err = e
-    raise RuntimeError(str(last_err) if last_err else "Unknown Groq error")
+            raise _StreamNotStarted(str(e))
+        if value is not None:
+            yield value
+            return
+        # The leader hung or its reader went away: stream this one ourselves, uncached.
+
+    parts: List[str] = []
+    answered_by: Optional[str] = None
+    start = time.perf_counter()
+    try:
+        last_err = None
+        for model in candidates:
+            try:
+                stream = client.chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    temperature=0.2,
+                    stream=True,
+                )
+                for chunk in stream:
+                    delta = chunk.choices[0].delta.content if chunk.choices else None
+                    if delta:
+                        if not parts:
+                            record("llm.first_token", time.perf_counter() - start, model=model)
+                        parts.append(delta)
+                        yield delta
+                if parts:
+                    answered_by = model
+                    break
+            except Exception as e:
+                if parts:
+                    raise
+                last_err = e
+        if not parts:
+            raise _StreamNotStarted(str(last_err) if last_err else "Empty Groq stream")
+    except BaseException as e:  # includes GeneratorExit when the UI stops reading
+        record("llm.stream", time.perf_counter() - start, error=True)
+        if leader:
+            cache.finish(key, error=e)
+        raise
+    record("llm.stream", time.perf_counter() - start)
+    text = "".join(parts).strip()
+    if leader:
+        cache.finish(key, text, store_key=cache_key(answered_by or preferred, messages, 0.2))
+    else:
+        cache.put(cache_key(answered_by or preferred, messages, 0.2), text)
+
+
+def complete(messages: list[Dict[str, str]], use_cache: bool = True,
+             validate: Optional[Callable[[str], bool]] = None) -> Optional[str]:
+    """
+    One (cached) Groq completion for callers outside this module; None when running locally
+    or on error. See _groq_chat for use_cache / validate.
+    """
+    client, err = _use_groq()
+    if not client:
+        return None
+    try:
+        return _groq_chat(client, messages, use_cache=use_cache, validate=validate)
+    except Exception:
+        return None
+
+
+def remote_enabled() -> bool:
+    return _use_groq()[0] is not None
 
 
-def _top_competitors(events: List[Dict[str, Any]], n: int = 3) -> list[str]:
+def cache_stats() -> Dict[str, int]:
+    """Hit/miss counters of the LLM response cache (memory + disk tiers, single-flight joins)."""
+    return dict(get_cache().stats)
+
+
+def _top_competitors(events: Sequence[Mapping[str, Any]], n: int = 3) -> list[str]:
     from collections import Counter
     cnt = Counter([e.get("competitor", "Unknown") for e in events])
     return [name for name, _ in cnt.most_common(n)]
 
 
-def generate_digest(company: str, industry: str, events: List[Dict[str, Any]], demo_mode: bool) -> Dict[str, Any]:
-    client, err = _use_groq()
-
+def _digest_prompt(company: str, industry: str, events: Sequence[Mapping[str, Any]]) -> str:
     # Normalize facts
     bullet_facts = [
         f"- {e.get('competitor','?')}: {e.get('title','(no title)')} (impact {e.get('impact',3)})"
         for e in events[:80]
     ]
-    prompt = (
+    return (
         f"You are a competitive intelligence analyst for {company} in {industry}.\n"
         f"Write a tight 120-160 word executive summary, 3 key threats, 3 opportunities, "
         f"and 5 recommended actions based strictly on these signals:\n"
@@ -144,19 +312,17 @@ def generate_digest(company: str, industry: str, events: List[Dict[str, Any]], d
         "Format as plain text without markdown tables."
     )
 
-    if client:
-        try:
-            text = _groq_chat(client, [{"role": "user", "content": prompt}])
-            return {
-                "summary": text,
-                "threats": [{"title": "See summary", "severity": "High", "description": "See executive summary"}],
-                "opportunities": [{"title": "See summary", "description": "See executive summary"}],
-                "actions": [l for l in text.split("\n") if l.strip().startswith(("1","2","3","4","5"))][:5],
-            }
-        except Exception:
-            # swallow and go local
-            err = "Remote AI disabled"
 
+def _digest_from_text(text: str) -> Dict[str, Any]:
+    return {
+        "summary": text,
+        "threats": [{"title": "See summary", "severity": "High", "description": "See executive summary"}],
+        "opportunities": [{"title": "See summary", "description": "See executive summary"}],
+        "actions": [l for l in text.split("\n") if l.strip().startswith(("1","2","3","4","5"))][:5],
+    }
+
+
+def _local_digest(company: str, industry: str, events: Sequence[Mapping[str, Any]]) -> Dict[str, Any]:
     # Local heuristic (quiet, clean output for demo)
     top = _top_competitors(events, 3)
     total = len(events)
@@ -185,26 +351,287 @@ def generate_digest(company: str, industry: str, events: List[Dict[str, Any]], d
     }
 
 
-def chat_query(prompt: str, company: str, industry: str,
-               events: List[Dict[str, Any]], demo_mode: bool) -> str:
+def generate_digest(company: str, industry: str, events: Sequence[Mapping[str, Any]], demo_mode: bool) -> Dict[str, Any]:
     client, err = _use_groq()
-    context = "\n".join(
-        f"- {e.get('competitor','?')}: {e.get('title','(no title)')} (impact {e.get('impact',3)})"
-        for e in events[:80]
+    prompt = _digest_prompt(company, industry, events)
+
+    if client:
+        try:
+            text = _groq_chat(client, [{"role": "user", "content": prompt}])
+            return _digest_from_text(text)
+        except Exception:
+            # swallow and go local
+            err = "Remote AI disabled"
+
+    return _local_digest(company, industry, events)
+
+
+# ------------------------------------------------------------------
+# Hierarchical (map-reduce) digest over the full history
+# ------------------------------------------------------------------
+DIGEST_DIRECT_LIMIT = 80  # generate_digest's single-prompt window
+MAP_CHUNK = int(os.getenv("INTEL_AGENT_DIGEST_MAP_CHUNK", "80"))
+MAP_CONCURRENCY = int(os.getenv("INTEL_AGENT_DIGEST_CONCURRENCY", "4"))
+REDUCE_FANIN = max(2, int(os.getenv("INTEL_AGENT_DIGEST_FANIN", "4")))  # chunk summaries merged per call within a group
+
+
+def _group_key(e: Mapping[str, Any], group_by: str) -> str:
+    if group_by == "month":
+        return (e.get("published_at") or "")[:7] or "undated"
+    return e.get("competitor") or "Unknown"
+
+
+def _map_prompt(company: str, industry: str, group: str, events: Sequence[Mapping[str, Any]]) -> str:
+    facts = "\n".join(
+        f"- {e.get('title','(no title)')} (impact {e.get('impact',3)})" for e in events
+    )
+    return (
+        f"You are a competitive intelligence analyst for {company} in {industry}.\n"
+        f"Summarize what these signals about {group} mean for {company} in 3-5 short bullet points, "
+        f"naming concrete launches, pricing or positioning moves:\n{facts}\n"
+        "Plain text only."
+    )
+
+
+def _local_partial(group: str, events: Sequence[Mapping[str, Any]]) -> str:
+    titles = "; ".join(e.get("title", "(no title)") for e in events[:3])
+    return f"{group}: {len(events)} signal(s). Latest: {titles}"
+
+
+def _combine_prompt(company: str, industry: str, group: str, parts: Sequence[str]) -> str:
+    body = "\n\n".join(parts)
+    return (
+        f"You are a competitive intelligence analyst for {company} in {industry}.\n"
+        f"Merge these partial summaries about {group} into 3-5 short bullet points for {company}, "
+        f"keeping the concrete launches, pricing or positioning moves:\n{body}\n"
+        "Plain text only."
     )
 
+
+def _chunk_summary(client, company: str, industry: str, group: str,
+                   events: Sequence[Mapping[str, Any]]) -> Tuple[str, bool]:
+    """(summary of one MAP_CHUNK slice, whether the model wrote it)."""
+    if not client:
+        return _local_partial(group, events), False
+    try:
+        return _groq_chat(client, [{"role": "user", "content": _map_prompt(company, industry, group, events)}]), True
+    except Exception:
+        return _local_partial(group, events), False
+
+
+def _combine(client, company: str, industry: str, group: str,
+             parts: Sequence[Tuple[str, bool]]) -> Tuple[str, bool]:
+    texts = [t for t, _ in parts]
+    ok = all(o for _, o in parts)
     if client:
         try:
-            return _groq_chat(
-                client,
-                [
-                    {"role": "system", "content": f"You help {company} in {industry} with competitive intelligence."},
-                    {"role": "user", "content": f"{prompt}\n\nContext:\n{context}"},
-                ],
-            )
+            return _groq_chat(client, [{"role": "user", "content": _combine_prompt(company, industry, group, texts)}]), ok
         except Exception:
-            pass  # clean fallback below
+            pass
+    return "\n".join(texts), False
+
+
+def summarize_groups(client, company: str, industry: str, groups: Dict[str, Sequence[Mapping[str, Any]]],
+                     pool, progress: Optional[Callable[[str], None]] = None) -> Dict[str, Tuple[str, bool]]:
+    """
+    Map step for many groups on `pool`: every MAP_CHUNK slice of every group is one call,
+    all in parallel; a group with several chunk summaries is then tree-reduced, REDUCE_FANIN
+    at a time, until one summary is left. Returns group -> ("<group>:\n<summary>", ok), where
+    ok is False if any part of it came from the local fallback. progress(group) is called
+    from the calling thread as each group completes.
+    """
+    levels: Dict[str, List[Tuple[str, bool]]] = {}
+    left: Dict[str, int] = {}  # calls of the group's current level still running
+    futures: Dict[Any, Tuple[str, int]] = {}
+    out: Dict[str, Tuple[str, bool]] = {}
+
+    def step(g: str) -> None:
+        # The group's level is complete: finish it, or submit the next level's combines.
+        parts = levels[g]
+        if len(parts) == 1:
+            out[g] = (f"{g}:\n{parts[0][0]}", parts[0][1])
+            del levels[g]
+            if progress:
+                progress(g)
+            return
+        merged = [parts[j:j + REDUCE_FANIN] for j in range(0, len(parts), REDUCE_FANIN)]
+        levels[g] = [m[0] if len(m) == 1 else ("", False) for m in merged]
+        left[g] = 0
+        for j, m in enumerate(merged):
+            if len(m) > 1:
+                futures[pool.submit(_combine, client, company, industry, g, m)] = (g, j)
+                left[g] += 1
+
+    for g, evs in groups.items():
+        n = max(1, -(-len(evs) // MAP_CHUNK))
+        levels[g] = [("", False)] * n
+        left[g] = n
+        for j in range(n):
+            futures[pool.submit(_chunk_summary, client, company, industry, g,
+                                evs[j * MAP_CHUNK:(j + 1) * MAP_CHUNK])] = (g, j)
+    # wait(FIRST_COMPLETED) rather than as_completed(): step() adds futures as levels finish.
+    while futures:
+        done, _ = wait(futures, return_when=FIRST_COMPLETED)
+        for fut in done:
+            g, j = futures.pop(fut)
+            levels[g][j] = fut.result()
+            left[g] -= 1
+            if not left[g]:
+                step(g)
+    return out
+
+
+def summarize_group(client, company: str, industry: str, group: str,
+                    events: Sequence[Mapping[str, Any]]) -> str:
+    """Map step for one group (see summarize_groups)."""
+    from concurrent.futures import ThreadPoolExecutor
+
+    with ThreadPoolExecutor(max_workers=MAP_CONCURRENCY, thread_name_prefix="digest-map") as pool:
+        return summarize_groups(client, company, industry, {group: events}, pool)[group][0]
+
+
+def _reduce_prompt(company: str, industry: str, partials: Dict[str, str], total: int) -> str:
+    body = "\n\n".join(partials.values())  # one tree-reduced summary per group, not truncated
+    return (
+        f"You are a competitive intelligence analyst for {company} in {industry}.\n"
+        f"Below are per-group summaries covering all {total} signals collected.\n"
+        f"Write a tight 120-160 word executive summary, 3 key threats, 3 opportunities, "
+        f"and 5 recommended actions based strictly on these summaries:\n{body}\n"
+        "Format as plain text without markdown tables."
+    )
+
+
+def reduce_digest(client, company: str, industry: str, events: Sequence[Mapping[str, Any]],
+                  partials: Dict[str, str]) -> Dict[str, Any]:
+    """Reduce step: merge partial summaries into the usual digest dict (local fallback if no client)."""
+    if client:
+        try:
+            return _digest_from_text(_groq_chat(client, [{"role": "user", "content": _reduce_prompt(company, industry, partials, len(events))}]))
+        except Exception:
+            pass
+    digest = _local_digest(company, industry, events)
+    digest["summary"] += "\n\n" + "\n".join(" ".join(p.split())[:200] for p in partials.values())
+    return digest
+
+
+def _partials_path() -> str:
+    from services.storage import sidecar_path
+    return sidecar_path("digest_partials.json")
+
+
+def _load_partials() -> Dict[str, Dict[str, Any]]:
+    try:
+        with open(_partials_path(), "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except Exception:
+        return {}
 
+
+def _save_partials(updates: Dict[str, Dict[str, Any]]) -> None:
+    """
+    Merge `updates` into the persisted partials: read-merge-write under the file lock, so
+    sessions and the worker process don't clobber each other's partials.
+    """
+    from services.fileio import file_lock, write_json
+
+    path = _partials_path()
+    with file_lock(path):
+        data = _load_partials()
+        data.update(updates)
+        write_json(path, data)
+
+
+def _group_fingerprint(events: Sequence[Mapping[str, Any]], engine: str) -> str:
+    """Order-independent fingerprint of a group's event set (plus which engine wrote the partial)."""
+    from services.dedupe import source_key
+    h = hashlib.sha1(engine.encode("utf-8"))
+    for k in sorted(source_key(e) for e in events):
+        h.update(k.encode("utf-8"))
+        h.update(b"\n")
+    return h.hexdigest()
+
+
+def generate_hierarchical_digest(company: str, industry: str, events: Sequence[Mapping[str, Any]],
+                                 demo_mode: bool, group_by: str = "competitor",
+                                 concurrency: int = MAP_CONCURRENCY,
+                                 progress: Optional[Callable[[int, int, str], None]] = None,
+                                 incremental: bool = True) -> Dict[str, Any]:
+    """
+    Digest over the whole store: map = summarize each competitor (or month, group_by="month")
+    in parallel, at most `concurrency` LLM calls at a time; reduce = one call merging the partials.
+    With `incremental`, partials are persisted next to the event store keyed by a fingerprint of
+    each group's event set, and only groups whose events changed are re-summarized.
+    `progress(done, total, label)` is called from the calling thread, so it may touch Streamlit.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    client, err = _use_groq()
+    engine = (_get_secret("GROQ_MODEL") or "llama3-8b-8192") if client else "local"
+    groups: Dict[str, List[Mapping[str, Any]]] = {}
+    for e in events:
+        groups.setdefault(_group_key(e, group_by), []).append(e)
+
+    total = len(groups) + 1
+    partials: Dict[str, str] = {}
+    stored = _load_partials() if incremental else {}
+    fingerprints: Dict[str, str] = {}
+    stale: Dict[str, List[Mapping[str, Any]]] = {}
+    for g, evs in groups.items():
+        slot = f"{company}|{industry}|{group_by}|{g}"
+        fingerprints[g] = _group_fingerprint(evs, engine) if incremental else ""
+        prev = stored.get(slot)
+        if prev and prev.get("fingerprint") == fingerprints[g]:
+            partials[g] = prev["summary"]
+        else:
+            stale[g] = evs
+    if progress and partials:
+        progress(len(partials), total, f"Reused {len(partials)} unchanged summaries")
+
+    done = [len(partials)]
+
+    def group_done(g: str) -> None:
+        done[0] += 1
+        if progress:
+            progress(done[0], total, f"Summarized {g}")
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="digest-map") as pool:
+        fresh = summarize_groups(client, company, industry, stale, pool, group_done)
+    for g, (text, _ok) in fresh.items():
+        partials[g] = text
+    partials = {g: partials[g] for g in groups}  # stable order for the reduce prompt (and its cache key)
+
+    # A partial that fell back to the local heuristic anywhere (e.g. a transient Groq error)
+    # is used for this digest but not persisted, so the next run asks the model again.
+    keep = [g for g, (_text, ok) in fresh.items() if ok or engine == "local"]
+    if incremental and keep:
+        now_iso = dt.datetime.utcnow().isoformat() + "Z"
+        _save_partials({
+            f"{company}|{industry}|{group_by}|{g}": {"fingerprint": fingerprints[g], "summary": partials[g],
+                                                    "events": len(groups[g]), "updated": now_iso}
+            for g in keep
+        })
+
+    if progress:
+        progress(total - 1, total, "Combining summaries")
+    digest = reduce_digest(client, company, industry, events, partials)
+    if progress:
+        progress(total, total, "Done")
+    return digest
+
+
+def _chat_messages(prompt: str, company: str, industry: str,
+                   events: Sequence[Mapping[str, Any]]) -> List[Dict[str, str]]:
+    # BM25 top-k for this question within a token budget, not the first 80 events
+    with span("prompt.chat_context", events=len(events)):
+        context = "\n".join(select_context(events, prompt, max_tokens=CHAT_CONTEXT_TOKENS))
+    return [
+        {"role": "system", "content": f"You help {company} in {industry} with competitive intelligence."},
+        {"role": "user", "content": f"{prompt}\n\nContext:\n{context}"},
+    ]
+
+
+def _local_chat(events: Sequence[Mapping[str, Any]]) -> str:
     # Clean local fallback (no scary error preface)
     highs = [e for e in events if e.get("impact", 0) >= 4] or events[:3]
     lines = [f"• {e.get('title','(no title)')} — {e.get('competitor','?')} (impact {e.get('impact',3)})"
@@ -216,3 +643,90 @@ def chat_query(prompt: str, company: str, industry: str,
     ]
     return "Here are the top signals I’m considering:\n" + "  \n".join(lines) + \
            "\n\nSuggested next steps:\n" + "\n".join([f"{i+1}. {g}" for i, g in enumerate(guidance)])
+
+
+def chat_query(prompt: str, company: str, industry: str,
+               events: Sequence[Mapping[str, Any]], demo_mode: bool) -> str:
+    client, err = _use_groq()
+
+    if client:
+        try:
+            return _groq_chat(client, _chat_messages(prompt, company, industry, events))
+        except Exception:
+            pass  # clean fallback below
+
+    return _local_chat(events)
+
+
+# ------------------------------------------------------------------
+# Streaming variants: yield text as the model produces it
+# ------------------------------------------------------------------
+class TokenStream:
+    """
+    Iterable of text chunks (feed it to st.write_stream). Once exhausted,
+    `.text` holds the whole reply and `.result` whatever `finish(text)` built.
+    If the stream breaks after some text was shown, that text is kept, a note is
+    appended and `.error` holds the exception; a failure before any text is raised.
+    """
+
+    def __init__(self, chunks: Iterator[str], finish: Callable[[str], Any] = lambda t: t):
+        self._chunks = chunks
+        self._finish = finish
+        self.text = ""
+        self.result: Any = None
+        self.error: Optional[Exception] = None
+
+    def __iter__(self) -> Iterator[str]:
+        parts: List[str] = []
+        try:
+            for chunk in self._chunks:
+                parts.append(chunk)
+                yield chunk
+        except Exception as e:
+            if not parts:
+                raise
+            self.error = e
+            note = f"\n\n⚠️ The response was cut off ({type(e).__name__}: {e})."
+            yield note
+            self.text = "".join(parts) + note
+            self.result = self._finish("".join(parts))
+            return
+        self.text = "".join(parts)
+        self.result = self._finish(self.text)
+
+
+def stream_chat_query(prompt: str, company: str, industry: str,
+                      events: Sequence[Mapping[str, Any]], demo_mode: bool) -> TokenStream:
+    """Streaming chat_query. Falls back to the local answer if no token arrives from Groq."""
+    def chunks() -> Iterator[str]:
+        client, err = _use_groq()
+        if client:
+            try:
+                yield from _groq_stream(client, _chat_messages(prompt, company, industry, events))
+                return
+            except _StreamNotStarted:
+                pass
+        yield _local_chat(events)
+
+    return TokenStream(chunks())
+
+
+def stream_digest(company: str, industry: str, events: Sequence[Mapping[str, Any]], demo_mode: bool) -> TokenStream:
+    """Streaming generate_digest: yields the executive summary text; `.result` is the digest dict."""
+    state = {"local": False}
+
+    def chunks() -> Iterator[str]:
+        client, err = _use_groq()
+        if client:
+            try:
+                yield from _groq_stream(client, [{"role": "user", "content": _digest_prompt(company, industry, events)}])
+                return
+            except _StreamNotStarted:
+                pass
+        state["local"] = True
+        yield _local_digest(company, industry, events)["summary"]
+
+    def finish(text: str) -> Dict[str, Any]:
+        return _local_digest(company, industry, events) if state["local"] else _digest_from_text(text.strip())
+
+    return TokenStream(chunks(), finish)
@@ -1,4 +1,6 @@
-import os, requests, streamlit as st
+import os, streamlit as st
+
+from services import http_client
 
 MODEL = "llama-3.1-8b-instant"
 
@@ -9,7 +11,7 @@ def groq_chat(prompt: str, temperature: float = 0.2) -> str:
     key = _get_key()
     if not key:
         raise RuntimeError("Missing GROQ_API_KEY (set in Streamlit secrets or environment).")
-    r = requests.post(
+    r = http_client.post(
         "https://api.groq.com/openai/v1/chat/completions",
         headers={"Authorization": f"Bearer {key}"},
         json={"model": MODEL, "messages":[{"role":"user","content":prompt}], "temperature":temperature},
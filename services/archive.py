@@ -0,0 +1,174 @@
+# services/archive.py
+from __future__ import annotations
+from collections import defaultdict
+from typing import List, Dict, Any, Iterator, Mapping, Optional, Tuple
+import datetime as dt
+import gzip
+import json
+import os
+import re
+import time
+
+from services.dedupe import source_key
+from services.recency import position, published_ts
+
+# Retention for the hot store (services.storage) plus cold, month-partitioned archives.
+#
+#   max age        events published more than RETAIN_DAYS ago leave the hot store
+#   per competitor only the newest MAX_PER_COMPETITOR events per competitor stay hot
+#
+# Evicted events are appended to <store>.archive/events-YYYY-MM.jsonl.gz (one gzip member
+# per run, so archiving never rewrites a file); undated events go to events-undated.jsonl.gz.
+# query_archive() / query_history() still reach them for long-range analysis.
+RETAIN_DAYS = float(os.environ.get("INTEL_AGENT_RETAIN_DAYS", "90"))               # 0 = no age limit
+MAX_PER_COMPETITOR = int(os.environ.get("INTEL_AGENT_MAX_PER_COMPETITOR", "1000"))  # 0 = no cap
+_PART_RE = re.compile(r"^events-(\d{4})-(\d{2})\.jsonl\.gz$")
+
+
+def archive_dir() -> str:
+    from services.storage import sidecar_path
+    return sidecar_path("archive")
+
+
+def _partition(e: Mapping[str, Any]) -> str:
+    ts = published_ts(e)
+    if not ts:
+        return "undated"
+    return dt.datetime.fromtimestamp(ts, dt.timezone.utc).strftime("%Y-%m")
+
+
+def select_expired(events: List[Mapping[str, Any]], retain_days: float = RETAIN_DAYS,
+                   max_per_competitor: int = MAX_PER_COMPETITOR, now: Optional[float] = None) -> List[Mapping[str, Any]]:
+    """Events the retention policy moves out of the hot store."""
+    now = time.time() if now is None else now
+    cutoff = now - retain_days * 86400 if retain_days > 0 else None
+    expired: Dict[str, Mapping[str, Any]] = {}
+    for e in events:
+        ts = published_ts(e)
+        if cutoff is not None and ts and ts < cutoff:  # undated events never expire by age
+            expired[source_key(e)] = e
+    if max_per_competitor > 0:
+        by_comp: Dict[str, List[Mapping[str, Any]]] = defaultdict(list)
+        for e in events:
+            if source_key(e) not in expired:
+                by_comp[e.get("competitor", "") or ""].append(e)
+        for items in by_comp.values():
+            if len(items) > max_per_competitor:
+                items.sort(key=position, reverse=True)
+                for e in items[max_per_competitor:]:
+                    expired[source_key(e)] = e
+    return list(expired.values())
+
+
+def write_archive(events: List[Mapping[str, Any]], root: Optional[str] = None) -> Dict[str, int]:
+    """Append `events` to their monthly partitions. Returns events written per partition."""
+    root = root or archive_dir()
+    parts: Dict[str, List[Mapping[str, Any]]] = defaultdict(list)
+    for e in events:
+        parts[_partition(e)].append(e)
+    os.makedirs(root, exist_ok=True)
+    for part, items in parts.items():
+        blob = "".join(json.dumps(dict(e), ensure_ascii=False) + "\n" for e in items).encode("utf-8")
+        with open(os.path.join(root, f"events-{part}.jsonl.gz"), "ab") as f:
+            f.write(gzip.compress(blob, compresslevel=6))
+            f.flush()
+            os.fsync(f.fileno())
+    return {part: len(items) for part, items in parts.items()}
+
+
+def run_retention(retain_days: float = RETAIN_DAYS, max_per_competitor: int = MAX_PER_COMPETITOR,
+                  dry_run: bool = False) -> Dict[str, Any]:
+    """
+    Move expired events from the hot store into the archive. The archive is written and
+    fsynced before the events are deleted from the hot store, so a crash in between can
+    only leave an event in both places (archive reads de-duplicate), never in neither.
+    """
+    from services import storage
+
+    expired = select_expired(list(storage.snapshot()), retain_days, max_per_competitor)
+    result: Dict[str, Any] = {"expired": len(expired), "partitions": {}, "hot": storage.count_events()}
+    if not expired or dry_run:
+        return result
+    result["partitions"] = write_archive(expired)
+    # Deleted by key under the store lock: events inserted meanwhile are kept.
+    storage.delete_events(source_key(e) for e in expired)
+    result["hot"] = storage.count_events()
+    return result
+
+
+# ---- reads ----------------------------------------------------------------
+def partitions(root: Optional[str] = None) -> List[Tuple[str, str]]:
+    """(partition, path) pairs, oldest month first, "undated" last."""
+    root = root or archive_dir()
+    try:
+        names = os.listdir(root)
+    except OSError:
+        return []
+    out = sorted((f"{m.group(1)}-{m.group(2)}", os.path.join(root, n)) for n in names if (m := _PART_RE.match(n)))
+    undated = os.path.join(root, "events-undated.jsonl.gz")
+    if os.path.exists(undated):
+        out.append(("undated", undated))
+    return out
+
+
+def _month(ts: float) -> str:
+    return dt.datetime.fromtimestamp(ts, dt.timezone.utc).strftime("%Y-%m")
+
+
+def query_archive(since: Optional[float] = None, until: Optional[float] = None,
+                  root: Optional[str] = None, **filters: Any) -> Iterator[Dict[str, Any]]:
+    """
+    Stream archived events published in [since, until) (UTC epoch seconds), filtered by
+    company / competitor / industry / source_type. Only overlapping months are opened.
+    """
+    lo = _month(since) if since else None
+    hi = _month(until) if until else None
+    seen = set()
+    for part, path in partitions(root):
+        if part == "undated":
+            if since or until:
+                continue
+        elif (lo and part < lo) or (hi and part > hi):
+            continue
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    e = json.loads(line)
+                except ValueError:
+                    continue
+                ts = published_ts(e)
+                if (since and ts < since) or (until and ts >= until):
+                    continue
+                if not all(e.get(k) == v for k, v in filters.items() if v is not None):
+                    continue
+                key = source_key(e)
+                if key in seen:
+                    continue
+                seen.add(key)
+                yield e
+
+
+def query_history(since: Optional[float] = None, until: Optional[float] = None, **filters: Any) -> List[Dict[str, Any]]:
+    """Hot store + archive for a time range, oldest first."""
+    from services import storage
+
+    hot = [e for e in storage.query_events(**filters)
+           if (not since or published_ts(e) >= since) and (not until or published_ts(e) < until)]
+    keys = {source_key(e) for e in hot}
+    cold = [e for e in query_archive(since, until, **filters) if source_key(e) not in keys]
+    return sorted(cold + hot, key=position)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Move old events from the hot store into monthly gzip archives.")
+    ap.add_argument("--days", type=float, default=RETAIN_DAYS, help="max age in days (0 = no age limit)")
+    ap.add_argument("--per-competitor", type=int, default=MAX_PER_COMPETITOR, help="max hot events per competitor")
+    ap.add_argument("--dry-run", action="store_true")
+    args = ap.parse_args()
+    res = run_retention(args.days, args.per_competitor, dry_run=args.dry_run)
+    verb = "would archive" if args.dry_run else "archived"
+    print(f"{verb} {res['expired']} event(s); hot store now {res['hot']}")
+    for part, n in sorted(res["partitions"].items()):
+        print(f"  {part}: {n}")
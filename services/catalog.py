@@ -0,0 +1,45 @@
+# services/catalog.py
+from __future__ import annotations
+from typing import List, Dict, Any
+
+# Built-in competitor catalog used by the Discovery tab and the headless worker.
+CATALOG: Dict[str, List[Dict[str, Any]]] = {
+    "CRM": [
+        {"name": "Salesforce", "site": "https://salesforce.com", "rss": "https://www.salesforce.com/blog/feed/"},
+        {"name": "HubSpot", "site": "https://hubspot.com", "rss": "https://blog.hubspot.com/marketing/rss.xml"},
+        {"name": "Zoho CRM", "site": "https://zoho.com/crm", "rss": "https://www.zoho.com/blog/feed.xml"},
+        {"name": "Pipedrive", "site": "https://pipedrive.com", "rss": "https://www.pipedrive.com/en/blog/rss"},
+    ],
+    "DevTools": [
+        {"name": "Vercel", "site": "https://vercel.com", "rss": "https://vercel.com/changelog/rss.xml", "github": "https://github.com/vercel/vercel"},
+        {"name": "Netlify", "site": "https://netlify.com", "rss": "https://www.netlify.com/blog/index.xml"},
+        {"name": "Render", "site": "https://render.com", "rss": "https://render.com/blog/rss.xml"},
+    ],
+    "E-commerce": [
+        {"name": "Shopify", "site": "https://shopify.com", "rss": "https://www.shopify.com/partners/blog.atom"},
+        {"name": "BigCommerce", "site": "https://bigcommerce.com", "rss": "https://www.bigcommerce.com/blog/feed/"},
+        {"name": "WooCommerce", "site": "https://woocommerce.com", "rss": "https://woocommerce.com/feed/"},
+    ],
+    "Fintech": [
+        {"name": "Stripe", "site": "https://stripe.com", "rss": "https://stripe.com/blog/feed.rss"},
+        {"name": "Adyen", "site": "https://www.adyen.com", "rss": "https://www.adyen.com/blog/rss.xml"},
+        {"name": "Square", "site": "https://squareup.com", "rss": "https://squareup.com/us/en/press/feed"},
+    ],
+    "Design Tools": [
+        {"name": "Figma", "site": "https://figma.com", "rss": "https://www.figma.com/blog/feed.xml"},
+        {"name": "Sketch", "site": "https://www.sketch.com", "rss": "https://www.sketch.com/feed.xml"},
+        {"name": "Adobe XD", "site": "https://www.adobe.com/products/xd.html", "rss": ""},
+    ],
+    "Marketing Automation": [
+        {"name": "Mailchimp", "site": "https://mailchimp.com", "rss": "https://mailchimp.com/resources/rss/"},
+        {"name": "Klaviyo", "site": "https://www.klaviyo.com", "rss": "https://www.klaviyo.com/blog/rss.xml"},
+        {"name": "ActiveCampaign", "site": "https://www.activecampaign.com", "rss": "https://www.activecampaign.com/blog/feed"},
+    ],
+}
+
+def discover_competitors(industry_key: str) -> List[Dict[str, Any]]:
+    base = [dict(c) for c in CATALOG.get(industry_key, [])]
+    for c in base:
+        c.setdefault("rss", ""); c.setdefault("github", "")
+        c["selected"] = True; c["threat"] = "Medium"; c["threat_score"] = 50
+    return base
@@ -2,13 +2,13 @@
 from __future__ import annotations
 from typing import List, Dict, Any
 import datetime as dt
+from types import SimpleNamespace
 
 # Keep it minimal: RSS via feedparser is the safest universal source
-# Add to requirements.txt: feedparser
-import feedparser
+# Add to requirements.txt: feedparser (fetching/parsing lives in services.feeds)
+from services.feeds import fetch_feed, fetch_feeds
 
-def fetch_rss_feed(url: str, limit: int = 8) -> List[Dict[str, Any]]:
-    d = feedparser.parse(url)
+def _rss_items(d, limit: int) -> List[Dict[str, Any]]:
     items: List[Dict[str, Any]] = []
     for e in d.entries[:limit]:
         items.append({
@@ -20,11 +20,27 @@ def fetch_rss_feed(url: str, limit: int = 8) -> List[Dict[str, Any]]:
         })
     return items
 
-def gather_sources(sources: Dict[str, Any], demo_mode: bool = False) -> List[Dict[str, Any]]:
+def fetch_rss_feed(url: str, limit: int = 8, incremental: bool = True, company: str = "",
+                   cursors=None) -> List[Dict[str, Any]]:
+    """
+    Up to `limit` items; with `incremental`, only those past `company`'s high-water mark
+    for the feed. The mark's advance is queued on `cursors` (a services.cursors.CursorBatch)
+    for the caller to commit once the items are stored; without it this only peeks.
+    """
+    d = fetch_feed(url)
+    if not incremental:
+        return _rss_items(d, limit)
+    from services.highwater import commit_mark, new_entries
+    fresh = new_entries(company, url, d.entries, limit)
+    if cursors is not None:
+        cursors.defer(lambda: commit_mark(company, url, fresh))
+    return _rss_items(SimpleNamespace(entries=fresh), limit)
+
+def gather_sources(sources: Dict[str, Any], demo_mode: bool = False, company: str = "") -> List[Dict[str, Any]]:
     """
     Aggregate recent items from the competitor's sources.
-    For now: RSS support (works everywhere). You can extend with
-    GitHub releases, Product Hunt, NewsAPI, etc.
+    RSS (works everywhere) plus GitHub releases of the listed repos newer than `company`'s
+    cursors. You can extend with Product Hunt, NewsAPI, etc.
     """
     results: List[Dict[str, Any]] = []
     if demo_mode:
@@ -48,12 +64,26 @@ def gather_sources(sources: Dict[str, Any], demo_mode: bool = False) -> List[Dic
         ])
         return results
 
-    # Real RSS pulls
+    # Real RSS pulls, concurrently; failed/slow feeds are skipped
+    batch = fetch_feeds({u: u for u in sources.get("rss", [])})
     for u in sources.get("rss", []):
+        if u in batch.feeds:
+            results.extend(_rss_items(batch.feeds[u], 8))
+
+    # GitHub releases newer than the company's cursor (services.github; GITHUB_TOKEN raises
+    # the rate limit). Nothing here is stored, so the cursor is not advanced.
+    from services.github import competitor_repos, new_releases
+    for repo in competitor_repos(sources):
         try:
-            results.extend(fetch_rss_feed(u))
+            releases, _ = new_releases(company, repo)
         except Exception:
-            pass
-
-    # (Optional) GitHub & others can be added here when you wire keys
+            continue
+        for r in releases[:8]:
+            results.append({
+                "title": r.get("name") or f"Release {r.get('tag_name')}",
+                "summary": (r.get("body") or "")[:500],
+                "link": r.get("html_url"),
+                "published": r.get("published_at", ""),
+                "source_type": "github",
+            })
     return results
@@ -0,0 +1,127 @@
+# services/cursors.py
+from __future__ import annotations
+from typing import Callable, List, Dict, Any, Optional
+import json
+import threading
+
+from services.fileio import file_lock, signature, write_json
+
+# Persistent per-source ingestion cursors ("where did we stop last time"), one JSON object
+# per file keyed by source (a feed URL, "owner/repo", ...). Kept next to the event store
+# (storage.sidecar_path) because they describe what the store already holds. Updates merge
+# into the file under its lock, so the app and the worker can both advance cursors.
+# Because a cursor claims "stored up to here", it only moves after the store write that
+# covers it succeeded: fetchers put their advances in a CursorBatch and the caller commits
+# it after insert_events_async(...).result().
+
+
+class CursorStore:
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._sig = None
+        self._data: Dict[str, Dict[str, Any]] = {}
+
+    def _read(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except Exception:
+            return {}
+
+    def _refresh(self) -> None:
+        sig = signature(self.path)
+        if sig != self._sig or sig is None:
+            self._data = self._read()
+            self._sig = sig
+
+    def get(self, key: str) -> Dict[str, Any]:
+        with self._lock:
+            self._refresh()
+            return dict(self._data.get(key) or {})
+
+    def all(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            self._refresh()
+            return {k: dict(v) for k, v in self._data.items()}
+
+    def update(self, key: str, **fields: Any) -> Dict[str, Any]:
+        """Merge `fields` into the cursor for `key` (None values delete the field)."""
+        return self.modify(key, lambda cur: fields)
+
+    def modify(self, key: str, fn: Callable[[Dict[str, Any]], Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        update() with the fields computed by fn(current cursor) under the file lock, for
+        counters. When fn returns no fields the file is not rewritten.
+        """
+        with self._lock, file_lock(self.path):
+            data = self._read()
+            cur = dict(data.get(key) or {})
+            fields = fn(dict(cur))
+            if not fields:
+                return cur
+            for k, v in fields.items():
+                if v is None:
+                    cur.pop(k, None)
+                else:
+                    cur[k] = v
+            data[key] = cur
+            write_json(self.path, data)
+            self._data, self._sig = data, signature(self.path)
+            return dict(cur)
+
+    def reset(self, key: Optional[str] = None) -> None:
+        with self._lock, file_lock(self.path):
+            data = {} if key is None else {k: v for k, v in self._read().items() if k != key}
+            write_json(self.path, data)
+            self._data, self._sig = data, signature(self.path)
+
+
+class CursorBatch:
+    """Cursor advances held back until the events they cover are stored (then commit())."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._updates: List[Callable[[], Any]] = []
+
+    def add(self, name: str, key: str, fields: Dict[str, Any]) -> None:
+        fields = dict(fields)
+        self.defer(lambda: get_cursors(name).update(key, **fields))
+
+    def defer(self, fn: Callable[[], Any]) -> None:
+        """Queue an arbitrary advance (e.g. services.highwater.commit_mark) for commit()."""
+        with self._lock:
+            self._updates.append(fn)
+
+    def __len__(self) -> int:
+        return len(self._updates)
+
+    def commit(self) -> None:
+        with self._lock:
+            updates, self._updates = self._updates, []
+        for fn in updates:
+            fn()
+
+
+CURSOR_FILES = ("feed_cursors.json", "github_cursors.json")  # services.highwater, services.github
+_stores: Dict[str, CursorStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_cursors(name: str) -> CursorStore:
+    """Shared CursorStore for sidecar file `name` (e.g. "github_cursors.json")."""
+    from services.storage import sidecar_path
+
+    path = sidecar_path(name)
+    with _stores_lock:
+        store = _stores.get(path)
+        if store is None:
+            store = _stores[path] = CursorStore(path)
+        return store
+
+
+def reset_all() -> None:
+    """Forget every ingestion cursor (after the store is cleared, so sources re-deliver)."""
+    for name in CURSOR_FILES:
+        get_cursors(name).reset()
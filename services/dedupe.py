@@ -0,0 +1,20 @@
+# services/dedupe.py
+from __future__ import annotations
+from typing import Dict, Any, List
+
+# Identities an event can be "already stored" under:
+#   source_key — (title, source_url), what set_events has always de-duped on
+#   title_key  — (competitor, title) normalized, the stronger check Fetch Intelligence uses
+
+
+def source_key(e: Dict[str, Any]) -> str:
+    return f"{e.get('title', '') or ''}\x1f{e.get('source_url', '') or ''}"
+
+
+def title_key(e: Dict[str, Any]) -> str:
+    return f"{(e.get('competitor', '') or '').strip().lower()}\x1f{(e.get('title', '') or '').strip().lower()}"
+
+
+def event_keys(e: Dict[str, Any]) -> List[str]:
+    """Both identities, prefixed so the two key spaces can share one index."""
+    return ["s:" + source_key(e), "t:" + title_key(e)]
@@ -0,0 +1,364 @@
+# services/event_log.py
+from __future__ import annotations
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple
+import hashlib
+import json
+import mmap
+import os
+import re
+import struct
+import threading
+
+from services.dedupe import event_keys, source_key
+from services.recency import Position, latest
+
+# Append-only event store for services.storage.
+# Selected with INTEL_AGENT_STORE=log:<dir> (or an existing directory).
+#
+#   <dir>/seg-000001-000001.jsonl   one event per line; the highest segment is active
+#   <dir>/keys.idx                  open-addressing hash table of 8-byte key fingerprints
+#
+# "Already seen?" is a probe into keys.idx, so ingesting N new events costs O(N)
+# regardless of history. Sealed segments are merged by a background compaction; retention
+# (delete_events) is the only other thing that rewrites a segment.
+SEGMENT_BYTES = int(os.environ.get("INTEL_AGENT_LOG_SEGMENT_BYTES", str(4 * 1024 * 1024)))
+COMPACT_MIN_SEGMENTS = int(os.environ.get("INTEL_AGENT_LOG_COMPACT_SEGMENTS", "4"))
+
+_SEG_RE = re.compile(r"^seg-(\d{6})-(\d{6})\.jsonl$")
+
+
+def _fingerprint(key: str) -> int:
+    fp = int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "little")
+    return fp or 1  # 0 marks an empty slot
+
+
+class KeyIndex:
+    """
+    Persistent hash set of key fingerprints (linear probing over an mmap'd file).
+    Header: magic, capacity, keys, events, covered_bytes (segment bytes already indexed).
+    """
+
+    MAGIC = b"IAKIDX01"
+    HEADER = struct.Struct("<8sQQQQ")
+    SLOT = struct.Struct("<Q")
+
+    def __init__(self, path: str, capacity: int = 1 << 14):
+        self.path = path
+        self._mm: Optional[mmap.mmap] = None
+        self._f = None
+        if not self._open():
+            self._create(path, capacity)
+            self._open()
+
+    # ---- file management --------------------------------------------------
+    @classmethod
+    def _create(cls, path: str, capacity: int) -> None:
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(cls.HEADER.pack(cls.MAGIC, capacity, 0, 0, 0))
+            f.truncate(cls.HEADER.size + capacity * cls.SLOT.size)
+        os.replace(tmp, path)
+
+    def _open(self) -> bool:
+        try:
+            f = open(self.path, "r+b")
+        except FileNotFoundError:
+            return False
+        try:
+            mm = mmap.mmap(f.fileno(), 0)
+            magic, cap, _, _, _ = self.HEADER.unpack_from(mm, 0)
+            if magic != self.MAGIC or len(mm) != self.HEADER.size + cap * self.SLOT.size:
+                raise ValueError("corrupt index")
+        except Exception:
+            f.close()
+            os.remove(self.path)
+            return False
+        self._f, self._mm = f, mm
+        return True
+
+    def close(self) -> None:
+        if self._mm is not None:
+            self._mm.close()
+            self._f.close()
+            self._mm = self._f = None
+
+    def _header(self) -> Tuple[int, int, int, int]:
+        _, cap, keys, events, covered = self.HEADER.unpack_from(self._mm, 0)
+        return cap, keys, events, covered
+
+    def _set_header(self, cap: int, keys: int, events: int, covered: int) -> None:
+        self.HEADER.pack_into(self._mm, 0, self.MAGIC, cap, keys, events, covered)
+
+    @property
+    def events(self) -> int:
+        return self._header()[2]
+
+    @property
+    def covered_bytes(self) -> int:
+        return self._header()[3]
+
+    # ---- set operations ---------------------------------------------------
+    def _probe(self, fp: int) -> Tuple[int, bool]:
+        cap = self._header()[0]
+        mask = cap - 1
+        i = fp & mask
+        while True:
+            off = self.HEADER.size + i * self.SLOT.size
+            cur = self.SLOT.unpack_from(self._mm, off)[0]
+            if cur == fp:
+                return off, True
+            if cur == 0:
+                return off, False
+            i = (i + 1) & mask
+
+    def __contains__(self, key: str) -> bool:
+        return self._probe(_fingerprint(key))[1]
+
+    def add(self, key: str) -> None:
+        cap, keys, events, covered = self._header()
+        if (keys + 1) * 2 > cap:
+            self._grow(cap * 2)
+            cap, keys, events, covered = self._header()
+        off, found = self._probe(_fingerprint(key))
+        if not found:
+            self.SLOT.pack_into(self._mm, off, _fingerprint(key))
+            self._set_header(cap, keys + 1, events, covered)
+
+    def commit(self, new_events: int, new_bytes: int) -> None:
+        cap, keys, events, covered = self._header()
+        self._set_header(cap, keys, events + new_events, covered + new_bytes)
+        self._mm.flush()
+
+    def _grow(self, capacity: int) -> None:
+        cap, keys, events, covered = self._header()
+        fps = [self.SLOT.unpack_from(self._mm, self.HEADER.size + i * self.SLOT.size)[0] for i in range(cap)]
+        tmp = self.path + ".grow"
+        self._create(tmp, capacity)
+        with open(tmp, "r+b") as f:
+            mm = mmap.mmap(f.fileno(), 0)
+            mask = capacity - 1
+            for fp in fps:
+                if not fp:
+                    continue
+                i = fp & mask
+                while self.SLOT.unpack_from(mm, self.HEADER.size + i * self.SLOT.size)[0]:
+                    i = (i + 1) & mask
+                self.SLOT.pack_into(mm, self.HEADER.size + i * self.SLOT.size, fp)
+            self.HEADER.pack_into(mm, 0, self.MAGIC, capacity, keys, events, covered)
+            mm.flush()
+            mm.close()
+        self.close()
+        os.replace(tmp, self.path)
+        self._open()
+
+
+class EventLog:
+    def __init__(self, root: str):
+        self.root = root
+        self._lock = threading.RLock()
+        self._rewrite = threading.Lock()  # compaction vs. delete_events: one segment rewrite at a time
+        self._compacting = False
+        os.makedirs(root, exist_ok=True)
+        self._repair_tail()
+        self._index = KeyIndex(os.path.join(root, "keys.idx"))
+        if self._index.covered_bytes != self._total_bytes():
+            self._rebuild_index()
+
+    # ---- segments ---------------------------------------------------------
+    def _segments(self) -> List[Tuple[int, int, str]]:
+        """Live segments in order. Ranges covered by a merged segment (crash leftovers) are dropped."""
+        segs = []
+        for name in os.listdir(self.root):
+            m = _SEG_RE.match(name)
+            if m:
+                segs.append((int(m.group(1)), int(m.group(2)), os.path.join(self.root, name)))
+        segs.sort(key=lambda s: (s[0], -s[1]))
+        live, upto = [], 0
+        for first, last, path in segs:
+            if last <= upto:
+                continue
+            live.append((first, last, path))
+            upto = last
+        return live
+
+    def _total_bytes(self) -> int:
+        return sum(os.path.getsize(p) for _, _, p in self._segments())
+
+    def _active(self, incoming: int) -> str:
+        segs = self._segments()
+        if segs and os.path.getsize(segs[-1][2]) + incoming <= SEGMENT_BYTES:
+            return segs[-1][2]
+        n = (segs[-1][1] + 1) if segs else 1
+        return os.path.join(self.root, f"seg-{n:06d}-{n:06d}.jsonl")
+
+    def _iter(self) -> Iterator[Dict[str, Any]]:
+        # Open every live segment under the lock; reading the open handles is then
+        # safe even if a compaction unlinks the files meanwhile.
+        with self._lock:
+            handles = [open(p, "r", encoding="utf-8") for _, _, p in self._segments()]
+        for f in handles:
+            with f:
+                for line in f:
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        continue
+
+    def _repair_tail(self) -> None:
+        """Drop a torn last line left by a crash mid-append, so new lines don't glue onto it."""
+        segs = self._segments()
+        if not segs:
+            return
+        with open(segs[-1][2], "rb+") as f:
+            data = f.read()
+            if data and not data.endswith(b"\n"):
+                f.truncate(data.rfind(b"\n") + 1)
+
+    def _rebuild_index(self) -> None:
+        with self._lock:
+            self._index.close()
+            try:
+                os.remove(self._index.path)
+            except FileNotFoundError:
+                pass
+            self._index = KeyIndex(self._index.path)
+            n = 0
+            for e in self._iter():
+                for k in event_keys(e):
+                    self._index.add(k)
+                n += 1
+            self._index.commit(n, self._total_bytes())
+
+    def signature(self):
+        with self._lock:
+            return (self._index.events, self._index.covered_bytes, tuple(p for _, _, p in self._segments()))
+
+    # ---- storage API ------------------------------------------------------
+    def get_events(self) -> List[Dict[str, Any]]:
+        return list(self._iter())
+
+    def insert_events(self, items: Iterable[Dict[str, Any]], added: Optional[List[Dict[str, Any]]] = None) -> int:
+        """
+        Append events not seen before under either dedupe identity. Returns how many were
+        added (also appended to `added`, once durable).
+        """
+        with self._lock:
+            lines, fresh, batch_keys = [], [], set()
+            for e in items:
+                keys = event_keys(e)
+                if any(k in batch_keys or k in self._index for k in keys):
+                    continue
+                batch_keys.update(keys)
+                lines.append(json.dumps(e, ensure_ascii=False) + "\n")
+                fresh.append(e)
+            if not lines:
+                return 0
+            blob = "".join(lines).encode("utf-8")
+            with open(self._active(len(blob)), "ab") as f:
+                f.write(blob)
+                f.flush()
+                os.fsync(f.fileno())
+            # Index only after the data is durable, so a failed write leaves no phantom keys.
+            for k in batch_keys:
+                self._index.add(k)
+            self._index.commit(len(lines), len(blob))
+            if added is not None:
+                added.extend(fresh)
+            if len(self._segments()) > COMPACT_MIN_SEGMENTS and not self._compacting:
+                self._compacting = True
+                threading.Thread(target=self.compact, name="event-log-compact", daemon=True).start()
+            return len(lines)
+
+    def set_events(self, items: Iterable[Dict[str, Any]]) -> None:
+        with self._lock:
+            self.clear_events()
+            self.insert_events(items)
+
+    def clear_events(self) -> None:
+        with self._lock:
+            for _, _, p in self._segments():
+                os.remove(p)
+            self._rebuild_index()
+
+    def delete_events(self, keys: Iterable[str], removed: Optional[List[Dict[str, Any]]] = None) -> int:
+        """
+        Drop the events with these source keys by rewriting the segments holding them in
+        place (same names, so segment order is kept). Returns how many were removed (also
+        appended to `removed`).
+        """
+        gone = set(keys)
+        n = 0
+        with self._rewrite, self._lock:
+            for _, _, path in self._segments():
+                with open(path, "rb") as f:
+                    lines = f.readlines()
+                keep, dropped = [], []
+                for line in lines:
+                    try:
+                        e = json.loads(line)
+                    except ValueError:
+                        keep.append(line)
+                        continue
+                    if source_key(e) in gone:
+                        dropped.append(e)
+                    else:
+                        keep.append(line)
+                if len(keep) == len(lines):
+                    continue
+                tmp = path + ".tmp"
+                with open(tmp, "wb") as out:
+                    out.writelines(keep)
+                    out.flush()
+                    os.fsync(out.fileno())
+                os.replace(tmp, path)
+                n += len(dropped)
+                if removed is not None:
+                    removed.extend(dropped)
+            if n:
+                self._rebuild_index()
+        return n
+
+    def query_events(self, limit: Optional[int] = None, **filters: Any) -> List[Dict[str, Any]]:
+        out = []
+        for e in self._iter():
+            if all(e.get(k) == v for k, v in filters.items() if v is not None):
+                out.append(e)
+                if limit is not None and len(out) >= limit:
+                    break
+        return out
+
+    def latest_events(self, n: int = 10, after: Optional[Position] = None, **filters: Any) -> List[Dict[str, Any]]:
+        return latest(self._iter(), n, after, **filters)
+
+    def count_events(self, **filters: Any) -> int:
+        if not any(v is not None for v in filters.values()):
+            return self._index.events
+        return len(self.query_events(**filters))
+
+    # ---- compaction -------------------------------------------------------
+    def compact(self) -> int:
+        """Merge all sealed segments into one. Returns how many segments were merged away."""
+        try:
+            with self._rewrite:
+                with self._lock:
+                    sealed = self._segments()[:-1]
+                if len(sealed) < 2:
+                    return 0
+                first, last = sealed[0][0], sealed[-1][1]
+                target = os.path.join(self.root, f"seg-{first:06d}-{last:06d}.jsonl")
+                tmp = target + ".tmp"
+                with open(tmp, "wb") as out:
+                    for _, _, p in sealed:  # sealed segments only change under _rewrite; copy bytes verbatim
+                        with open(p, "rb") as f:
+                            for chunk in iter(lambda: f.read(1 << 20), b""):
+                                out.write(chunk)
+                    out.flush()
+                    os.fsync(out.fileno())
+                with self._lock:
+                    os.replace(tmp, target)
+                    for _, _, p in sealed:
+                        if p != target:
+                            os.remove(p)
+                return len(sealed) - 1
+        finally:
+            self._compacting = False
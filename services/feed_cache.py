@@ -0,0 +1,128 @@
+# services/feed_cache.py
+from __future__ import annotations
+from typing import Any, Dict, Optional
+import hashlib
+import json
+import os
+import threading
+import time
+
+import feedparser
+
+# On-disk HTTP feed cache: one JSON file per URL holding the validators
+# (ETag / Last-Modified) and the already-parsed entries, so a 304 costs no parsing.
+CACHE_DIR = os.environ.get("INTEL_AGENT_FEED_CACHE", os.path.join(".intel_cache", "feeds"))
+FEED_TTL = float(os.environ.get("INTEL_AGENT_FEED_TTL", "900"))  # seconds served without revalidating
+CACHE_MAX_BYTES = int(float(os.environ.get("INTEL_AGENT_FEED_CACHE_MB", "64")) * 1024 * 1024)
+
+
+def _jsonable(value: Any) -> Any:
+    if isinstance(value, time.struct_time):
+        return list(value)
+    if isinstance(value, dict):
+        return {k: _jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(v) for v in value]
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)
+
+
+def _restore(value: Any) -> Any:
+    if isinstance(value, dict):
+        return feedparser.FeedParserDict({
+            k: (time.struct_time(v) if k.endswith("_parsed") and isinstance(v, list) and len(v) == 9 else _restore(v))
+            for k, v in value.items()
+        })
+    if isinstance(value, list):
+        return [_restore(v) for v in value]
+    return value
+
+
+class FeedCache:
+    """Size-bounded LRU of parsed feeds; recency is the file mtime, bumped on every hit."""
+
+    def __init__(self, root: str = CACHE_DIR, ttl: float = FEED_TTL, max_bytes: int = CACHE_MAX_BYTES):
+        self.root = root
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    def _path(self, url: str) -> str:
+        return os.path.join(self.root, hashlib.sha1(url.encode("utf-8")).hexdigest() + ".json")
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        """Return the cache record ({etag, last_modified, fetched_at, feed}) or None."""
+        path = self._path(url)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                rec = json.load(f)
+            os.utime(path)
+        except Exception:
+            return None
+        raw_feed = rec.get("feed") or {}
+        return dict(rec, feed=_restore(raw_feed), _raw_feed=raw_feed)
+
+    def is_fresh(self, rec: Dict[str, Any]) -> bool:
+        return time.time() - float(rec.get("fetched_at", 0)) < self.ttl
+
+    def put(self, url: str, feed: Any, etag: Optional[str] = None, last_modified: Optional[str] = None) -> None:
+        rec = {
+            "url": url,
+            "etag": etag,
+            "last_modified": last_modified,
+            "fetched_at": time.time(),
+            "feed": {"feed": _jsonable(feed.get("feed", {})), "entries": _jsonable(feed.get("entries", []))},
+        }
+        self._write(url, rec)
+
+    def touch(self, url: str, rec: Dict[str, Any]) -> None:
+        """Mark a record as revalidated (after a 304) without re-serializing entries."""
+        raw = {k: v for k, v in rec.items() if k not in ("feed", "_raw_feed")}
+        raw.update(fetched_at=time.time(), feed=rec.get("_raw_feed", {}))
+        self._write(url, raw)
+
+    def _write(self, url: str, rec: Dict[str, Any]) -> None:
+        os.makedirs(self.root, exist_ok=True)
+        path = self._path(url)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"  # app and worker share the cache dir
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(rec, f, ensure_ascii=False)
+        os.replace(tmp, path)
+        self._evict()
+
+    def _evict(self) -> None:
+        with self._lock:
+            try:
+                files = [os.path.join(self.root, n) for n in os.listdir(self.root) if n.endswith(".json")]
+                stats = sorted(((os.stat(p), p) for p in files), key=lambda sp: sp[0].st_mtime)
+            except OSError:
+                return
+            total = sum(st.st_size for st, _ in stats)
+            for st, p in stats:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(p)
+                    total -= st.st_size
+                except OSError:
+                    pass
+
+    def clear(self) -> None:
+        if not os.path.isdir(self.root):
+            return
+        for n in os.listdir(self.root):
+            try:
+                os.remove(os.path.join(self.root, n))
+            except OSError:
+                pass
+
+
+_cache: Optional[FeedCache] = None
+
+
+def get_cache() -> FeedCache:
+    global _cache
+    if _cache is None:
+        _cache = FeedCache()
+    return _cache
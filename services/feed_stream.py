@@ -0,0 +1,152 @@
+# services/feed_stream.py
+from __future__ import annotations
+from typing import List, Dict, Any, Iterable, Iterator, Optional
+from xml.etree.ElementTree import XMLPullParser, ParseError
+import datetime as dt
+import email.utils
+import time
+
+import feedparser
+
+from utils.logger import incr, span
+
+# Bounded, incremental feed parsing for services.feeds. The HTTP body is fed chunk by chunk
+# into an XMLPullParser; each finished <item>/<entry> is turned into a FeedParserDict and its
+# element cleared, and reading stops after `max_entries` entries or `max_bytes` bytes. Cost
+# is bounded by N, not by feed size (vendor blogs ship multi-MB feeds with full post bodies).
+# Anything the pull parser rejects (bad markup, HTML entities, not a feed at all) is handed
+# to feedparser instead, which copes with malformed feeds.
+ATOM = "{http://www.w3.org/2005/Atom}"
+RSS1 = "{http://purl.org/rss/1.0/}"
+CONTENT = "{http://purl.org/rss/1.0/modules/content/}"
+DC = "{http://purl.org/dc/elements/1.1/}"
+_ENTRY_TAGS = {"item", ATOM + "entry", RSS1 + "item"}
+_FEED_TITLE_TAGS = {"title", ATOM + "title", RSS1 + "title"}
+
+
+class NotAFeed(ValueError):
+    pass
+
+
+def _text(el) -> str:
+    if el is None:
+        return ""
+    return "".join(el.itertext()).strip()
+
+
+def _date(value: str) -> Optional[time.struct_time]:
+    """RFC 822 (RSS) or ISO 8601 (Atom, dc:date) to a UTC struct_time, like feedparser's *_parsed."""
+    if not value:
+        return None
+    try:
+        parsed = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        try:
+            s = value.strip()
+            parsed = dt.datetime.fromisoformat(s[:-1] + "+00:00" if s.endswith("Z") else s)
+        except ValueError:
+            return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=dt.timezone.utc)
+    return parsed.astimezone(dt.timezone.utc).timetuple()
+
+
+def _atom_link(el) -> str:
+    fallback = ""
+    for link in el.findall(ATOM + "link"):
+        rel = link.get("rel", "alternate")
+        if rel == "alternate":
+            return link.get("href", "")
+        fallback = fallback or link.get("href", "")
+    return fallback
+
+
+def _entry(el) -> feedparser.FeedParserDict:
+    if el.tag == ATOM + "entry":
+        title = _text(el.find(ATOM + "title"))
+        link = _atom_link(el)
+        guid = _text(el.find(ATOM + "id"))
+        summary = _text(el.find(ATOM + "summary")) or _text(el.find(ATOM + "content"))
+        published = _text(el.find(ATOM + "published"))
+        updated = _text(el.find(ATOM + "updated"))
+    else:
+        ns = RSS1 if el.tag == RSS1 + "item" else ""
+        title = _text(el.find(ns + "title"))
+        link = _text(el.find(ns + "link")) or el.get("{http://www.w3.org/1999/02/22-rdf-syntax-ns#}about", "")
+        guid = _text(el.find("guid"))
+        summary = _text(el.find(ns + "description")) or _text(el.find(CONTENT + "encoded"))
+        published = _text(el.find("pubDate")) or _text(el.find(DC + "date"))
+        updated = ""
+    out = feedparser.FeedParserDict(title=title, link=link, id=guid or link, summary=summary)
+    for key, value in (("published", published), ("updated", updated)):
+        if value:
+            out[key] = value
+            out[key + "_parsed"] = _date(value)
+    return out
+
+
+def parse_stream(chunks: Iterable[bytes], max_entries: int) -> feedparser.FeedParserDict:
+    """
+    First `max_entries` entries of an RSS 2.0 / RSS 1.0 / Atom document read from `chunks`.
+    Stops pulling chunks once they are parsed. Raises ParseError / NotAFeed for input the
+    pull parser cannot handle.
+    """
+    parser = XMLPullParser(events=("start", "end"))
+    entries: List[feedparser.FeedParserDict] = []
+    feed: Dict[str, Any] = {}
+    depth = 0
+    root_seen = False
+    for chunk in chunks:
+        parser.feed(chunk)
+        for event, el in parser.read_events():
+            if event == "start":
+                depth += 1
+                if not root_seen:
+                    root_seen = True
+                    if el.tag not in ("rss", ATOM + "feed", "{http://www.w3.org/1999/02/22-rdf-syntax-ns#}RDF"):
+                        raise NotAFeed(f"root element {el.tag!r} is not a feed")
+                continue
+            depth -= 1
+            if el.tag in _ENTRY_TAGS:
+                entries.append(_entry(el))
+                el.clear()
+                if len(entries) >= max_entries:
+                    return feedparser.FeedParserDict(feed=feedparser.FeedParserDict(feed), entries=entries, bozo=0)
+            elif el.tag in _FEED_TITLE_TAGS and "title" not in feed and not entries and depth <= 2:
+                feed["title"] = _text(el)
+    if not root_seen:
+        raise NotAFeed("empty document")
+    parser.close()
+    return feedparser.FeedParserDict(feed=feedparser.FeedParserDict(feed), entries=entries, bozo=0)
+
+
+class _Recorder:
+    """Iterates `chunks` while keeping what was read, so a fallback can re-parse it."""
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self._it = iter(chunks)
+        self.read: List[bytes] = []
+
+    def __iter__(self) -> Iterator[bytes]:
+        for chunk in self._it:
+            self.read.append(chunk)
+            yield chunk
+
+    def rest(self) -> bytes:
+        return b"".join(self.read) + b"".join(self._it)
+
+
+def parse_bounded(chunks: Iterable[bytes], max_entries: int) -> feedparser.FeedParserDict:
+    """parse_stream, falling back to feedparser on the whole (byte-capped) body."""
+    rec = _Recorder(chunks)
+    try:
+        feed = parse_stream(rec, max_entries)
+        incr("feed.stream_parsed")
+        return feed
+    except (ParseError, NotAFeed):
+        incr("feed.parse_fallback")
+        body = rec.rest()
+        with span("feed.parse", bytes=len(body), fallback=True):
+            feed = feedparser.parse(body)
+        feed["entries"] = feed.entries[:max_entries]
+        return feed
@@ -0,0 +1,128 @@
+# services/feeds.py
+from __future__ import annotations
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+import os
+import time
+
+import feedparser
+
+from services import http_client
+from services.feed_stream import parse_bounded
+from services.feed_cache import get_cache
+from utils.logger import incr, span
+
+# Bounded-concurrency feed engine shared by the app, connectors and parsing utils.
+# A click costs roughly the slowest feed (capped by the deadline), not the sum.
+FETCH_WORKERS = int(os.environ.get("INTEL_AGENT_FETCH_WORKERS", "8"))
+FEED_TIMEOUT = float(os.environ.get("INTEL_AGENT_FEED_TIMEOUT", "8"))
+FETCH_DEADLINE = float(os.environ.get("INTEL_AGENT_FETCH_DEADLINE", "15"))
+USER_AGENT = "INTEL-AGENT/1.0 (+competitive intelligence feed reader)"
+# Parsing is streamed and bounded (services.feed_stream): no caller reads past the first
+# few entries, so neither should the parser or the download.
+FEED_MAX_ENTRIES = int(os.environ.get("INTEL_AGENT_FEED_MAX_ENTRIES", "25"))
+FEED_MAX_BYTES = int(float(os.environ.get("INTEL_AGENT_FEED_MAX_MB", "2")) * 1024 * 1024)
+
+
+@dataclass
+class FeedBatch:
+    feeds: Dict[str, Any] = field(default_factory=dict)   # key -> parsed feed
+    errors: Dict[str, str] = field(default_factory=dict)  # key -> failure reason
+    elapsed: float = 0.0
+
+
+def download(url: str, timeout: float = FEED_TIMEOUT, headers: Optional[Dict[str, str]] = None,
+             max_entries: int = FEED_MAX_ENTRIES, max_bytes: int = FEED_MAX_BYTES):
+    """
+    GET a feed and parse its first `max_entries` entries while it arrives, reading at most
+    `max_bytes` and giving up once the whole transfer exceeds `timeout` seconds.
+    Returns (status, response headers, parsed feed); the feed is None for a 304.
+    """
+    start = time.monotonic()
+    headers = {"User-Agent": USER_AGENT, **(headers or {})}
+    with span("feed.fetch", url=url), http_client.get(url, timeout=timeout, stream=True, headers=headers) as resp:
+        if resp.status_code == 304:
+            return 304, resp.headers, None
+        resp.raise_for_status()
+
+        def chunks():
+            read = 0
+            for chunk in resp.iter_content(chunk_size=64 * 1024):
+                yield chunk
+                read += len(chunk)
+                if read >= max_bytes:
+                    incr("feed.byte_cap")
+                    return
+                if time.monotonic() - start > timeout:
+                    raise TimeoutError(f"feed took longer than {timeout:g}s")
+
+        # Returning early closes the response without reading the rest of the body.
+        return resp.status_code, resp.headers, parse_bounded(chunks(), max_entries)
+
+
+def fetch_feed(url: str, timeout: float = FEED_TIMEOUT, use_cache: bool = True, revalidate: bool = False):
+    """
+    Download and parse one feed. Raises on network errors (unlike feedparser.parse(url)).
+    Goes through the on-disk feed cache: fresh entries are served without a request,
+    stale ones are revalidated with If-None-Match / If-Modified-Since and a 304
+    reuses the stored entries without re-parsing. `revalidate=True` skips the TTL
+    shortcut (the poller wants to see changes as soon as the server has them).
+    """
+    if not use_cache:
+        return download(url, timeout)[2]
+
+    cache = get_cache()
+    rec = cache.get(url)
+    if rec and not revalidate and cache.is_fresh(rec):
+        incr("feed.cache_fresh")
+        return rec["feed"]
+
+    validators: Dict[str, str] = {}
+    if rec and rec.get("etag"):
+        validators["If-None-Match"] = rec["etag"]
+    if rec and rec.get("last_modified"):
+        validators["If-Modified-Since"] = rec["last_modified"]
+
+    status, headers, feed = download(url, timeout, validators)
+    if status == 304 and rec:
+        cache.touch(url, rec)
+        incr("feed.not_modified")
+        return rec["feed"]
+    if feed is None:  # 304 although we sent no validators
+        return feedparser.FeedParserDict(feed=feedparser.FeedParserDict(), entries=[], bozo=0)
+    cache.put(url, feed, headers.get("ETag"), headers.get("Last-Modified"))
+    return feed
+
+
+def fetch_feeds(urls: Dict[str, str], timeout: float = FEED_TIMEOUT,
+                deadline: float = FETCH_DEADLINE, max_workers: int = FETCH_WORKERS) -> FeedBatch:
+    """
+    Fetch many feeds concurrently. `urls` maps a caller key (competitor name, URL, ...)
+    to a feed URL. Feeds still running at `deadline` are reported as errors and the
+    finished ones are returned, so callers always get partial results.
+    """
+    batch = FeedBatch()
+    jobs = {k: u for k, u in urls.items() if u}
+    if not jobs:
+        return batch
+
+    start = time.monotonic()
+    pool = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(jobs))), thread_name_prefix="feed")
+    futures = {pool.submit(fetch_feed, u, timeout): k for k, u in jobs.items()}
+    try:
+        done, pending = wait(futures, timeout=deadline)
+    finally:
+        # Don't block the rerun on stragglers; queued jobs are dropped.
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    for fut in done:
+        key = futures[fut]
+        try:
+            batch.feeds[key] = fut.result()
+        except Exception as e:
+            batch.errors[key] = f"{type(e).__name__}: {e}"
+    for fut in pending:
+        batch.errors[futures[fut]] = f"timed out (deadline {deadline:g}s)"
+    batch.elapsed = time.monotonic() - start
+    return batch
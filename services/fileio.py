@@ -0,0 +1,82 @@
+# services/fileio.py
+from __future__ import annotations
+from contextlib import contextmanager
+from typing import List, Dict, Any, Iterator
+import json
+import os
+import threading
+
+# Crash- and race-safe primitives for the JSON stores (services.storage, services.partitions):
+#   file_lock     exclusive advisory lock on "<path>.lock", across threads and processes
+#   write_json    write a temp file, fsync, os.replace: readers see the old or the new file
+#   read_json     the stored list, or [] when missing/unreadable
+# Files are written compact (no indent: about 30% smaller and faster to dump than indent=2)
+# and with orjson when it is installed, which is several times faster than the json module.
+try:
+    import orjson
+except ImportError:
+    orjson = None  # type: ignore
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None  # type: ignore
+    import msvcrt
+
+
+@contextmanager
+def file_lock(path: str) -> Iterator[None]:
+    lock_path = path + ".lock"
+    os.makedirs(os.path.dirname(lock_path) or ".", exist_ok=True)
+    with open(lock_path, "a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def read_json(path: str) -> List[Dict[str, Any]]:
+    try:
+        with open(path, "rb") as f:
+            raw = f.read()
+        data = orjson.loads(raw) if orjson is not None else json.loads(raw)
+        return data if isinstance(data, list) else []
+    except Exception:
+        return []
+
+
+def dumps(items: Any) -> bytes:
+    if orjson is not None:
+        try:
+            return orjson.dumps(items)
+        except TypeError:  # e.g. a non-str dict key; the json module coerces those
+            pass
+    return json.dumps(items, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def write_json(path: str, items: Any) -> None:
+    blob = dumps(items)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(blob)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def signature(path: str):
+    try:
+        st = os.stat(path)
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+    except OSError:
+        return None
@@ -0,0 +1,228 @@
+# services/github.py
+from __future__ import annotations
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import List, Dict, Any, Iterable, Optional, Tuple
+from urllib.parse import urlsplit
+import datetime as dt
+import os
+import re
+import threading
+import time
+
+from services import http_client
+from services.cursors import CursorBatch, get_cursors
+from utils.logger import incr, span
+
+# Incremental GitHub releases connector.
+#   cursor       per (company, "owner/repo"), like services.highwater's feed marks: ETag of
+#                page 1 plus the newest release id / published_at stored for that company;
+#                new_releases() only proposes the next cursor, which the caller commits
+#                (commit_cursor / a CursorBatch) once the events are in the store
+#   conditional  page 1 is requested with If-None-Match; a 304 means nothing new (and, with a
+#                token, does not count against the rate limit)
+#   pagination   follows Link rel="next" only until the cursor release shows up; a repo seen
+#                for the first time takes just its newest INITIAL_RELEASES
+#   rate limit   X-RateLimit-Remaining / -Reset from every response; once RATE_RESERVE calls
+#                are left, remaining repos are skipped until the reset instead of failing
+# INTEL_AGENT_GITHUB_API points it at another server (GitHub Enterprise, a local stand-in).
+API_BASE = os.environ.get("INTEL_AGENT_GITHUB_API", "https://api.github.com").rstrip("/")
+TOKEN = os.environ.get("INTEL_AGENT_GITHUB_TOKEN") or os.environ.get("GITHUB_TOKEN") or ""
+PER_PAGE = int(os.environ.get("INTEL_AGENT_GITHUB_PER_PAGE", "30"))
+MAX_PAGES = int(os.environ.get("INTEL_AGENT_GITHUB_MAX_PAGES", "5"))
+INITIAL_RELEASES = int(os.environ.get("INTEL_AGENT_GITHUB_INITIAL", "8"))
+GITHUB_WORKERS = int(os.environ.get("INTEL_AGENT_GITHUB_WORKERS", "4"))
+RATE_RESERVE = int(os.environ.get("INTEL_AGENT_GITHUB_RATE_RESERVE", "5"))
+GITHUB_TIMEOUT = float(os.environ.get("INTEL_AGENT_GITHUB_TIMEOUT", "10"))
+FETCH_DEADLINE = float(os.environ.get("INTEL_AGENT_FETCH_DEADLINE", "15"))  # same budget as services.feeds
+CURSOR_FILE = "github_cursors.json"
+_NEXT_RE = re.compile(r'<([^>]+)>\s*;\s*rel="next"')
+
+
+class RateLimited(Exception):
+    pass
+
+
+class _RateGate:
+    """Tracks the API budget from response headers, shared by every thread."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.remaining: Optional[int] = None
+        self.reset_at = 0.0
+
+    def check(self) -> None:
+        with self._lock:
+            if self.remaining is not None and self.remaining <= RATE_RESERVE and time.time() < self.reset_at:
+                raise RateLimited(f"GitHub rate limit reached; resets in {self.reset_at - time.time():.0f}s")
+
+    def observe(self, resp) -> None:
+        try:
+            remaining = int(resp.headers["X-RateLimit-Remaining"])
+            reset_at = float(resp.headers.get("X-RateLimit-Reset", 0))
+        except (KeyError, TypeError, ValueError):
+            return
+        with self._lock:
+            self.remaining, self.reset_at = remaining, reset_at
+
+
+_gate = _RateGate()
+
+
+def parse_repo(url: str) -> Optional[str]:
+    """"owner/repo" for a github.com repository URL (…/releases suffixes are fine); None otherwise."""
+    parts = urlsplit(url if "://" in url else "https://" + url)
+    if not parts.netloc.lower().endswith("github.com"):
+        return None
+    segs = [s for s in parts.path.split("/") if s]
+    if len(segs) < 2:
+        return None  # an organization page, not a repository
+    return f"{segs[0]}/{segs[1].removesuffix('.git')}"
+
+
+def _headers(etag: Optional[str] = None) -> Dict[str, str]:
+    headers = {"Accept": "application/vnd.github+json", "X-GitHub-Api-Version": "2022-11-28"}
+    if TOKEN:
+        headers["Authorization"] = f"Bearer {TOKEN}"
+    if etag:
+        headers["If-None-Match"] = etag
+    return headers
+
+
+def _get(url: str, etag: Optional[str] = None):
+    _gate.check()
+    with span("github.fetch", url=url):
+        resp = http_client.get(url, headers=_headers(etag), timeout=GITHUB_TIMEOUT)
+    _gate.observe(resp)
+    if resp.status_code in (403, 429) and resp.headers.get("X-RateLimit-Remaining") == "0":
+        raise RateLimited("GitHub rate limit reached")
+    return resp
+
+
+def _seen(release: Dict[str, Any], cursor: Dict[str, Any]) -> bool:
+    if cursor.get("last_id") is not None and release.get("id") == cursor["last_id"]:
+        return True
+    last = cursor.get("last_published")
+    return bool(last and (release.get("published_at") or "") <= last)
+
+
+def cursor_key(company: str, repo: str) -> str:
+    return f"{company}::{repo}"
+
+
+def new_releases(company: str, repo: str) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Releases of `repo` published since `company`'s cursor for it, newest first, plus the
+    cursor fields that would record them. Nothing is persisted: pass the fields to
+    commit_cursor() after the releases are stored (or drop them to just peek).
+    """
+    cursor = get_cursors(CURSOR_FILE).get(cursor_key(company, repo))
+    first_run = not cursor.get("last_published")
+    url: Optional[str] = f"{API_BASE}/repos/{repo}/releases?per_page={PER_PAGE}"
+    out: List[Dict[str, Any]] = []
+    etag = None
+    for page in range(MAX_PAGES):
+        resp = _get(url, cursor.get("etag") if page == 0 else None)
+        if resp.status_code == 304:
+            incr("github.not_modified")
+            return [], {"checked_at": time.time()}
+        resp.raise_for_status()
+        if page == 0:
+            etag = resp.headers.get("ETag")
+        reached = False
+        for r in resp.json() or []:
+            if r.get("draft") or not r.get("published_at"):
+                continue
+            if _seen(r, cursor):
+                reached = True
+                break
+            out.append(r)
+        if reached or (first_run and len(out) >= INITIAL_RELEASES):
+            break
+        m = _NEXT_RE.search(resp.headers.get("Link", ""))
+        if not m:
+            break
+        url = m.group(1)
+    if first_run:
+        out = out[:INITIAL_RELEASES]
+    newest = max(out, key=lambda r: r["published_at"], default=None)
+    fields: Dict[str, Any] = {"etag": etag, "checked_at": time.time()}
+    if newest is not None and (newest["published_at"] > (cursor.get("last_published") or "")):
+        fields.update(last_id=newest.get("id"), last_published=newest["published_at"])
+    incr("github.releases_new", len(out))
+    return out, fields
+
+
+def commit_cursor(company: str, repo: str, fields: Dict[str, Any]) -> None:
+    """Advance `company`'s cursor for `repo` to what new_releases() proposed, once stored."""
+    get_cursors(CURSOR_FILE).update(cursor_key(company, repo), **fields)
+
+
+def release_events(company: str, industry: str, c: Dict[str, Any], releases: Iterable[Dict[str, Any]],
+                   now_iso: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Normalize releases into store events (same shape as services.ingest.rss_events)."""
+    now_iso = now_iso or dt.datetime.utcnow().isoformat() + "Z"
+    events: List[Dict[str, Any]] = []
+    for r in releases:
+        name = r.get("name") or f"Release {r.get('tag_name', '')}".strip()
+        body = (r.get("body") or "").strip()
+        events.append({
+            "company": company,
+            "competitor": c["name"],
+            "industry": industry,
+            "source_type": "github",
+            "source_url": r.get("html_url") or c.get("site", "#"),
+            "title": f"{c['name']}: {name}",
+            "raw": body[:1500] or name,
+            "summary": "",
+            "category": "Launch",
+            "impact": 3,
+            "confidence": 85,
+            "published_at": r.get("published_at") or now_iso,
+        })
+    return events
+
+
+def competitor_repos(c: Dict[str, Any]) -> List[str]:
+    """Repositories of a catalog / INDUSTRY_MAP competitor ("github" is a URL or a list of URLs)."""
+    urls = c.get("github") or []
+    if isinstance(urls, str):
+        urls = [urls]
+    return list(dict.fromkeys(r for r in (parse_repo(u) for u in urls if u) if r))
+
+
+def fetch_github_updates(company: str, industry: str, selected: List[Dict[str, Any]],
+                         max_workers: int = GITHUB_WORKERS, cursors: Optional[CursorBatch] = None,
+                         deadline: float = FETCH_DEADLINE) -> Tuple[List[Dict[str, Any]], Dict[str, str]]:
+    """
+    New release events for every repo of the selected competitors, fetched concurrently.
+    Returns (events, failures) like services.ingest.fetch_competitor_updates; repos still
+    running at `deadline` are reported as "timeout". Cursor advances of the finished repos
+    go into `cursors` for the caller to commit after the store write; without it the
+    cursors stay where they are.
+    """
+    jobs = [(c, repo) for c in selected for repo in competitor_repos(c)]
+    events: List[Dict[str, Any]] = []
+    failures: Dict[str, str] = {}
+    if not jobs:
+        return events, failures
+    now_iso = dt.datetime.utcnow().isoformat() + "Z"
+    pool = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(jobs))), thread_name_prefix="github")
+    futures = {pool.submit(new_releases, company, repo): (c, repo) for c, repo in jobs}
+    try:
+        done, _ = wait(futures, timeout=max(0.0, deadline))
+    finally:
+        # Don't hold the caller on a hung page; queued repos are dropped.
+        pool.shutdown(wait=False, cancel_futures=True)
+    for fut, (c, repo) in futures.items():
+        if fut not in done:
+            failures[f"{c['name']} ({repo})"] = "timeout"
+            continue
+        try:
+            releases, fields = fut.result()
+            events.extend(release_events(company, industry, c, releases, now_iso))
+        except Exception as e:
+            failures[f"{c['name']} ({repo})"] = f"{type(e).__name__}: {e}"
+            continue
+        if cursors is not None:
+            cursors.add(CURSOR_FILE, cursor_key(company, repo), fields)
+    return events, failures
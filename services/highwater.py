@@ -0,0 +1,148 @@
+# services/highwater.py
+from __future__ import annotations
+from typing import List, Dict, Any, Iterable, Optional
+import calendar
+import datetime as dt
+import threading
+
+from services.cursors import get_cursors
+from utils.logger import incr
+
+# Per-feed high-water marks, so a poll turns only the entries it has not seen into events
+# (no normalization or store dedupe for the rest of the feed). The mark per (company, feed)
+# is the newest entry timestamp plus the identities (guid, else link, else title) of the
+# last MAX_IDS new entries; an entry is new when its identity is unknown and it is not
+# older than the mark. The same record keeps per-feed stats (new per poll, last change)
+# that services.scheduler uses to pick poll intervals across restarts.
+#
+# new_entries() only reads the mark; commit_mark() moves it, and callers run it (usually
+# via a services.cursors.CursorBatch) after the store write, so entries lost to a failed
+# enrich or write are delivered again. Polls that found nothing are counted in memory and
+# folded into the feed's next write instead of rewriting the cursor file every poll.
+CURSOR_FILE = "feed_cursors.json"
+MAX_IDS = 200
+HISTORY = 20
+_idle: Dict[str, Dict[str, Any]] = {}  # key -> {"polls", "last_poll"} not written yet
+_idle_lock = threading.Lock()
+
+
+def _key(company: str, url: str) -> str:
+    return f"{company}::{url}"
+
+
+def entry_id(e: Any) -> str:
+    get = e.get if hasattr(e, "get") else lambda k, d=None: getattr(e, k, d)
+    return str(get("id") or get("guid") or get("link") or get("title") or "")
+
+
+def entry_ts(e: Any) -> Optional[float]:
+    get = e.get if hasattr(e, "get") else lambda k, d=None: getattr(e, k, d)
+    for k in ("published_parsed", "updated_parsed"):
+        t = get(k)
+        if t:
+            try:
+                return float(calendar.timegm(tuple(t)[:9]))
+            except (TypeError, ValueError, OverflowError):
+                pass
+    return None
+
+
+def new_entries(company: str, url: str, entries: Iterable[Any], limit: Optional[int] = None) -> List[Any]:
+    """
+    Entries of `url` (in feed order, at most `limit` scanned) beyond the (company, url) mark.
+    Read-only: pass the result to commit_mark() once it is stored.
+    """
+    cur = get_cursors(CURSOR_FILE).get(_key(company, url))
+    seen = set(cur.get("ids") or ())
+    mark = cur.get("ts")
+    scanned = list(entries)[:limit] if limit is not None else list(entries)
+    fresh = []
+    for e in scanned:
+        eid = entry_id(e)
+        if eid in seen:
+            continue
+        ts = entry_ts(e)
+        if mark is not None and ts is not None and ts < mark:
+            continue
+        seen.add(eid)
+        fresh.append(e)
+    incr("feed.entries_skipped", len(scanned) - len(fresh))
+    return fresh
+
+
+def commit_mark(company: str, url: str, fresh: List[Any]) -> None:
+    """Record one poll of `url` that stored `fresh` (its new_entries()); moves the mark past them."""
+    key = _key(company, url)
+    now = dt.datetime.utcnow().isoformat() + "Z"
+    with _idle_lock:
+        idle = _idle.setdefault(key, {"polls": 0})
+        idle["polls"] += 1
+        idle["last_poll"] = now
+        if not fresh:
+            return
+        del _idle[key]
+    get_cursors(CURSOR_FILE).modify(key, lambda cur: _advance(cur, fresh, idle["polls"], now))
+
+
+def _advance(cur: Dict[str, Any], fresh: List[Any], polls: int, now: str) -> Dict[str, Any]:
+    # `polls` includes the idle polls since the last write; each of those found nothing.
+    ids = [entry_id(e) for e in fresh]
+    fields: Dict[str, Any] = {
+        "polls": int(cur.get("polls", 0)) + polls,
+        "last_poll": now,
+        "last_new": len(fresh),
+        "new_total": int(cur.get("new_total", 0)) + len(fresh),
+        "history": (list(cur.get("history") or []) + [0] * (polls - 1) + [len(fresh)])[-HISTORY:],
+        "ids": (ids + [i for i in (cur.get("ids") or []) if i not in set(ids)])[:MAX_IDS],
+        "last_change": now,
+    }
+    stamps = [t for t in (entry_ts(e) for e in fresh) if t is not None]
+    if stamps:
+        fields["ts"] = max(stamps + ([cur["ts"]] if cur.get("ts") is not None else []))
+    return fields
+
+
+def feed_stats(company: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+    """url -> {polls, last_new, new_total, history, last_change, last_poll, avg_new, interval?}."""
+    with _idle_lock:
+        idle = {k: dict(v) for k, v in _idle.items()}
+    marks = get_cursors(CURSOR_FILE).all()
+    out: Dict[str, Dict[str, Any]] = {}
+    for key in list(marks) + [k for k in idle if k not in marks]:
+        comp, _, url = key.partition("::")
+        if company is not None and comp != company:
+            continue
+        cur = marks.get(key) or {}
+        stats = {k: v for k, v in cur.items() if k not in ("ids", "ts")}
+        extra = idle.get(key)
+        if extra:
+            stats.update(polls=int(cur.get("polls", 0)) + extra["polls"], last_poll=extra["last_poll"], last_new=0,
+                         history=(list(cur.get("history") or []) + [0] * extra["polls"])[-HISTORY:])
+        hist = stats.get("history") or []
+        stats["avg_new"] = sum(hist) / len(hist) if hist else 0.0
+        out[url] = stats
+    return out
+
+
+def save_interval(company: str, url: str, interval: float) -> None:
+    """Persist the scheduler's current poll interval for the feed (read back via feed_stats)."""
+    cursors, key, value = get_cursors(CURSOR_FILE), _key(company, url), round(interval, 1)
+    if cursors.get(key).get("interval") != value:  # backed-off feeds settle at the max: no rewrite
+        cursors.modify(key, lambda cur: {"interval": value} if cur.get("interval") != value else {})
+
+
+def reset(company: Optional[str] = None, url: Optional[str] = None) -> None:
+    """Forget marks: one feed, every feed of a company, or everything."""
+    cursors = get_cursors(CURSOR_FILE)
+    with _idle_lock:
+        for key in list(_idle):
+            if company is None or key == _key(company, url or "") or (url is None and key.startswith(company + "::")):
+                del _idle[key]
+    if company is not None and url is not None:
+        cursors.reset(_key(company, url))
+    elif company is not None:
+        for key in cursors.all():
+            if key.startswith(company + "::"):
+                cursors.reset(key)
+    else:
+        cursors.reset()
@@ -0,0 +1,92 @@
+# services/http_client.py
+from __future__ import annotations
+from collections import defaultdict
+from typing import Any, Dict
+from urllib.parse import urlsplit
+import os
+import threading
+import time
+
+# One long-lived, process-wide requests.Session for every outbound call
+# (Groq, GitHub, feeds), so repeated calls reuse keep-alive TCP/TLS connections.
+CONNECT_TIMEOUT = float(os.environ.get("INTEL_AGENT_HTTP_CONNECT_TIMEOUT", "5"))
+READ_TIMEOUT = float(os.environ.get("INTEL_AGENT_HTTP_READ_TIMEOUT", "30"))
+POOL_HOSTS = int(os.environ.get("INTEL_AGENT_HTTP_POOL_HOSTS", "32"))    # hosts kept in the pool manager
+POOL_SIZE = int(os.environ.get("INTEL_AGENT_HTTP_POOL_SIZE", "16"))      # keep-alive connections per host
+USER_AGENT = "INTEL-AGENT/1.0"
+
+_session = None
+_lock = threading.Lock()
+_stats: Dict[str, Dict[str, float]] = defaultdict(lambda: {"requests": 0, "errors": 0, "seconds": 0.0})
+
+
+def session():
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+
+                s = requests.Session()
+                adapter = HTTPAdapter(pool_connections=POOL_HOSTS, pool_maxsize=POOL_SIZE, pool_block=False)
+                s.mount("https://", adapter)
+                s.mount("http://", adapter)
+                s.headers["User-Agent"] = USER_AGENT
+                _session = s
+    return _session
+
+
+def request(method: str, url: str, timeout: Any = None, **kwargs: Any):
+    """session().request with default (connect, read) timeouts and per-host accounting."""
+    host = urlsplit(url).netloc
+    start = time.perf_counter()
+    try:
+        return session().request(method, url, timeout=timeout or (CONNECT_TIMEOUT, READ_TIMEOUT), **kwargs)
+    except Exception:
+        with _lock:
+            _stats[host]["errors"] += 1
+        raise
+    finally:
+        with _lock:
+            _stats[host]["requests"] += 1
+            _stats[host]["seconds"] += time.perf_counter() - start
+
+
+def get(url: str, **kwargs: Any):
+    return request("GET", url, **kwargs)
+
+
+def post(url: str, **kwargs: Any):
+    return request("POST", url, **kwargs)
+
+
+def pool_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    Per-host numbers: requests/errors/seconds as seen by callers, plus urllib3's
+    connections_opened — requests far above connections_opened means keep-alive is working.
+    """
+    with _lock:
+        out: Dict[str, Dict[str, Any]] = {h: dict(v) for h, v in _stats.items()}
+    if _session is not None:
+        for adapter in set(_session.adapters.values()):
+            pools = getattr(getattr(adapter, "poolmanager", None), "pools", None)
+            if pools is None:
+                continue
+            for pool_key in list(pools.keys()):
+                pool = pools.get(pool_key)
+                if pool is None:
+                    continue
+                host = pool.host if pool.port in (None, 80, 443) else f"{pool.host}:{pool.port}"
+                row = out.setdefault(host, {"requests": 0, "errors": 0, "seconds": 0.0})
+                row["connections_opened"] = row.get("connections_opened", 0) + pool.num_connections
+                row["idle_connections"] = row.get("idle_connections", 0) + pool.pool.qsize()
+    return out
+
+
+def close() -> None:
+    global _session
+    with _lock:
+        if _session is not None:
+            _session.close()
+            _session = None
@@ -0,0 +1,152 @@
+# services/ingest.py
+from __future__ import annotations
+from concurrent.futures import TimeoutError as FutureTimeout
+from typing import List, Dict, Any
+import datetime as dt
+import time
+
+# Shared by the Fetch Intelligence button (app.py) and the headless worker (worker.py).
+GITHUB_GRACE = 1.0  # seconds past the fetch deadline for the GitHub batch to hand back its result
+
+def rss_events(company: str, industry: str, c: Dict[str, Any], feed, limit: int = 3,
+               now_iso: str | None = None, url: str | None = None, cursors=None) -> List[Dict[str, Any]]:
+    """
+    Normalize the first `limit` entries of a parsed feed into store events. With `url`,
+    only entries past that feed's high-water mark (services.highwater) are normalized;
+    the mark's advance is queued on `cursors` (a services.cursors.CursorBatch) if given.
+    """
+    now_iso = now_iso or dt.datetime.utcnow().isoformat() + "Z"
+    events: List[Dict[str, Any]] = []
+    entries = (getattr(feed, "entries", []) or [])[:limit]
+    if url:
+        from services.highwater import commit_mark, new_entries
+        entries = new_entries(company, url, entries)
+        if cursors is not None:
+            cursors.defer(lambda fresh=entries: commit_mark(company, url, fresh))
+    for e in entries:
+        title = getattr(e, "title", "Update")
+        link  = getattr(e, "link", c.get("site", "#"))
+        summary = (getattr(e, "summary", "") or "").strip()
+        events.append({
+            "company": company,
+            "competitor": c["name"],
+            "industry": industry,
+            "source_type": "rss",
+            "source_url": link,
+            "title": f"{c['name']}: {title}",
+            "raw": summary or title,
+            "summary": "",
+            "category": "Features",
+            "impact": 3,            # default; classifier can update later
+            "confidence": 70,       # %
+            "published_at": now_iso
+        })
+    return events
+
+def score_threats(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    try:
+        from services.feeds import fetch_feeds  # shares the conditional-GET feed cache
+        feeds = fetch_feeds({c["name"]: c.get("rss", "") for c in items}).feeds
+    except Exception:
+        feeds = {}
+    now = dt.datetime.utcnow()
+    for c in items:
+        score = 20 + (25 if c.get("rss") else 0) + (15 if c.get("github") else 0)
+        recent = 0
+        fp = feeds.get(c["name"])
+        if fp is not None:
+            try:
+                if getattr(fp, "entries", None):
+                    e = fp.entries[0]
+                    if getattr(e, "published_parsed", None):
+                        pub = dt.datetime(*e.published_parsed[:6])
+                        days = (now - pub).days
+                        recent = 10 if days <= 7 else 6 if days <= 30 else 3 if days <= 90 else 0
+            except Exception:
+                pass
+        score += recent
+        if c["name"].lower() in ("salesforce","shopify","stripe","figma","vercel","hubspot","square","adyen"):
+            score += 15
+        elif len(c["name"]) <= 6:
+            score += 5
+        score = max(0, min(100, score))
+        c["threat_score"] = score
+        c["threat"] = "Critical" if score >= 80 else "High" if score >= 65 else "Medium" if score >= 40 else "Low"
+    return items
+
+def fetch_competitor_updates(company: str, industry: str, selected: List[Dict[str, Any]], demo: bool=False,
+                             cursors=None):
+    """Produce normalized events for the Live feed and digest.
+    - Always return at least 1 event per selected competitor in Demo Mode.
+    - Include consistent fields so storage never rejects/silently drops.
+    - Feeds are fetched concurrently with a per-feed timeout and an overall deadline;
+      returns (events, failures) where failures maps competitor -> reason.
+    - Source cursor advances (feed high-water marks, GitHub cursors) go into `cursors`
+      (services.cursors.CursorBatch); commit it once the events are stored. Without it
+      no cursor moves."""
+    events: List[Dict[str, Any]] = []
+    failures: Dict[str, str] = {}
+    try:
+        from services.feeds import fetch_feeds  # optional (needs feedparser)
+    except Exception:
+        fetch_feeds = None
+
+    now_iso = dt.datetime.utcnow().isoformat() + "Z"
+    start = time.monotonic()
+
+    feeds: Dict[str, Any] = {}
+    github = None
+    if not demo:
+        # GitHub releases run next to the feed batch (services.github keeps per-repo cursors),
+        # under the same deadline. Their cursors go to a batch of their own, handed on only if
+        # the releases arrive in time (a late straggler must not move a cursor).
+        from concurrent.futures import ThreadPoolExecutor
+        from services.cursors import CursorBatch
+        from services.github import FETCH_DEADLINE, fetch_github_updates
+        gh_cursors = CursorBatch()
+        gh_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="github-batch")
+        github = gh_pool.submit(fetch_github_updates, company, industry, selected,
+                                cursors=gh_cursors, deadline=FETCH_DEADLINE)
+        gh_pool.shutdown(wait=False)
+    if not demo and fetch_feeds:
+        batch = fetch_feeds({c["name"]: c.get("rss", "") for c in selected})
+        feeds, failures = batch.feeds, batch.errors
+
+    for c in selected:
+        # Real RSS if available + not demo
+        if c["name"] in feeds:
+            events.extend(rss_events(company, industry, c, feeds[c["name"]], now_iso=now_iso,
+                                     url=c.get("rss"), cursors=cursors))
+
+        # Guaranteed demo record (and fallback if feedparser missing)
+        if demo or not fetch_feeds or not c.get("rss"):
+            events.append({
+                "company": company,
+                "competitor": c["name"],
+                "industry": industry,
+                "source_type": "demo",
+                "source_url": c.get("site", "#"),
+                "title": f"{c['name']} announces new {industry} capabilities",
+                "raw": f"Demo intel: {c['name']} shipped automation & AI enhancements for {industry}.",
+                "summary": "",
+                "category": "Launch",
+                "impact": 3,
+                "confidence": 80,
+                "published_at": now_iso
+            })
+
+    if github is not None:
+        # fetch_github_updates stops at the deadline itself; the grace covers building its result.
+        left = FETCH_DEADLINE - (time.monotonic() - start) + GITHUB_GRACE
+        try:
+            gh_events, gh_failures = github.result(timeout=max(0.0, left))
+            events.extend(gh_events)
+            failures.update(gh_failures)
+            if cursors is not None:
+                cursors.defer(gh_cursors.commit)
+        except FutureTimeout:
+            failures["GitHub"] = "timeout"
+        except Exception as e:
+            failures["GitHub"] = f"{type(e).__name__}: {e}"
+
+    return events, failures
@@ -0,0 +1,215 @@
+# services/llm_cache.py
+from __future__ import annotations
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# Two-tier cache for Groq completions used by services.ai:
+#   memory : small LRU of recent replies (per process, shared by all sessions)
+#   disk   : SQLite table with TTL and a byte budget, trimmed least-recently-used first
+# plus single-flight, so N sessions asking the same thing at once make one upstream call.
+CACHE_PATH = os.environ.get("INTEL_AGENT_LLM_CACHE", os.path.join(".intel_cache", "llm.sqlite3"))
+CACHE_TTL = float(os.environ.get("INTEL_AGENT_LLM_TTL", "86400"))
+CACHE_MAX_BYTES = int(float(os.environ.get("INTEL_AGENT_LLM_CACHE_MB", "32")) * 1024 * 1024)
+MEMORY_ENTRIES = int(os.environ.get("INTEL_AGENT_LLM_MEMORY_ENTRIES", "256"))
+FLIGHT_WAIT = float(os.environ.get("INTEL_AGENT_LLM_FLIGHT_WAIT", "90"))  # max wait on another caller's request
+
+
+def cache_key(model: str, messages: Any, temperature: float) -> str:
+    blob = json.dumps({"model": model, "messages": messages, "temperature": temperature},
+                      sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value: Optional[str] = None
+        self.error: Optional[BaseException] = None
+
+
+class ResponseCache:
+    def __init__(self, path: str = CACHE_PATH, ttl: float = CACHE_TTL,
+                 max_bytes: int = CACHE_MAX_BYTES, memory_entries: int = MEMORY_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.memory_entries = memory_entries
+        self.enabled = path.lower() not in ("", "off", "none", "0")
+        self._mem: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._flights: Dict[str, _Flight] = {}
+        self._local = threading.local()
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "joined": 0, "join_timeouts": 0,
+                      "stores": 0, "evictions": 0}
+
+    # ---- disk tier --------------------------------------------------------
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+                " created REAL NOT NULL, accessed REAL NOT NULL, size INTEGER NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses(accessed)")
+            self._local.conn = conn
+        return conn
+
+    def _disk_get(self, key: str) -> Optional[str]:
+        try:
+            conn = self._conn()
+            row = conn.execute("SELECT value, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if not row:
+                return None
+            if time.time() - row[1] > self.ttl:
+                with conn:
+                    conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return None
+            with conn:
+                conn.execute("UPDATE responses SET accessed = ? WHERE key = ?", (time.time(), key))
+            return row[0]
+        except sqlite3.Error:
+            return None
+
+    def _disk_put(self, key: str, value: str) -> None:
+        try:
+            conn = self._conn()
+            now = time.time()
+            with conn:
+                conn.execute("INSERT OR REPLACE INTO responses VALUES (?,?,?,?,?)",
+                             (key, value, now, now, len(value.encode("utf-8"))))
+                conn.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl,))
+                total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+                if total > self.max_bytes:
+                    for k, size in conn.execute("SELECT key, size FROM responses ORDER BY accessed").fetchall():
+                        if total <= self.max_bytes:
+                            break
+                        conn.execute("DELETE FROM responses WHERE key = ?", (k,))
+                        total -= size
+                        self.stats["evictions"] += 1
+        except sqlite3.Error:
+            pass
+
+    # ---- public API -------------------------------------------------------
+    def get(self, key: str) -> Optional[str]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            hit = self._mem.get(key)
+            if hit and time.time() - hit[0] <= self.ttl:
+                self._mem.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                return hit[1]
+        value = self._disk_get(key)
+        if value is not None:
+            self.stats["disk_hits"] += 1
+            self._remember(key, value)
+        return value
+
+    def put(self, key: str, value: str) -> None:
+        if not self.enabled:
+            return
+        self._remember(key, value)
+        self._disk_put(key, value)
+        self.stats["stores"] += 1
+
+    def _remember(self, key: str, value: str) -> None:
+        with self._lock:
+            self._mem[key] = (time.time(), value)
+            self._mem.move_to_end(key)
+            while len(self._mem) > self.memory_entries:
+                self._mem.popitem(last=False)
+
+    def begin(self, key: str) -> Tuple[bool, _Flight]:
+        """Join or start the in-flight request for `key`. Returns (is_leader, flight)."""
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                self.stats["joined"] += 1
+                return False, flight
+            flight = self._flights[key] = _Flight()
+            self.stats["misses"] += 1
+            return True, flight
+
+    def finish(self, key: str, value: Optional[str] = None, error: Optional[BaseException] = None,
+               store_key: Optional[str] = None) -> None:
+        """
+        End the flight for `key`, handing `value` (or `error`) to its waiters. The value is
+        cached under `store_key` (the key of the model that actually answered); with no
+        store_key it is only passed to the waiters, not cached.
+        """
+        if value is not None and store_key is not None:
+            self.put(store_key, value)
+        with self._lock:
+            flight = self._flights.pop(key, None)
+        if flight is not None:
+            flight.value, flight.error = value, error
+            flight.done.set()
+
+    def join(self, flight: _Flight, timeout: float = FLIGHT_WAIT) -> Optional[str]:
+        """
+        The leader's reply. Re-raises the leader's Exception; returns None when the leader
+        took longer than `timeout` or was cancelled (e.g. GeneratorExit from a closed
+        stream), in which case the caller should make its own request.
+        """
+        if not flight.done.wait(timeout):
+            self.stats["join_timeouts"] += 1
+            return None
+        if isinstance(flight.error, Exception):
+            raise flight.error
+        return flight.value
+
+    def get_or_call(self, key: str, call: Callable[[], Tuple[str, Optional[str]]]) -> str:
+        """
+        Cached value, or the result of one shared call(): concurrent callers wait for the
+        leader. call() returns (value, store_key), see finish().
+        """
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+        leader, flight = self.begin(key)
+        if not leader:
+            value = self.join(flight)
+            if value is not None:
+                return value
+            value, store_key = call()
+            if store_key is not None:
+                self.put(store_key, value)
+            return value
+        try:
+            value, store_key = call()
+        except BaseException as e:
+            self.finish(key, error=e)
+            raise
+        self.finish(key, value, store_key=store_key)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._mem.clear()
+        try:
+            conn = self._conn()
+            with conn:
+                conn.execute("DELETE FROM responses")
+        except sqlite3.Error:
+            pass
+
+
+_cache: Optional[ResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> ResponseCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResponseCache()
+        return _cache
@@ -0,0 +1,321 @@
+# services/near_dup.py
+from __future__ import annotations
+from collections import defaultdict
+from typing import List, Dict, Any, Iterable, Mapping, Optional, Tuple
+import hashlib
+import json
+import os
+import re
+import struct
+import threading
+
+from services.dedupe import source_key
+
+# Near-duplicate detection at ingest: the same announcement syndicated through several
+# feeds, or lightly re-titled, is kept once (the canonical event) and later copies are
+# recorded as its alternate sources instead of new events.
+#
+#   shingles  word 3-grams of title + start of raw text
+#   MinHash   NUM_PERM mins over independent hashes; equal slots estimate Jaccard similarity
+#   LSH       BANDS x ROWS bands, bucketed per (company, competitor), so a lookup only
+#             compares against events that collide in some band (sub-linear in the store size)
+#   tenants   index keys are company + source_key, so two companies tracking the same
+#             story each keep their copy (like services.partitions' per-tenant dedupe)
+#
+# The index is an append-only JSONL sidecar next to the store; each process replays only
+# the lines it has not seen, so the app and worker.py share it without rewriting it.
+# Lines: {"d"} a canonical, {"a"} an alternate of one, {"x"} an event retention removed.
+THRESHOLD = float(os.environ.get("INTEL_AGENT_DUP_THRESHOLD", "0.7"))  # 0 disables
+SIDECAR = "neardup.v2.jsonl"  # v2: tenant-scoped keys; an older neardup.jsonl is rebuilt, not replayed
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+TEXT_WORDS = 200
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_SIG_FORMAT = struct.Struct(f"<{NUM_PERM}I")
+_EMPTY = tuple([0xFFFFFFFF] * NUM_PERM)
+_SEP = "\x1f"
+
+
+def shingles(e: Mapping[str, Any], n: int = 3) -> set:
+    words = _WORD_RE.findall(f"{e.get('title', '') or ''} {e.get('raw', '') or ''}".lower())[:TEXT_WORDS]
+    if len(words) < n:
+        return set(words)
+    return {" ".join(words[i:i + n]) for i in range(len(words) - n + 1)}
+
+
+def minhash(e: Mapping[str, Any]) -> Tuple[int, ...]:
+    # NUM_PERM independent 32-bit hashes per shingle, all cut from one SHAKE-128 digest
+    # (stable across processes, unlike hash()); the signature is the column-wise minimum.
+    rows = [_SIG_FORMAT.unpack(hashlib.shake_128(s.encode("utf-8")).digest(_SIG_FORMAT.size))
+            for s in shingles(e)]
+    if not rows:
+        return _EMPTY
+    return tuple(map(min, zip(*rows)))
+
+
+def similarity(a: Tuple[int, ...], b: Tuple[int, ...]) -> float:
+    return sum(1 for x, y in zip(a, b) if x == y) / NUM_PERM
+
+
+def _scope(e: Mapping[str, Any]) -> str:
+    return (e.get("company", "") or "") + _SEP + (e.get("competitor", "") or "").strip().lower()
+
+
+def index_key(e: Mapping[str, Any]) -> str:
+    """source_key qualified by the tenant (company) the event belongs to."""
+    return (e.get("company", "") or "") + _SEP + source_key(e)
+
+
+def _alternate_key(canonical: str, src: Mapping[str, Any]) -> str:
+    # An alternate belongs to its canonical's tenant (the index key's company prefix).
+    return canonical.split(_SEP, 1)[0] + _SEP + source_key(src)
+
+
+def _alternate(e: Mapping[str, Any]) -> Dict[str, Any]:
+    return {k: e.get(k) for k in ("title", "source_url", "source_type", "published_at")}
+
+
+def _bands(scope: str, sig: Tuple[int, ...]):
+    return [(scope, band, hash(sig[band * ROWS:(band + 1) * ROWS])) for band in range(BANDS)]
+
+
+def _best(sig: Tuple[int, ...], key: str, cands: Iterable[str], sigs: Mapping[str, Tuple[int, ...]],
+          threshold: float) -> Optional[str]:
+    best, best_sim = None, threshold
+    seen = set()
+    for cand in cands:
+        if cand in seen or cand == key:
+            continue
+        seen.add(cand)
+        sim = similarity(sig, sigs[cand])
+        if sim >= best_sim:
+            best, best_sim = cand, sim
+    return best
+
+
+class Pending:
+    """Index records of one insert, held back until the store reports what it added."""
+
+    def __init__(self):
+        self.docs: List[Dict[str, Any]] = []
+        self.sigs: Dict[str, Tuple[int, ...]] = {}
+        self.buckets: Dict[Tuple[str, int, int], List[str]] = defaultdict(list)
+        self.alts: List[Dict[str, Any]] = []
+        self.alt_keys: set = set()
+
+    def add(self, doc: Dict[str, Any], sig: Tuple[int, ...]) -> None:
+        self.docs.append(doc)
+        self.sigs[doc["d"]] = sig
+        for b in _bands(doc["c"], sig):
+            self.buckets[b].append(doc["d"])
+
+    def match(self, e: Mapping[str, Any], sig: Tuple[int, ...], threshold: float) -> Optional[str]:
+        cands = (c for b in _bands(_scope(e), sig) for c in self.buckets.get(b, ()))
+        return _best(sig, index_key(e), cands, self.sigs, threshold)
+
+
+class NearDupIndex:
+    def __init__(self, path: str, threshold: float = THRESHOLD):
+        self.path = path
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self) -> None:
+        self.sigs: Dict[str, Tuple[int, ...]] = {}
+        self.comps: Dict[str, str] = {}
+        self.buckets: Dict[Tuple[str, int, int], List[str]] = defaultdict(list)
+        self.alternates: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        self.alt_of: Dict[str, str] = {}  # alternate's index key -> canonical
+        self._offset = 0
+
+    def __len__(self) -> int:
+        return len(self.sigs)
+
+    # ---- persistence ------------------------------------------------------
+    def _refresh(self) -> None:
+        """Replay lines appended since we last looked (possibly by another process)."""
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            size = 0
+        if size < self._offset:
+            self._reset()  # cleared or replaced underneath us
+        if size == self._offset:
+            return
+        with open(self.path, "rb") as f:
+            f.seek(self._offset)
+            data = f.read(size - self._offset)
+        end = data.rfind(b"\n") + 1  # ignore a torn last line until it is complete
+        for line in data[:end].splitlines():
+            try:
+                self._apply(json.loads(line))
+            except ValueError:
+                continue
+        self._offset += end
+
+    def _apply(self, rec: Dict[str, Any]) -> None:
+        if "d" in rec:
+            key = rec["d"]
+            if key in self.sigs:
+                return
+            sig = tuple(int(x, 16) for x in rec["s"].split(","))
+            self.sigs[key] = sig
+            self.comps[key] = rec["c"]
+            for b in _bands(rec["c"], sig):
+                self.buckets[b].append(key)
+        elif "x" in rec:
+            self._forget(rec["x"])
+        elif "a" in rec:
+            alts = self.alternates[rec["a"]]
+            src = rec["src"]
+            self.alt_of[_alternate_key(rec["a"], src)] = rec["a"]
+            # Re-polled feeds and replayed lines (another writer raced us) repeat sources.
+            if not any(a.get("source_url") == src.get("source_url") and a.get("title") == src.get("title") for a in alts):
+                alts.append(src)
+
+    def _forget(self, key: str) -> None:
+        sig = self.sigs.pop(key, None)
+        if sig is not None:
+            for b in _bands(self.comps.pop(key, ""), sig):
+                bucket = self.buckets.get(b)
+                if bucket and key in bucket:
+                    bucket.remove(key)
+        for src in self.alternates.pop(key, ()):
+            self.alt_of.pop(_alternate_key(key, src), None)
+
+    @staticmethod
+    def _doc(e: Mapping[str, Any], sig: Tuple[int, ...]) -> Dict[str, Any]:
+        return {"d": index_key(e), "c": _scope(e), "s": ",".join(format(x, "x") for x in sig)}
+
+    # ---- lookups ----------------------------------------------------------
+    def _match(self, e: Mapping[str, Any], sig: Tuple[int, ...]) -> Optional[str]:
+        cands = (c for b in _bands(_scope(e), sig) for c in self.buckets.get(b, ()))
+        return _best(sig, index_key(e), cands, self.sigs, self.threshold)
+
+    def canonical_for(self, e: Mapping[str, Any]) -> Optional[str]:
+        """Index key (company + source_key) of a stored near-duplicate of `e`, if any."""
+        with self._lock:
+            self._refresh()
+            return self._match(e, minhash(e))
+
+    def alternate_sources(self, e: Mapping[str, Any]) -> List[Dict[str, Any]]:
+        with self._lock:
+            self._refresh()
+            return list(self.alternates.get(index_key(e), ()))
+
+    # ---- updates ----------------------------------------------------------
+    def split(self, items: List[Dict[str, Any]], pending: Optional["Pending"] = None) -> List[Dict[str, Any]]:
+        """
+        Cluster `items` against the index (and each other). Returns the events to store;
+        near-duplicates of stored events are recorded as their alternate sources. Canonicals
+        new to the index (and alternates of them) wait in `pending` until commit() is told
+        which events the store actually added; without `pending` they are dropped.
+        """
+        pending = pending if pending is not None else Pending()
+        fresh: List[Dict[str, Any]] = []
+        with self._lock:
+            self._refresh()
+            records: List[Dict[str, Any]] = []
+            for e in items:
+                key = index_key(e)
+                if key in self.sigs or key in pending.sigs:
+                    fresh.append(e)  # exact repeat: the store's own dedupe handles it
+                    continue
+                if key in self.alt_of or key in pending.alt_keys:
+                    continue  # folded into its canonical on an earlier poll
+                sig = minhash(e)
+                canon = self._match(e, sig)
+                if canon is not None:
+                    rec = {"a": canon, "src": _alternate(e)}
+                    self._apply(rec)
+                    records.append(rec)
+                    continue
+                canon = pending.match(e, sig, self.threshold)
+                if canon is not None:
+                    pending.alts.append({"a": canon, "src": _alternate(e)})
+                    pending.alt_keys.add(key)
+                else:
+                    pending.add(self._doc(e, sig), sig)
+                    fresh.append(e)
+            self._append_applied(records)
+        return fresh
+
+    def commit(self, pending: "Pending", added_events: Iterable[Mapping[str, Any]]) -> None:
+        """Index the pending canonicals the store added, and the alternates folded into them."""
+        added = {index_key(e) for e in added_events}
+        records = [rec for rec in pending.docs if rec["d"] in added]
+        records += [rec for rec in pending.alts if rec["a"] in added]
+        if not records:
+            return
+        with self._lock:
+            self._refresh()
+            for rec in records:
+                self._apply(rec)
+            self._append_applied(records)
+
+    def _append_applied(self, records: List[Dict[str, Any]]) -> None:
+        # Records were applied in memory already; write them and skip past our own bytes
+        # without replaying them (other writers' lines in between are replayed first).
+        self._refresh()
+        if not records:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        blob = "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records).encode("utf-8")
+        with open(self.path, "ab") as f:
+            f.write(blob)
+            end = f.tell()
+        if end == self._offset + len(blob):
+            self._offset = end
+
+    def forget(self, events: Iterable[Mapping[str, Any]]) -> None:
+        """Drop events that left the store (retention), with their alternates."""
+        with self._lock:
+            self._refresh()
+            keys = dict.fromkeys(index_key(e) for e in events)
+            records = [{"x": k} for k in keys if k in self.sigs or k in self.alternates]
+            for rec in records:
+                self._apply(rec)
+            self._append_applied(records)
+
+    def rebuild(self, events: List[Mapping[str, Any]]) -> None:
+        """Index `events` as canonicals from scratch (after set_events / migration)."""
+        with self._lock:
+            self._reset()
+            tmp = f"{self.path}.{os.getpid()}.tmp"
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(tmp, "w", encoding="utf-8") as f:
+                for e in events:
+                    f.write(json.dumps(self._doc(e, minhash(e)), ensure_ascii=False) + "\n")
+            os.replace(tmp, self.path)
+            self._refresh()
+
+    def clear(self) -> None:
+        with self._lock:
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+            self._reset()
+
+
+_index: Optional[NearDupIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_index() -> Optional[NearDupIndex]:
+    """Shared index for the configured store; None when INTEL_AGENT_DUP_THRESHOLD is 0."""
+    global _index
+    if THRESHOLD <= 0:
+        return None
+    with _index_lock:
+        if _index is None:
+            from services.storage import sidecar_path, snapshot
+            idx = NearDupIndex(sidecar_path(SIDECAR))
+            if not os.path.exists(idx.path):
+                existing = snapshot()
+                if existing:
+                    idx.rebuild(list(existing))
+            _index = idx
+        return _index
@@ -0,0 +1,198 @@
+# services/partitions.py
+from __future__ import annotations
+from typing import List, Dict, Any, Iterable, Mapping, Optional, Tuple
+import os
+import re
+import threading
+
+from services.dedupe import event_keys, source_key
+from services.fileio import file_lock, read_json, signature, write_json
+from services.recency import Position, RecencyIndex, latest
+
+# Tenant-partitioned JSON backend for services.storage, selected with
+# INTEL_AGENT_STORE=parts:<dir>. Events live in <dir>/<company>/<industry>.json, each file
+# with its own lock, so writers for different company/industry pairs never wait on each
+# other and a write only rewrites its own tenant's file. Every write happens under the
+# tenant lock against a fresh read of the file (no lost updates between sessions or
+# processes) and lands via write-then-rename.
+_SLUG_RE = re.compile(r"[^a-z0-9]+")
+
+
+def slug(value: Any) -> str:
+    return _SLUG_RE.sub("-", str(value or "").lower()).strip("-") or "_"
+
+
+class _Partition:
+    """Cached view of one tenant file: its events, dedupe keys and recency order."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.sig = None
+        self.items: List[Dict[str, Any]] = []
+        self.keys: set = set()
+        self.recency = RecencyIndex()
+        self.lock = threading.Lock()
+
+    def load(self) -> List[Dict[str, Any]]:
+        sig = signature(self.path)
+        if sig != self.sig or sig is None:
+            with self.lock:
+                sig = signature(self.path)
+                if sig != self.sig or sig is None:
+                    self.items = read_json(self.path) if sig else []
+                    self.keys = {k for e in self.items for k in event_keys(e)}
+                    self.sig = sig
+        return self.items
+
+
+class PartitionedStore:
+    def __init__(self, root: str):
+        self.root = root
+        self._parts: Dict[str, _Partition] = {}
+        self._lock = threading.Lock()
+
+    # ---- routing ------------------------------------------------------------
+    def _path(self, company: Any, industry: Any) -> str:
+        return os.path.join(self.root, slug(company), slug(industry) + ".json")
+
+    def _part(self, path: str) -> _Partition:
+        with self._lock:
+            part = self._parts.get(path)
+            if part is None:
+                part = self._parts[path] = _Partition(path)
+            return part
+
+    def _paths(self, company: Any = None, industry: Any = None) -> List[str]:
+        """Tenant files that can hold events matching the company / industry filters."""
+        if company is not None and industry is not None:
+            return [self._path(company, industry)]
+        out = []
+        try:
+            companies = [slug(company)] if company is not None else sorted(os.listdir(self.root))
+        except OSError:
+            return []
+        for c in companies:
+            d = os.path.join(self.root, c)
+            try:
+                names = sorted(os.listdir(d))
+            except OSError:
+                continue
+            for n in names:
+                if n.endswith(".json") and (industry is None or n == slug(industry) + ".json"):
+                    out.append(os.path.join(d, n))
+        return out
+
+    def _selected(self, filters: Dict[str, Any]) -> List[_Partition]:
+        return [self._part(p) for p in self._paths(filters.get("company"), filters.get("industry"))]
+
+    # ---- backend protocol ---------------------------------------------------
+    def signature(self):
+        return tuple((p, signature(p)) for p in self._paths())
+
+    def get_events(self) -> List[Dict[str, Any]]:
+        return [e for part in self._selected({}) for e in part.load()]
+
+    def _group(self, items: Iterable[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+        groups: Dict[str, List[Dict[str, Any]]] = {}
+        for e in items:
+            groups.setdefault(self._path(e.get("company"), e.get("industry")), []).append(e)
+        return groups
+
+    def split_by_tenant(self, items: Iterable[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+        """Tenant file -> its share of `items` (services.write_behind commits each on its own lane)."""
+        return self._group(items)
+
+    def set_events(self, items: Iterable[Dict[str, Any]]) -> None:
+        groups = self._group(items)
+        for path in set(self._paths()) | set(groups):
+            with file_lock(path):
+                write_json(path, groups.get(path, []))
+
+    def clear_events(self) -> None:
+        for path in self._paths():
+            with file_lock(path):
+                write_json(path, [])
+
+    def delete_events(self, keys: Iterable[str], removed: Optional[List[Dict[str, Any]]] = None) -> int:
+        """
+        Delete the events with these source keys, per tenant under its lock (also appended
+        to `removed`). Returns how many.
+        """
+        gone = set(keys)
+        n = 0
+        for path in self._paths():
+            part = self._part(path)
+            with file_lock(path):
+                items = part.load()
+                keep = [e for e in items if source_key(e) not in gone]
+                if len(keep) != len(items):
+                    write_json(path, keep)
+                    n += len(items) - len(keep)
+                    if removed is not None:
+                        removed.extend(e for e in items if source_key(e) in gone)
+        return n
+
+    def insert_events(self, items: Iterable[Dict[str, Any]], added: Optional[List[Dict[str, Any]]] = None) -> int:
+        """Append-only per tenant; skips events already stored under either dedupe key."""
+        return self.insert_batches([list(items)], added)[0]
+
+    def insert_batches(self, batches: List[List[Dict[str, Any]]],
+                       added: Optional[List[Dict[str, Any]]] = None) -> List[int]:
+        """
+        insert_events for several batches, rewriting each touched tenant file once.
+        Events written are appended to `added`.
+        """
+        counts = [0] * len(batches)
+        by_path: Dict[str, List[Tuple[int, Dict[str, Any]]]] = {}
+        for i, batch in enumerate(batches):
+            for path, group in self._group(batch).items():
+                by_path.setdefault(path, []).extend((i, e) for e in group)
+        for path, tagged in by_path.items():
+            part = self._part(path)
+            with file_lock(path):
+                existing = part.load()  # fresh under the lock: picks up other writers
+                seen = set(part.keys)
+                fresh = []
+                for i, e in tagged:
+                    keys = event_keys(e)
+                    if any(k in seen for k in keys):
+                        continue
+                    seen.update(keys)
+                    fresh.append(e)
+                    counts[i] += 1
+                if fresh:
+                    write_json(path, existing + fresh)
+                    if added is not None:
+                        added.extend(fresh)
+        return counts
+
+    def query_events(self, limit: Optional[int] = None, **filters: Any) -> List[Dict[str, Any]]:
+        out: List[Dict[str, Any]] = []
+        for part in self._selected(filters):
+            for e in part.load():
+                if all(e.get(k) == v for k, v in filters.items() if v is not None):
+                    out.append(dict(e))
+                    if limit is not None and len(out) >= limit:
+                        return out
+        return out
+
+    def latest_events(self, n: int = 10, after: Optional[Position] = None, **filters: Any) -> List[Dict[str, Any]]:
+        # Top n of each selected tenant from its recency index, then merge: O(tenants * n).
+        candidates: List[Mapping[str, Any]] = []
+        for part in self._selected(filters):
+            items = part.load()
+            with part.lock:
+                candidates.extend(part.recency.page(items, n, after, **filters))
+        return [dict(e) for e in latest(candidates, n)]
+
+    def count_events(self, **filters: Any) -> int:
+        active = {k: v for k, v in filters.items() if v is not None}
+        total = 0
+        for part in self._selected(active):
+            items = part.load()
+            total += sum(1 for e in items if all(e.get(k) == v for k, v in active.items())) if active else len(items)
+        return total
+
+    def tenants(self) -> List[Tuple[str, str]]:
+        """(company slug, industry slug) of every partition on disk."""
+        return [(os.path.basename(os.path.dirname(p)), os.path.basename(p)[:-5]) for p in self._paths()]
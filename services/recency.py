@@ -0,0 +1,109 @@
+# services/recency.py
+from __future__ import annotations
+from bisect import bisect_left, insort
+from typing import List, Dict, Any, Mapping, Optional, Sequence, Tuple
+import base64
+import datetime as dt
+import heapq
+import json
+
+from services.dedupe import source_key
+
+# "Newest first" ordering shared by every storage backend.
+# published_at arrives in several shapes (ISO with Z / offsets / no zone, RFC 822 from
+# feeds), so events are ordered by a normalized UTC timestamp, ties broken by source_key.
+# A page cursor is the (timestamp, source_key) of the last event shown.
+Position = Tuple[float, str]
+
+
+def published_ts(e: Mapping[str, Any]) -> float:
+    """UTC epoch seconds for e["published_at"]; 0.0 when missing or unparseable (sorts last)."""
+    raw = e.get("published_at")
+    if not raw:
+        return 0.0
+    if isinstance(raw, (int, float)):
+        return float(raw)
+    s = str(raw).strip()
+    try:
+        d = dt.datetime.fromisoformat(s[:-1] + "+00:00" if s.endswith("Z") else s)
+    except ValueError:
+        try:
+            from dateutil import parser as dateparser
+            d = dateparser.parse(s)
+        except Exception:
+            return 0.0
+    if d.tzinfo is None:
+        d = d.replace(tzinfo=dt.timezone.utc)  # the app writes naive utcnow() + "Z"; treat naive as UTC
+    try:
+        return d.timestamp()
+    except (OverflowError, OSError, ValueError):
+        return 0.0
+
+
+def position(e: Mapping[str, Any]) -> Position:
+    return (published_ts(e), source_key(e))
+
+
+def encode_cursor(pos: Position) -> str:
+    return base64.urlsafe_b64encode(json.dumps(list(pos)).encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Position]:
+    if not cursor:
+        return None
+    try:
+        ts, key = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return (float(ts), str(key))
+    except Exception:
+        raise ValueError(f"invalid cursor: {cursor!r}")
+
+
+def _matches(e: Mapping[str, Any], filters: Dict[str, Any]) -> bool:
+    return all(e.get(k) == v for k, v in filters.items() if v is not None)
+
+
+class RecencyIndex:
+    """
+    Sorted (timestamp, source_key, slot) entries over a storage snapshot. Built once per
+    snapshot; when the store only grew, the new events are inserted instead of re-sorting.
+    A page is a bisect plus a walk over k entries (more when filters are selective).
+    """
+
+    def __init__(self):
+        self.source: Optional[Sequence[Mapping[str, Any]]] = None
+        self.entries: List[Tuple[float, str, int]] = []
+
+    def sync(self, events: Sequence[Mapping[str, Any]]) -> None:
+        if events is self.source:
+            return
+        old = self.source
+        # Append-only growth (the common case: insert_events) keeps the old prefix intact.
+        grew = (bool(old) and len(events) >= len(old)
+                and dict(events[0]) == dict(old[0]) and dict(events[len(old) - 1]) == dict(old[-1]))
+        if grew and len(events) - len(old) <= max(64, len(old) // 8):
+            for slot in range(len(old), len(events)):
+                insort(self.entries, position(events[slot]) + (slot,))
+        else:
+            self.entries = sorted(position(e) + (slot,) for slot, e in enumerate(events))
+        self.source = events
+
+    def page(self, events: Sequence[Mapping[str, Any]], n: int, after: Optional[Position] = None,
+             **filters: Any) -> List[Mapping[str, Any]]:
+        self.sync(events)
+        entries = self.entries
+        i = bisect_left(entries, after + (-1,)) if after is not None else len(entries)
+        out: List[Mapping[str, Any]] = []
+        while i > 0 and len(out) < n:
+            i -= 1
+            e = events[entries[i][2]]
+            if _matches(e, filters):
+                out.append(e)
+        return out
+
+
+def latest(events, n: int, after: Optional[Position] = None, **filters: Any) -> List[Mapping[str, Any]]:
+    """heapq fallback for backends without an ordered index: one pass, O(n log k)."""
+    items = (e for e in events if _matches(e, filters))
+    if after is not None:
+        items = (e for e in items if position(e) < after)
+    return heapq.nlargest(n, items, key=position)
@@ -0,0 +1,136 @@
+# services/retrieval.py
+from __future__ import annotations
+from collections import defaultdict
+from typing import List, Dict, Any, Mapping, Optional, Sequence, Tuple
+import heapq
+import math
+import re
+import threading
+
+from services.dedupe import source_key
+
+# Local BM25 over title/raw/competitor, used to pick chat context for a question
+# instead of the first 80 stored events. The index is process-wide and follows the
+# storage snapshot incrementally: only events it has not seen yet get tokenized.
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+COMMON_TERM_FRACTION = 0.05
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from has have how in into is it its of on or our over that the their "
+    "them they this to was what when where which who why will with about any can do does did new".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in _TOKEN_RE.findall((text or "").lower()) if len(t) > 1 and t not in _STOPWORDS]
+
+
+def _doc_tokens(e: Mapping[str, Any]) -> List[str]:
+    title = tokenize(e.get("title", ""))
+    # Title terms count twice: a cheap BM25F-style field boost.
+    return title + title + tokenize(e.get("competitor", "")) + tokenize(e.get("raw", ""))
+
+
+class BM25Index:
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, Dict[int, int]] = defaultdict(dict)
+        self.docs: List[Mapping[str, Any]] = []
+        self.doc_len: List[int] = []
+        self.total_len = 0
+        self.keys: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    def add(self, e: Mapping[str, Any]) -> None:
+        key = source_key(e)
+        if key in self.keys:
+            return
+        doc_id = len(self.docs)
+        self.keys[key] = doc_id
+        self.docs.append(e)
+        toks = _doc_tokens(e)
+        self.doc_len.append(len(toks))
+        self.total_len += len(toks)
+        tf: Dict[str, int] = defaultdict(int)
+        for t in toks:
+            tf[t] += 1
+        for t, n in tf.items():
+            self.postings[t][doc_id] = n
+
+    def search(self, query: str, k: int = 20) -> List[Tuple[float, Mapping[str, Any]]]:
+        n_docs = len(self.docs)
+        if not n_docs:
+            return []
+        avg_len = self.total_len / n_docs or 1.0
+        k1, b, doc_len = self.k1, self.b, self.doc_len
+        scores: Dict[int, float] = defaultdict(float)
+        plists = sorted((p for p in (self.postings.get(t) for t in set(tokenize(query))) if p), key=len)
+        for plist in plists:
+            df = len(plist)
+            idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+            if idf < 0.05:
+                continue  # near-ubiquitous term: contributes nothing but costs a full posting scan
+            if scores and df > n_docs * COMMON_TERM_FRACTION:
+                # Common term after rarer ones matched: only re-rank the existing candidates
+                # instead of scanning a posting list that covers much of the store.
+                items = [(d, plist[d]) for d in scores if d in plist]
+            else:
+                items = plist.items()
+            for doc_id, tf in items:
+                norm = k1 * (1 - b + b * doc_len[doc_id] / avg_len)
+                scores[doc_id] += idf * tf * (k1 + 1) / (tf + norm)
+        best = heapq.nlargest(k, scores.items(), key=lambda kv: kv[1])
+        return [(score, self.docs[doc_id]) for doc_id, score in best]
+
+
+_lock = threading.Lock()
+_index: Optional[BM25Index] = None
+_source: Optional[Sequence[Mapping[str, Any]]] = None
+
+
+def index_for(events: Sequence[Mapping[str, Any]]) -> BM25Index:
+    """
+    Index covering `events`. Reuses the shared index when `events` is the same snapshot,
+    adds only the unseen events when the store grew, and rebuilds only if events vanished.
+    """
+    global _index, _source
+    with _lock:
+        if _index is not None and _source is events:
+            return _index
+        keys = [source_key(e) for e in events]
+        if _index is not None and len(_index.keys) <= len(keys) and set(_index.keys).issubset(keys):
+            idx = _index
+        else:
+            idx = BM25Index()
+        for e, key in zip(events, keys):
+            if key not in idx.keys:
+                idx.add(e)
+        _index, _source = idx, events
+        return idx
+
+
+def search(events: Sequence[Mapping[str, Any]], query: str, k: int = 20) -> List[Mapping[str, Any]]:
+    return [e for _, e in index_for(events).search(query, k)]
+
+
+def select_context(events: Sequence[Mapping[str, Any]], query: str, max_tokens: int = 1500,
+                   k: int = 60, render=None) -> List[str]:
+    """
+    Top BM25 matches for `query`, rendered as prompt lines until ~max_tokens (4 chars/token).
+    Falls back to the most recent events when nothing matches lexically.
+    """
+    render = render or (lambda e: f"- {e.get('competitor','?')}: {e.get('title','(no title)')} (impact {e.get('impact',3)})")
+    hits = search(events, query, k)
+    if not hits:
+        hits = heapq.nlargest(k, events, key=lambda e: e.get("published_at", "") or "")
+    lines: List[str] = []
+    budget = max_tokens * 4
+    for e in hits:
+        line = render(e)
+        if len(line) + 1 > budget:
+            break
+        budget -= len(line) + 1
+        lines.append(line)
+    return lines
@@ -0,0 +1,208 @@
+# services/scheduler.py
+from __future__ import annotations
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Iterable, Optional
+import datetime as dt
+import logging
+import os
+import random
+import threading
+import time
+
+from utils.logger import write_prometheus
+
+log = logging.getLogger("intel_agent.scheduler")
+
+# Adaptive per-source polling for the headless worker (worker.py).
+# Each feed keeps its own interval: it halves when a poll finds new entries,
+# grows by GROWTH when it finds none, and backs off exponentially on errors.
+MIN_INTERVAL = float(os.environ.get("INTEL_AGENT_POLL_MIN", "300"))      # 5 min
+MAX_INTERVAL = float(os.environ.get("INTEL_AGENT_POLL_MAX", "21600"))    # 6 h
+START_INTERVAL = float(os.environ.get("INTEL_AGENT_POLL_START", "1800"))  # 30 min
+POLL_CONCURRENCY = int(os.environ.get("INTEL_AGENT_POLL_CONCURRENCY", "4"))
+JITTER = 0.2
+GROWTH = 1.5
+
+
+@dataclass
+class Source:
+    url: str                    # feed URL, or "owner/repo" when kind == "github"
+    competitor: Dict[str, Any]  # {"name": ..., "site": ...}
+    industry: str
+    kind: str = "rss"           # "rss" | "github"
+    interval: float = START_INTERVAL
+    next_due: float = 0.0       # time.monotonic() deadline; 0 = poll immediately
+    polls: int = 0
+    failures: int = 0
+    new_total: int = 0
+    last_new: int = 0
+    last_change: Optional[str] = None
+    last_error: Optional[str] = None
+    history: List[int] = field(default_factory=list)  # new entries per poll, most recent last
+
+
+def catalog_sources(industries: Optional[Iterable[str]] = None) -> List[Source]:
+    """One Source per distinct feed URL and GitHub repository in CATALOG and INDUSTRY_MAP."""
+    from services.catalog import CATALOG
+    from services.competitor import INDUSTRY_MAP
+    from services.github import competitor_repos
+
+    wanted = set(industries) if industries else None
+    out: Dict[str, Source] = {}
+    for industry, comps in CATALOG.items():
+        for c in comps:
+            if wanted is not None and industry not in wanted:
+                continue
+            comp = {"name": c["name"], "site": c.get("site", "#")}
+            if c.get("rss"):
+                out.setdefault(c["rss"], Source(c["rss"], comp, industry))
+            for repo in competitor_repos(c):
+                out.setdefault("github:" + repo, Source(repo, comp, industry, kind="github"))
+    for industry, comps in INDUSTRY_MAP.items():
+        for c in comps:
+            if wanted is not None and industry not in wanted:
+                continue
+            comp = {"name": c["name"], "site": c.get("homepage", "#")}
+            for url in c.get("rss", []):
+                if url:
+                    out.setdefault(url, Source(url, comp, industry))
+            for repo in competitor_repos(c):
+                out.setdefault("github:" + repo, Source(repo, comp, industry, kind="github"))
+    return list(out.values())
+
+
+class PollScheduler:
+    def __init__(self, sources: List[Source], company: str, concurrency: int = POLL_CONCURRENCY,
+                 min_interval: float = MIN_INTERVAL, max_interval: float = MAX_INTERVAL, entries_per_poll: int = 10,
+                 enrich: bool = False):
+        self.sources = sources
+        self.company = company
+        self.enrich = enrich
+        self.concurrency = max(1, concurrency)
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.entries_per_poll = entries_per_poll
+        self.stop_event = threading.Event()
+        self._restore()
+        for src in sources:
+            src.interval = min(max_interval, max(min_interval, src.interval))
+
+    def _restore(self) -> None:
+        """Pick up each feed's interval and history from its high-water record (previous runs)."""
+        try:
+            from services.highwater import feed_stats
+            stats = feed_stats(self.company)
+        except Exception as e:
+            log.warning("could not read feed stats: %s", e)
+            return
+        for src in self.sources:
+            st = stats.get(src.url) if src.kind == "rss" else None
+            if not st:
+                continue
+            src.interval = float(st.get("interval") or src.interval)
+            src.history = list(st.get("history") or [])
+            src.new_total = int(st.get("new_total") or 0)
+            src.last_change = st.get("last_change")
+
+    # ---- one poll -------------------------------------------------------
+    def poll(self, src: Source) -> int:
+        """Fetch one feed (or repo's releases) and write its entries through services.storage. Returns new events stored."""
+        from services.cursors import CursorBatch
+        from services.feeds import fetch_feed
+        from services.ingest import rss_events
+        from services.storage import insert_events_async
+        from utils.logger import span
+
+        cursors = CursorBatch()
+        if src.kind == "github":
+            from services.github import CURSOR_FILE, cursor_key, new_releases, release_events
+            with span("poll", url=src.url):
+                releases, fields = new_releases(self.company, src.url)
+            events = release_events(self.company, src.industry, src.competitor, releases)
+            cursors.add(CURSOR_FILE, cursor_key(self.company, src.url), fields)
+        else:
+            with span("poll", url=src.url):
+                feed = fetch_feed(src.url, revalidate=True)
+            events = rss_events(self.company, src.industry, src.competitor, feed, limit=self.entries_per_poll,
+                                url=src.url, cursors=cursors)
+        if events and self.enrich:
+            # Unchanged feeds produce identical batch prompts, which the LLM cache answers.
+            from agents.enricher import enrich_events
+            events = enrich_events(events, self.company, src.industry)
+        # Concurrent polls finishing together share one group-committed store write. The
+        # source's cursor moves only after it (a failed enrich or write re-polls the same data).
+        added = insert_events_async(events).result() if events else 0
+        cursors.commit()
+        return added
+
+    def _jitter(self, seconds: float) -> float:
+        return seconds * random.uniform(1 - JITTER, 1 + JITTER)
+
+    def reschedule(self, src: Source, new: Optional[int], error: Optional[str] = None) -> None:
+        src.polls += 1
+        if error is not None:
+            src.failures += 1
+            src.last_error = error
+            delay = min(self.max_interval, self.min_interval * (2 ** src.failures))
+        else:
+            src.failures = 0
+            src.last_error = None
+            src.last_new = new or 0
+            src.new_total += src.last_new
+            src.history = (src.history + [src.last_new])[-20:]
+            if src.last_new:
+                src.last_change = dt.datetime.utcnow().isoformat() + "Z"
+                src.interval = max(self.min_interval, src.interval / 2)
+            else:
+                src.interval = min(self.max_interval, src.interval * GROWTH)
+            delay = src.interval
+            if src.kind == "rss":
+                try:
+                    from services.highwater import save_interval
+                    save_interval(self.company, src.url, src.interval)
+                except Exception as e:
+                    log.warning("could not save interval for %s: %s", src.url, e)
+        src.next_due = time.monotonic() + self._jitter(delay)
+
+    # ---- loop -------------------------------------------------------------
+    def run(self, once: bool = False) -> None:
+        """Poll until stop() (or, with once=True, until every source was polled one time)."""
+        pool = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="poll")
+        inflight: Dict[Any, Source] = {}
+        pending_first = {id(s) for s in self.sources}
+        try:
+            while not self.stop_event.is_set():
+                now = time.monotonic()
+                busy = {id(s) for s in inflight.values()}
+                due = sorted((s for s in self.sources if id(s) not in busy and s.next_due <= now),
+                             key=lambda s: s.next_due)
+                for src in due[: self.concurrency - len(inflight)]:
+                    inflight[pool.submit(self.poll, src)] = src
+
+                if once and not pending_first and not inflight:
+                    return
+                busy = {id(s) for s in inflight.values()}
+                upcoming = [s.next_due for s in self.sources if id(s) not in busy]
+                timeout = max(0.05, min(upcoming) - now) if upcoming else 1.0
+                if not inflight:
+                    self.stop_event.wait(min(timeout, 60.0))
+                    continue
+                done, _ = wait(list(inflight), timeout=min(timeout, 60.0), return_when=FIRST_COMPLETED)
+                for fut in done:
+                    src = inflight.pop(fut)
+                    pending_first.discard(id(src))
+                    try:
+                        new = fut.result()
+                        self.reschedule(src, new)
+                        log.info("%s: %d new (next in %.0fs)", src.url, new, src.next_due - time.monotonic())
+                    except Exception as e:
+                        self.reschedule(src, None, f"{type(e).__name__}: {e}")
+                        log.warning("%s: %s (retry in %.0fs)", src.url, src.last_error, src.next_due - time.monotonic())
+                if done:
+                    write_prometheus()
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    def stop(self) -> None:
+        self.stop_event.set()
@@ -0,0 +1,217 @@
+# services/sqlite_store.py
+from __future__ import annotations
+from typing import List, Dict, Any, Iterable, Optional, Tuple
+import json
+import os
+import sqlite3
+import threading
+
+from services.dedupe import source_key, title_key
+from services.recency import Position, published_ts
+
+# Row-per-event SQLite backend for services.storage.
+# Selected when INTEL_AGENT_STORE points at a *.db / *.sqlite file (or "sqlite:<path>").
+FILTER_COLUMNS = ("company", "competitor", "industry", "source_type")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id           INTEGER PRIMARY KEY AUTOINCREMENT,
+    dedupe_key   TEXT NOT NULL UNIQUE,
+    title_key    TEXT,
+    company      TEXT,
+    competitor   TEXT,
+    industry     TEXT,
+    source_type  TEXT,
+    source_url   TEXT,
+    title        TEXT,
+    published_at TEXT,
+    published_ts REAL,
+    data         TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_events_competitor   ON events(competitor);
+CREATE INDEX IF NOT EXISTS idx_events_company      ON events(company);
+CREATE INDEX IF NOT EXISTS idx_events_source_type  ON events(source_type);
+CREATE INDEX IF NOT EXISTS idx_events_published_at ON events(published_at);
+"""
+
+# Created after _migrate() so databases from before title_key / published_ts get the columns first.
+_LATE_INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_events_title_key    ON events(title_key);
+CREATE INDEX IF NOT EXISTS idx_events_recency      ON events(published_ts DESC, dedupe_key DESC);
+"""
+
+
+def _row(e: Dict[str, Any]) -> Tuple[Any, ...]:
+    return (
+        source_key(e), title_key(e), e.get("company"), e.get("competitor"), e.get("industry"),
+        e.get("source_type"), e.get("source_url"), e.get("title"), e.get("published_at"),
+        published_ts(e), json.dumps(e, ensure_ascii=False),
+    )
+
+
+_INSERT = ("INSERT OR IGNORE INTO events (dedupe_key, title_key, company, competitor, industry,"
+           " source_type, source_url, title, published_at, published_ts, data) VALUES (?,?,?,?,?,?,?,?,?,?,?)")
+
+
+def _where(filters: Dict[str, Any]) -> Tuple[str, List[Any]]:
+    clauses, params = [], []
+    for col in FILTER_COLUMNS:
+        val = filters.get(col)
+        if val is not None:
+            clauses.append(f"{col} = ?")
+            params.append(val)
+    return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+
+class SQLiteStore:
+    """One connection per thread (Streamlit reruns run on worker threads); WAL for concurrent readers."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._init_lock = threading.Lock()
+        self._ready = False
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with self._init_lock:
+                if not self._ready:
+                    conn.executescript(_SCHEMA)
+                    self._migrate(conn)
+                    conn.executescript(_LATE_INDEXES)
+                    self._ready = True
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _migrate(conn: sqlite3.Connection) -> None:
+        """Add and backfill columns that databases written by earlier versions lack."""
+        cols = {r[1] for r in conn.execute("PRAGMA table_info(events)")}
+        if "title_key" not in cols:
+            with conn:
+                conn.execute("ALTER TABLE events ADD COLUMN title_key TEXT")
+                rows = conn.execute("SELECT id, data FROM events").fetchall()
+                conn.executemany("UPDATE events SET title_key = ? WHERE id = ?",
+                                 ((title_key(json.loads(d)), i) for i, d in rows))
+        if "published_ts" not in cols:
+            with conn:
+                conn.execute("ALTER TABLE events ADD COLUMN published_ts REAL")
+                rows = conn.execute("SELECT id, published_at FROM events").fetchall()
+                conn.executemany("UPDATE events SET published_ts = ? WHERE id = ?",
+                                 ((published_ts({"published_at": p}), i) for i, p in rows))
+
+    def signature(self):
+        """Cheap change detector for the shared snapshot cache (covers other processes too)."""
+        sig = []
+        for p in (self.path, self.path + "-wal"):
+            try:
+                st = os.stat(p)
+                sig.append((st.st_mtime_ns, st.st_size))
+            except OSError:
+                sig.append(None)
+        return tuple(sig)
+
+    # ---- bulk API used by services.storage -------------------------------
+    def get_events(self) -> List[Dict[str, Any]]:
+        return self.query_events()
+
+    def set_events(self, items: Iterable[Dict[str, Any]]) -> None:
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM events")
+            conn.executemany(_INSERT, (_row(e) for e in items))
+
+    def clear_events(self) -> None:
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM events")
+
+    def delete_events(self, keys: Iterable[str], removed: Optional[List[Dict[str, Any]]] = None) -> int:
+        """Delete the events with these source keys (also appended to `removed`). Returns rows removed."""
+        conn = self._conn()
+        with conn:
+            n = 0
+            for k in set(keys):
+                if removed is not None:
+                    removed.extend(json.loads(r[0]) for r in conn.execute("SELECT data FROM events WHERE dedupe_key = ?", (k,)))
+                n += conn.execute("DELETE FROM events WHERE dedupe_key = ?", (k,)).rowcount
+            return n
+
+    # ---- indexed queries -------------------------------------------------
+    def insert_events(self, items: Iterable[Dict[str, Any]], added: Optional[List[Dict[str, Any]]] = None) -> int:
+        """
+        Append-only insert. Events already stored under (title, source_url) or under
+        (competitor, title) are skipped. Returns rows added (also appended to `added`).
+        """
+        conn = self._conn()
+        with conn:
+            fresh, seen = [], set()
+            for e in items:
+                tk = title_key(e)
+                if tk in seen or conn.execute("SELECT 1 FROM events WHERE title_key = ?", (tk,)).fetchone():
+                    continue
+                seen.add(tk)
+                fresh.append(e)
+            if added is None:
+                before = conn.total_changes
+                conn.executemany(_INSERT, (_row(e) for e in fresh))
+                return conn.total_changes - before
+            n = 0
+            for e in fresh:
+                if conn.execute(_INSERT, _row(e)).rowcount:
+                    added.append(e)
+                    n += 1
+            return n
+
+    def query_events(self, limit: Optional[int] = None, **filters: Any) -> List[Dict[str, Any]]:
+        where, params = _where(filters)
+        sql = "SELECT data FROM events" + where + " ORDER BY id"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+        return [json.loads(r[0]) for r in self._conn().execute(sql, params)]
+
+    def latest_events(self, n: int = 10, after: Optional[Position] = None, **filters: Any) -> List[Dict[str, Any]]:
+        """Newest first by normalized timestamp; `after` continues below a previous page's last event."""
+        where, params = _where(filters)
+        if after is not None:
+            where += (" AND " if where else " WHERE ") + "(published_ts < ? OR (published_ts = ? AND dedupe_key < ?))"
+            params += [after[0], after[0], after[1]]
+        sql = "SELECT data FROM events" + where + " ORDER BY published_ts DESC, dedupe_key DESC LIMIT ?"
+        return [json.loads(r[0]) for r in self._conn().execute(sql, params + [int(n)])]
+
+    def count_events(self, **filters: Any) -> int:
+        where, params = _where(filters)
+        return int(self._conn().execute("SELECT COUNT(*) FROM events" + where, params).fetchone()[0])
+
+
+def migrate_json(store: SQLiteStore, paths: Iterable[str] = ("intel_data.json", "intel_events.json")) -> int:
+    """One-shot import of the legacy JSON array files. Safe to re-run (duplicates are ignored)."""
+    added = 0
+    for p in paths:
+        if not os.path.exists(p):
+            continue
+        try:
+            with open(p, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception:
+            continue
+        if isinstance(data, list):
+            added += store.insert_events(e for e in data if isinstance(e, dict))
+    return added
+
+
+if __name__ == "__main__":
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Migrate legacy INTEL-AGENT JSON stores into SQLite.")
+    ap.add_argument("db", help="target SQLite file, e.g. intel.db")
+    ap.add_argument("sources", nargs="*", default=["intel_data.json", "intel_events.json"])
+    args = ap.parse_args()
+    n = migrate_json(SQLiteStore(args.db), args.sources)
+    print(f"Migrated {n} event(s) into {args.db}")
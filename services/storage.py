@@ -1,26 +1,133 @@
-import json
 import os
-from typing import List, Dict, Any
+import threading
+from types import MappingProxyType
+from typing import List, Dict, Any, Iterable, Optional, Tuple, Mapping
+
+from services.dedupe import event_keys, source_key
+from services.fileio import file_lock, read_json, signature, write_json
+from services.recency import RecencyIndex, decode_cursor, encode_cursor, position
+from utils.logger import span
 
 STORE_PATH = os.environ.get("INTEL_AGENT_STORE", "intel_data.json")
 
+# INTEL_AGENT_STORE picks the backend:
+#   intel_data.json (default)          -> one JSON array file
+#   intel.db / *.sqlite / sqlite:<path> -> services.sqlite_store
+#   log:<dir> / an existing directory  -> services.event_log (append-only JSONL + key index)
+#   parts:<dir>                         -> services.partitions (one JSON file per company/industry)
+# The JSON stores are written under an exclusive file lock via write-then-rename
+# (services.fileio), so concurrent sessions and the worker never lose each other's events.
+_SQLITE_SUFFIXES = (".db", ".sqlite", ".sqlite3")
+_backend = None
+
+# Process-wide snapshot shared by every Streamlit session and rerun. It is rebuilt only
+# when the store's on-disk signature (mtime/size) or our own write generation changes.
+_snap_lock = threading.Lock()
+_snap_sig = None
+_snap: Tuple[Mapping[str, Any], ...] = ()
+_generation = 0
+
+# Newest-first order over the JSON snapshot, kept in step with it (services.recency).
+_recency_lock = threading.Lock()
+_recency = RecencyIndex()
+
+def _sqlite_path(path: str) -> Optional[str]:
+    if path.startswith("sqlite:"):
+        rest = path[len("sqlite:"):]
+        return rest[3:] if rest.startswith("///") else rest
+    return path if path.lower().endswith(_SQLITE_SUFFIXES) else None
+
+def _parts_path(path: str) -> Optional[str]:
+    return path[len("parts:"):] if path.startswith("parts:") else None
+
+def _log_path(path: str) -> Optional[str]:
+    if path.startswith("log:"):
+        return path[len("log:"):]
+    return path if os.path.isdir(path) else None
+
+def _store():
+    """Return the configured SQLite / event-log / partitioned backend, or None for the legacy JSON file."""
+    global _backend
+    if _backend is None:
+        db_path, log_path, parts_path = _sqlite_path(STORE_PATH), _log_path(STORE_PATH), _parts_path(STORE_PATH)
+        if parts_path:
+            from services.partitions import PartitionedStore
+            _backend = PartitionedStore(parts_path)
+        elif db_path:
+            from services.sqlite_store import SQLiteStore
+            _backend = SQLiteStore(db_path)
+        elif log_path:
+            from services.event_log import EventLog
+            _backend = EventLog(log_path)
+        else:
+            _backend = False
+    return _backend or None
+
+def sidecar_path(name: str) -> str:
+    """Path for auxiliary data kept next to the event store (e.g. "digest_partials.json")."""
+    log_path = _parts_path(STORE_PATH) or _log_path(STORE_PATH)
+    if log_path:
+        return os.path.join(log_path, name)
+    base = os.path.splitext(_sqlite_path(STORE_PATH) or STORE_PATH)[0]
+    return f"{base}.{name}"
+
 def _read() -> List[Dict[str, Any]]:
-    if not os.path.exists(STORE_PATH):
-        return []
-    try:
-        with open(STORE_PATH, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        return data if isinstance(data, list) else []
-    except Exception:
-        return []
+    return read_json(STORE_PATH)
 
 def _write(items: List[Dict[str, Any]]) -> None:
-    os.makedirs(os.path.dirname(STORE_PATH) or ".", exist_ok=True)
-    with open(STORE_PATH, "w", encoding="utf-8") as f:
-        json.dump(items, f, ensure_ascii=False, indent=2)
+    """Atomic replace of the JSON store; callers hold file_lock(STORE_PATH)."""
+    global _generation
+    with span("storage.write", events=len(items)):
+        write_json(STORE_PATH, items)
+    _generation += 1
+
+def _signature():
+    db = _store()
+    if db:
+        return (_generation, db.signature())
+    return (_generation, signature(STORE_PATH))
+
+def _bump() -> None:
+    global _generation
+    _generation += 1
+
+def snapshot() -> Tuple[Mapping[str, Any], ...]:
+    """
+    Read-only view of every stored event, shared across sessions (no per-call parse or copy).
+    Events are MappingProxyType wrappers; use get_events() if you need mutable dicts.
+    """
+    global _snap_sig, _snap
+    sig = _signature()
+    if sig == _snap_sig:
+        return _snap
+    with _snap_lock:
+        sig = _signature()
+        if sig != _snap_sig:
+            db = _store()
+            with span("storage.read"):
+                items = db.get_events() if db else _read()
+                _snap = tuple(MappingProxyType(e) for e in items)
+            _snap_sig = sig
+        return _snap
+
+def _near_dup():
+    from services.near_dup import get_index
+    return get_index()
+
+def alternate_sources(e: Mapping[str, Any]) -> List[Dict[str, Any]]:
+    """Other feeds/URLs that carried a near-duplicate of stored event `e`."""
+    idx = _near_dup()
+    return idx.alternate_sources(e) if idx is not None else []
+
+def _key(e: Dict[str, Any]):
+    return (e.get("title", ""), e.get("source_url", ""))
+
+def _matches(e: Dict[str, Any], filters: Dict[str, Any]) -> bool:
+    return all(e.get(k) == v for k, v in filters.items() if v is not None)
 
 def get_events() -> List[Dict[str, Any]]:
-    return _read()
+    """Mutable copies of the cached snapshot (shallow, no JSON decoding)."""
+    return [dict(e) for e in snapshot()]
 
 def set_events(items: List[Dict[str, Any]]) -> None:
     """
@@ -30,12 +137,169 @@ def set_events(items: List[Dict[str, Any]]) -> None:
     seen = set()
     deduped: List[Dict[str, Any]] = []
     for e in items:
-        key = (e.get("title", ""), e.get("source_url", ""))
+        key = _key(e)
         if key in seen:
             continue
         seen.add(key)
         deduped.append(e)
-    _write(deduped)
+    db = _store()
+    if db:
+        db.set_events(deduped)
+        _bump()
+    else:
+        with file_lock(STORE_PATH):
+            _write(deduped)
+    idx = _near_dup()
+    if idx is not None:
+        idx.rebuild(deduped)
+
+def delete_events(keys: Iterable[str]) -> int:
+    """
+    Remove the events with these source keys (services.dedupe.source_key) under the store's
+    lock, so events inserted concurrently survive. Returns how many were removed.
+    """
+    gone = set(keys)
+    if not gone:
+        return 0
+    removed: List[Dict[str, Any]] = []
+    db = _store()
+    if db:
+        if db.delete_events(gone, removed):
+            _bump()
+    else:
+        with file_lock(STORE_PATH):
+            keep = []
+            for e in snapshot():
+                (removed if source_key(e) in gone else keep).append(dict(e))
+            if removed:
+                _write(keep)
+    idx = _near_dup()
+    if idx is not None:
+        idx.forget(removed)
+    return len(removed)
 
 def clear_events() -> None:
-    _write([])
+    db = _store()
+    if db:
+        db.clear_events()
+        _bump()
+    else:
+        with file_lock(STORE_PATH):
+            _write([])
+    idx = _near_dup()
+    if idx is not None:
+        idx.clear()
+    # Incremental sources would otherwise keep skipping everything stored before the clear.
+    from services.cursors import reset_all
+    reset_all()
+
+def insert_events(items: List[Dict[str, Any]]) -> int:
+    """
+    Append events not stored yet under (title, source_url) or (competitor, title).
+    Near-duplicates of a stored event (services.near_dup) are kept as its alternate
+    sources instead. Returns how many were added. On the event-log backend this never
+    reads history. Writes synchronously; see insert_events_async for the batched path.
+    """
+    return insert_batches([items])[0]
+
+def insert_events_async(items: List[Dict[str, Any]]):
+    """
+    Queue `items` for the next group commit (services.write_behind). Returns a Future
+    resolving to the number added once the batch is durably on disk. On the partitioned
+    backend each tenant's share goes to that tenant's committer, so tenants don't queue
+    behind each other.
+    """
+    from services.write_behind import gather, get_committer
+    items = list(items)
+    by_tenant = getattr(_store(), "split_by_tenant", None)
+    lanes = by_tenant(items) if by_tenant and items else {"": items}
+    if len(lanes) == 1:
+        return get_committer(next(iter(lanes))).submit(items)
+    return gather([get_committer(lane).submit(batch) for lane, batch in lanes.items()])
+
+def insert_batches(batches: List[List[Dict[str, Any]]]) -> List[int]:
+    """
+    insert_events for several callers' batches at once, in order, with a single store
+    write. Returns the number added per batch.
+    """
+    idx = _near_dup()
+    pending = None
+    if idx is not None:
+        from services.near_dup import Pending
+        pending = Pending()
+        with span("dedupe.near_dup", events=sum(len(b) for b in batches)):
+            batches = [idx.split(b, pending) for b in batches]
+    added: List[Dict[str, Any]] = []
+    db = _store()
+    if db:
+        with span("storage.insert", events=sum(len(b) for b in batches), batches=len(batches)):
+            many = getattr(db, "insert_batches", None)
+            counts = many(batches, added) if many else [db.insert_events(b, added) for b in batches]
+        if any(counts):
+            _bump()
+    else:
+        with file_lock(STORE_PATH):
+            # snapshot() re-checks the file signature, so inside the lock this sees whatever
+            # another process appended meanwhile; writing a stale list back would drop it.
+            existing = [dict(e) for e in snapshot()]
+            counts = []
+            with span("dedupe.exact", events=sum(len(b) for b in batches)):
+                seen = {k for e in existing for k in event_keys(e)}
+                for batch in batches:
+                    n = 0
+                    for e in batch:
+                        keys = event_keys(e)
+                        if any(k in seen for k in keys):
+                            continue
+                        seen.update(keys)
+                        existing.append(e)
+                        added.append(e)
+                        n += 1
+                    counts.append(n)
+            if any(counts):
+                _write(existing)
+    if pending is not None:
+        # Only now are the new canonicals known to be stored (a rejected or failed insert
+        # must not leave index entries that later copies would be folded into).
+        idx.commit(pending, added)
+    return counts
+
+def query_events(limit: Optional[int] = None, **filters: Any) -> List[Dict[str, Any]]:
+    """Events in insertion order, filtered by company / competitor / industry / source_type."""
+    db = _store()
+    if db:
+        return db.query_events(limit=limit, **filters)
+    out = [dict(e) for e in snapshot() if _matches(e, filters)]
+    return out if limit is None else out[:limit]
+
+def latest_page(n: int = 10, cursor: Optional[str] = None,
+                **filters: Any) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    The n most recent events by normalized published_at (newest first), optionally filtered
+    by competitor / source_type / ... Returns (events, next_cursor); pass next_cursor back
+    for the following page ("load more"). next_cursor is None on the last page.
+    """
+    after = decode_cursor(cursor)
+    db = _store()
+    if db:
+        items = db.latest_events(n, after=after, **filters)
+    else:
+        snap = snapshot()
+        with _recency_lock:
+            items = [dict(e) for e in _recency.page(snap, n, after, **filters)]
+    next_cursor = encode_cursor(position(items[-1])) if len(items) == n else None
+    return items, next_cursor
+
+def latest_events(n: int = 10, **filters: Any) -> List[Dict[str, Any]]:
+    """The n most recent events by published_at (newest first)."""
+    return latest_page(n, **filters)[0]
+
+def count_events(**filters: Any) -> int:
+    """Cheap count for UI metrics: index/metadata backed, never a fresh parse of the store."""
+    db = _store()
+    if db:
+        return db.count_events(**filters)
+    snap = snapshot()
+    if not any(v is not None for v in filters.values()):
+        return len(snap)
+    return sum(1 for e in snap if _matches(e, filters))
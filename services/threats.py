@@ -0,0 +1,125 @@
+# services/threats.py
+from __future__ import annotations
+from typing import List, Dict, Any, Iterable, Optional, Tuple
+import copy
+import logging
+import os
+import threading
+import time
+
+from services.catalog import CATALOG, discover_competitors
+from services.ingest import score_threats
+
+log = logging.getLogger("intel_agent.threats")
+
+# Process-wide cache of discover_competitors + score_threats per industry, shared by every
+# Streamlit session. Within THREAT_TTL an entry is served as is; after that it is still
+# served (stale-while-revalidate) while one background thread per industry re-scores it.
+# Only a cold industry makes the caller wait, and concurrent cold callers share one scoring.
+THREAT_TTL = float(os.environ.get("INTEL_AGENT_THREAT_TTL", "1800"))
+THREAT_MAX_STALE = float(os.environ.get("INTEL_AGENT_THREAT_MAX_STALE", "86400"))  # older: rescore inline
+
+_lock = threading.Lock()
+_entries: Dict[str, Tuple[float, List[Dict[str, Any]]]] = {}  # industry -> (scored_at, competitors)
+_running: Dict[str, threading.Event] = {}                        # industry -> done event of the refresh
+
+
+def _score(industry: str) -> List[Dict[str, Any]]:
+    return score_threats(discover_competitors(industry))
+
+
+def _refresh(industry: str, done: threading.Event) -> None:
+    try:
+        items = _score(industry)
+        with _lock:
+            _entries[industry] = (time.time(), items)
+    except Exception as e:
+        log.warning("threat scoring for %s failed: %s", industry, e)
+    finally:
+        with _lock:
+            _running.pop(industry, None)
+        done.set()
+
+
+def _claim(industry: str) -> Tuple[threading.Event, bool]:
+    """The refresh in flight for `industry`, or a new one owned by the caller. Caller holds _lock."""
+    done = _running.get(industry)
+    if done is not None:
+        return done, False
+    done = _running[industry] = threading.Event()
+    return done, True
+
+
+def _refresh_in_background(industry: str) -> threading.Event:
+    """Caller holds _lock."""
+    done, owner = _claim(industry)
+    if owner:
+        threading.Thread(target=_refresh, args=(industry, done), name=f"threats-{industry}", daemon=True).start()
+    return done
+
+
+def scored_competitors(industry: str, ttl: float = THREAT_TTL) -> List[Dict[str, Any]]:
+    """Scored competitor list for `industry` (callers get their own copies to mutate)."""
+    with _lock:
+        entry = _entries.get(industry)
+        if entry is not None:
+            age = time.time() - entry[0]
+            if age > ttl and age <= THREAT_MAX_STALE:
+                _refresh_in_background(industry)
+            if age <= THREAT_MAX_STALE:
+                return copy.deepcopy(entry[1])
+        done, owner = _claim(industry)
+    # Cold (or too stale): score inline; concurrent callers wait for the same run.
+    if owner:
+        _refresh(industry, done)
+    else:
+        done.wait()
+    with _lock:
+        entry = _entries.get(industry)
+    if entry is None:  # scoring failed: same neutral defaults discover_competitors gives
+        return discover_competitors(industry)
+    return copy.deepcopy(entry[1])
+
+
+def cache_info() -> Dict[str, Dict[str, Any]]:
+    now = time.time()
+    with _lock:
+        return {k: {"age": now - ts, "competitors": len(items), "refreshing": k in _running}
+                for k, (ts, items) in _entries.items()}
+
+
+def warm_up(industries: Optional[Iterable[str]] = None, wait: bool = False) -> None:
+    """Score every CATALOG industry (or `industries`) in the background; wait=True blocks until done."""
+    events = []
+    with _lock:
+        for industry in industries or CATALOG.keys():
+            if industry not in _entries:
+                events.append(_refresh_in_background(industry))
+    if wait:
+        for done in events:
+            done.wait()
+
+
+def invalidate(industry: Optional[str] = None) -> None:
+    with _lock:
+        if industry is None:
+            _entries.clear()
+        else:
+            _entries.pop(industry, None)
+
+
+if __name__ == "__main__":
+    # Warm-up command: scores every industry, which also fills the shared on-disk feed cache
+    # (services.feed_cache), so the app's first Auto-Discover per industry is served from it.
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Pre-score competitor threats for every catalog industry.")
+    ap.add_argument("--industry", action="append", help="limit to an industry (repeatable)")
+    args = ap.parse_args()
+    start = time.perf_counter()
+    warm_up(args.industry, wait=True)
+    for industry, info in sorted(cache_info().items()):
+        top = max(_entries[industry][1], key=lambda c: c.get("threat_score", 0), default={})
+        print(f"{industry:<22} {info['competitors']:>3} competitor(s)  top: {top.get('name', '-')} "
+              f"({top.get('threat_score', '-')})")
+    print(f"done in {time.perf_counter() - start:.1f}s")
@@ -0,0 +1,189 @@
+# services/write_behind.py
+from __future__ import annotations
+from concurrent.futures import Future
+from typing import List, Dict, Any, Optional, Tuple
+import atexit
+import logging
+import os
+import threading
+import time
+
+from utils.logger import incr, span
+
+log = logging.getLogger("intel_agent.write_behind")
+
+# Group commit for services.storage.insert_events. Callers (Streamlit sessions, poll
+# threads) hand their batch to one writer thread and get a Future back. The writer waits
+# WRITE_WINDOW_MS after the first pending batch for others to arrive, then commits them all
+# with storage.insert_batches: one dedupe pass and one fsync'd rewrite instead of one full
+# rewrite per caller. A Future resolves to that caller's added count after the write is
+# durable. If a group commit fails, its batches are retried one by one, so only the batch
+# that actually fails gets the exception. get_committer(lane) keeps one writer per lane;
+# storage uses a lane per tenant file on the partitioned backend.
+WRITE_WINDOW_MS = float(os.environ.get("INTEL_AGENT_WRITE_WINDOW_MS", "25"))
+WRITE_MAX_EVENTS = int(os.environ.get("INTEL_AGENT_WRITE_MAX_EVENTS", "5000"))  # commit early past this
+WRITE_BEHIND = os.environ.get("INTEL_AGENT_WRITE_BEHIND", "1").lower() not in ("0", "false", "off")
+
+
+class GroupCommitter:
+    def __init__(self, window: float = WRITE_WINDOW_MS / 1000.0, max_events: int = WRITE_MAX_EVENTS,
+                 name: str = "write-behind"):
+        self.name = name
+        self.window = window
+        self.max_events = max_events
+        self._cond = threading.Condition()
+        self._pending: List[Tuple[List[Dict[str, Any]], Future]] = []
+        self._pending_events = 0
+        self._inflight = 0
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+
+    def submit(self, items: List[Dict[str, Any]]) -> Future:
+        fut: Future = Future()
+        items = list(items)
+        if not items:
+            fut.set_result(0)
+            return fut
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("write-behind committer is closed")
+            self._pending.append((items, fut))
+            self._pending_events += len(items)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+            self._cond.notify_all()
+        return fut
+
+    def _take(self) -> List[Tuple[List[Dict[str, Any]], Future]]:
+        """Block for the first batch, then gather more for one window. Returns [] once closed and drained."""
+        with self._cond:
+            while not self._pending and not self._closed:
+                self._cond.wait()
+            deadline = time.monotonic() + self.window
+            while not self._closed and self._pending_events < self.max_events:
+                left = deadline - time.monotonic()
+                if left <= 0:
+                    break
+                self._cond.wait(left)
+            group, self._pending, self._pending_events = self._pending, [], 0
+            self._inflight += len(group)
+            return group
+
+    def _commit(self, group: List[Tuple[List[Dict[str, Any]], Future]]) -> None:
+        from services.storage import insert_batches
+
+        try:
+            with span("storage.group_commit", batches=len(group), events=sum(len(b) for b, _ in group)):
+                counts = insert_batches([b for b, _ in group])
+        except Exception as e:
+            if len(group) == 1:
+                log.warning("commit failed: %s", e)
+                group[0][1].set_exception(e)
+            else:
+                log.warning("group commit of %d batches failed (%s); retrying them one by one", len(group), e)
+                incr("storage.group_commit_retries")
+                for items, fut in group:
+                    try:
+                        fut.set_result(insert_batches([items])[0])
+                    except Exception as err:
+                        fut.set_exception(err)
+        else:
+            incr("storage.group_commits")
+            incr("storage.group_commit_batches", len(group))
+            for (_, fut), n in zip(group, counts):
+                fut.set_result(n)
+        finally:
+            with self._cond:
+                self._inflight -= len(group)
+                self._cond.notify_all()
+
+    def _run(self) -> None:
+        while True:
+            group = self._take()
+            if not group:
+                return
+            self._commit(group)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until everything submitted so far is committed. False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            self._cond.notify_all()
+            while self._pending or self._inflight:
+                left = None if deadline is None else deadline - time.monotonic()
+                if left is not None and left <= 0:
+                    return False
+                self._cond.wait(left)
+        return True
+
+    def close(self, timeout: Optional[float] = 10.0) -> None:
+        """Commit what is pending (no window wait) and stop the writer thread."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+
+class _Inline:
+    """INTEL_AGENT_WRITE_BEHIND=0: commit on the caller's thread, same Future interface."""
+
+    def submit(self, items: List[Dict[str, Any]]) -> Future:
+        from services.storage import insert_events
+
+        fut: Future = Future()
+        try:
+            fut.set_result(insert_events(list(items)))
+        except Exception as e:
+            fut.set_exception(e)
+        return fut
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        return True
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        pass
+
+
+def gather(futures: List[Future]) -> Future:
+    """One Future for several submits: the summed added count, or the first exception."""
+    out: Future = Future()
+    left = [len(futures)]
+    lock = threading.Lock()
+
+    def done(_):
+        with lock:
+            left[0] -= 1
+            if left[0]:
+                return
+        errors = [f.exception() for f in futures if f.exception() is not None]
+        if errors:
+            out.set_exception(errors[0])
+        else:
+            out.set_result(sum(f.result() for f in futures))
+
+    if not futures:
+        out.set_result(0)
+    for f in futures:
+        f.add_done_callback(done)
+    return out
+
+
+_committers: Dict[str, Any] = {}
+_committer_lock = threading.Lock()
+
+
+def get_committer(lane: str = ""):
+    """The committer for `lane` (one writer thread each); "" is the store-wide lane."""
+    with _committer_lock:
+        committer = _committers.get(lane)
+        if committer is None:
+            if WRITE_BEHIND:
+                committer = GroupCommitter(name=f"write-behind-{os.path.basename(lane)}" if lane else "write-behind")
+            else:
+                committer = _Inline()
+            _committers[lane] = committer
+            atexit.register(committer.close)
+        return committer
@@ -0,0 +1,26 @@
+# tests/conftest.py
+from __future__ import annotations
+
+import pytest
+
+
+@pytest.fixture
+def store(request, tmp_path, monkeypatch):
+    """
+    services.storage on a fresh backend under tmp_path. The default is parts:; parametrize
+    indirectly with an INTEL_AGENT_STORE-style spec ("{tmp}" becomes tmp_path) for another.
+    """
+    from services import near_dup, storage, write_behind
+    from services.recency import RecencyIndex
+
+    spec = getattr(request, "param", "parts:{tmp}/parts")
+    monkeypatch.setattr(storage, "STORE_PATH", spec.format(tmp=tmp_path))
+    monkeypatch.setattr(storage, "_backend", None)
+    monkeypatch.setattr(storage, "_snap_sig", None)
+    monkeypatch.setattr(storage, "_snap", ())
+    monkeypatch.setattr(storage, "_recency", RecencyIndex())
+    monkeypatch.setattr(near_dup, "_index", None)
+    monkeypatch.setattr(write_behind, "_committers", {})
+    yield storage
+    for committer in write_behind._committers.values():
+        committer.close()
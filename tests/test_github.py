@@ -0,0 +1,184 @@
+# tests/test_github.py
+# services.github against a local http.server standing in for the GitHub API
+# (INTEL_AGENT_GITHUB_API). Run with: python -m pytest tests
+from __future__ import annotations
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+import datetime as dt
+import json
+import threading
+import time
+
+import pytest
+
+from services import github
+from services.cursors import CursorStore
+
+REPO = "acme/widgets"
+COMPANY = "Us"
+KEY = github.cursor_key(COMPANY, REPO)
+
+
+def _releases(n: int):
+    """n releases, newest first (id n is the newest)."""
+    base = dt.datetime(2026, 1, 1, tzinfo=dt.timezone.utc)
+    return [{"id": i, "name": f"v{i}", "tag_name": f"v{i}", "body": f"notes {i}",
+             "html_url": f"https://github.com/{REPO}/releases/v{i}",
+             "published_at": (base + dt.timedelta(hours=i)).strftime("%Y-%m-%dT%H:%M:%SZ")}
+            for i in range(n, 0, -1)]
+
+
+class Api:
+    """What the fake API serves and what it saw."""
+
+    def __init__(self):
+        self.releases = _releases(100)
+        self.remaining = 5000
+        self.requests = []  # (path+query, If-None-Match)
+        self.delay = 0.0    # seconds before each response
+
+    @property
+    def etag(self) -> str:
+        return f'"{len(self.releases)}-{self.releases[0]["id"] if self.releases else 0}"'
+
+
+@pytest.fixture
+def api(tmp_path, monkeypatch):
+    state = Api()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            parts = urlsplit(self.path)
+            state.requests.append((self.path, self.headers.get("If-None-Match")))
+            state.remaining -= 1
+            time.sleep(state.delay)
+            if parts.path != f"/repos/{REPO}/releases":
+                self.send_response(404)
+                self.end_headers()
+                return
+            rate = {"X-RateLimit-Remaining": str(state.remaining),
+                    "X-RateLimit-Reset": str(int(time.time()) + 3600)}
+            if self.headers.get("If-None-Match") == state.etag:
+                self.send_response(304)
+                for k, v in rate.items():
+                    self.send_header(k, v)
+                self.end_headers()
+                return
+            query = parse_qs(parts.query)
+            per_page = int(query.get("per_page", ["30"])[0])
+            page = int(query.get("page", ["1"])[0])
+            items = state.releases[(page - 1) * per_page:page * per_page]
+            body = json.dumps(items).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("ETag", state.etag)
+            if page * per_page < len(state.releases):
+                nxt = f"{base}/repos/{REPO}/releases?per_page={per_page}&page={page + 1}"
+                self.send_header("Link", f'<{nxt}>; rel="next"')
+            for k, v in rate.items():
+                self.send_header(k, v)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    monkeypatch.setenv("INTEL_AGENT_GITHUB_API", base)
+    monkeypatch.setenv("NO_PROXY", "127.0.0.1")
+    monkeypatch.setattr(github, "API_BASE", base)
+    monkeypatch.setattr(github, "_gate", github._RateGate())
+    stores = {}
+    cursors = lambda name: stores.setdefault(name, CursorStore(str(tmp_path / name)))
+    monkeypatch.setattr(github, "get_cursors", cursors)
+    monkeypatch.setattr("services.cursors.get_cursors", cursors)
+    yield state
+    server.shutdown()
+    server.server_close()
+
+
+def test_first_run_takes_initial_releases(api, monkeypatch):
+    monkeypatch.setattr(github, "PER_PAGE", 5)
+    releases, fields = github.new_releases(COMPANY, REPO)
+    assert [r["id"] for r in releases] == list(range(100, 100 - github.INITIAL_RELEASES, -1))
+    assert len(api.requests) == -(-github.INITIAL_RELEASES // 5)  # stops paging once the cap is met
+    assert fields["last_id"] == 100 and fields["etag"] == api.etag
+
+
+def test_cursor_moves_only_on_commit(api):
+    releases, fields = github.new_releases(COMPANY, REPO)
+    assert releases
+    assert github.get_cursors(github.CURSOR_FILE).get(KEY) == {}
+    assert len(github.new_releases(COMPANY, REPO)[0]) == len(releases)  # uncommitted: delivered again
+    github.commit_cursor(COMPANY, REPO, fields)
+    assert github.get_cursors(github.CURSOR_FILE).get(KEY)["last_id"] == 100
+
+
+def test_not_modified_via_if_none_match(api):
+    _, fields = github.new_releases(COMPANY, REPO)
+    github.commit_cursor(COMPANY, REPO, fields)
+    releases, fields = github.new_releases(COMPANY, REPO)
+    assert releases == []
+    assert set(fields) == {"checked_at"}
+    assert api.requests[-1][1] == api.etag
+
+
+def test_stops_at_cursor_across_pages(api, monkeypatch):
+    monkeypatch.setattr(github, "PER_PAGE", 10)
+    cursor = api.releases[25]  # 25 releases newer than the cursor: three pages
+    github.commit_cursor(COMPANY, REPO, {"last_id": cursor["id"], "last_published": cursor["published_at"]})
+    releases, fields = github.new_releases(COMPANY, REPO)
+    assert [r["id"] for r in releases] == list(range(100, 75, -1))
+    assert [p for p, _ in api.requests] == [
+        f"/repos/{REPO}/releases?per_page=10",
+        f"/repos/{REPO}/releases?per_page=10&page=2",
+        f"/repos/{REPO}/releases?per_page=10&page=3",
+    ]
+    assert fields["last_id"] == 100
+
+
+def test_rate_limited_at_reserve(api):
+    api.remaining = github.RATE_RESERVE + 1  # the next response reports RATE_RESERVE left
+    github.new_releases(COMPANY, REPO)
+    seen = len(api.requests)
+    with pytest.raises(github.RateLimited):
+        github.new_releases(COMPANY, REPO)
+    assert len(api.requests) == seen  # refused before any request went out
+
+
+def test_fetch_updates_defers_cursors(api):
+    from services.cursors import CursorBatch
+
+    batch = CursorBatch()
+    competitor = {"name": "Acme", "github": f"https://github.com/{REPO}"}
+    events, failures = github.fetch_github_updates(COMPANY, "SaaS", [competitor], cursors=batch)
+    assert not failures and len(events) == github.INITIAL_RELEASES
+    assert github.get_cursors(github.CURSOR_FILE).get(KEY) == {}
+    batch.commit()
+    assert github.get_cursors(github.CURSOR_FILE).get(KEY)["last_id"] == 100
+
+
+def test_cursors_are_per_company(api):
+    releases, fields = github.new_releases("A", REPO)
+    github.commit_cursor("A", REPO, fields)
+    assert github.new_releases("A", REPO)[0] == []  # A is up to date (304)
+    theirs, _ = github.new_releases("B", REPO)  # B tracks the same repo: still gets everything
+    assert [r["id"] for r in theirs] == [r["id"] for r in releases]
+    assert api.requests[-1][1] is None  # and does not send A's ETag
+
+
+def test_deadline_reports_timeout_without_cursor(api):
+    from services.cursors import CursorBatch
+
+    api.delay = 1.0
+    batch = CursorBatch()
+    competitor = {"name": "Acme", "github": f"https://github.com/{REPO}"}
+    started = time.monotonic()
+    events, failures = github.fetch_github_updates(COMPANY, "SaaS", [competitor], cursors=batch, deadline=0.2)
+    assert time.monotonic() - started < 0.9
+    assert events == [] and failures == {f"Acme ({REPO})": "timeout"}
+    assert len(batch) == 0
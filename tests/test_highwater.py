@@ -0,0 +1,42 @@
+# tests/test_highwater.py
+# Feed high-water marks through the RSS helpers: a peek never moves the mark, a
+# CursorBatch moves it on commit, and each company keeps its own. Run with: python -m pytest tests
+from __future__ import annotations
+
+import feedparser
+import pytest
+
+from services import connectors, highwater
+from services.cursors import CursorBatch, CursorStore
+from utils import parsing
+
+URL = "https://example.com/feed.xml"
+
+
+@pytest.fixture
+def feed(tmp_path, monkeypatch):
+    entries = [feedparser.FeedParserDict(id=f"e{i}", title=f"Entry {i}", link=f"https://example.com/{i}")
+               for i in range(3)]
+    parsed = feedparser.FeedParserDict(feed=feedparser.FeedParserDict(), entries=entries)
+    monkeypatch.setattr(connectors, "fetch_feed", lambda url: parsed)
+    monkeypatch.setattr(parsing, "fetch_feed", lambda url: parsed)
+    stores = {}
+    cursors = lambda name: stores.setdefault(name, CursorStore(str(tmp_path / name)))
+    monkeypatch.setattr(highwater, "get_cursors", cursors)
+    monkeypatch.setattr(highwater, "_idle", {})
+    return parsed
+
+
+@pytest.mark.parametrize("fetch", [
+    lambda company, batch: connectors.fetch_rss_feed(URL, company=company, cursors=batch),
+    lambda company, batch: parsing.fetch_rss(URL, company, cursors=batch),
+])
+def test_mark_moves_only_on_commit(feed, fetch):
+    assert len(fetch("Us", None)) == 3
+    assert len(fetch("Us", None)) == 3  # a peek leaves the mark alone
+    batch = CursorBatch()
+    assert len(fetch("Us", batch)) == 3
+    assert len(fetch("Us", None)) == 3  # queued, not committed yet
+    batch.commit()
+    assert fetch("Us", None) == []
+    assert len(fetch("Them", None)) == 3  # another company's mark is its own
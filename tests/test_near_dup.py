@@ -0,0 +1,37 @@
+# tests/test_near_dup.py
+# services.near_dup through services.storage on the partitioned backend: near-duplicates
+# fold into their canonical within a tenant, never across tenants.
+from __future__ import annotations
+
+RAW = ("Acme launches a new usage based pricing plan for enterprise customers today, "
+       "with audit logs, single sign-on and priority support included in the bundle")
+
+
+def _event(company: str, title: str, url: str):
+    return {"company": company, "competitor": "Acme", "industry": "SaaS", "source_type": "rss",
+            "title": title, "source_url": url, "raw": RAW, "published_at": "2026-10-01T00:00:00Z"}
+
+
+def test_same_story_kept_for_each_company(store):
+    story = ("Acme launches usage based pricing", "https://acme.example/blog/pricing")
+    assert store.insert_events([_event("A", *story)]) == 1
+    assert store.insert_events([_event("B", *story)]) == 1
+    assert store.count_events(company="A") == 1
+    assert store.count_events(company="B") == 1
+
+
+def test_near_duplicate_across_companies_is_not_folded(store):
+    assert store.insert_events([_event("A", "Acme launches usage based pricing", "https://acme.example/a")]) == 1
+    syndicated = _event("B", "Acme launches new usage based pricing", "https://news.example/b")
+    assert store.insert_events([syndicated]) == 1
+    assert store.query_events(company="B")[0]["title"] == syndicated["title"]
+
+
+def test_near_duplicate_within_company_is_folded_once(store):
+    canonical = _event("A", "Acme launches usage based pricing", "https://acme.example/a")
+    copy = _event("A", "Acme launches new usage based pricing", "https://news.example/b")
+    assert store.insert_events([canonical]) == 1
+    for _ in range(3):  # re-polls of the syndicated copy
+        assert store.insert_events([copy]) == 0
+    assert [a["source_url"] for a in store.alternate_sources(canonical)] == [copy["source_url"]]
+    assert store.alternate_sources(_event("B", *[canonical[k] for k in ("title", "source_url")])) == []
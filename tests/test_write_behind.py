@@ -0,0 +1,40 @@
+# tests/test_write_behind.py
+# services.write_behind group commits through services.storage on the partitioned backend.
+from __future__ import annotations
+
+import pytest
+
+from services import write_behind
+
+
+def _event(company: str, n: int, **extra):
+    return {"company": company, "competitor": "Acme", "industry": "SaaS", "source_type": "rss",
+            "title": f"{company} update {n}", "source_url": f"https://acme.example/{company}/{n}",
+            "raw": f"release {n} for {company}: {' '.join(str(n * k) for k in range(12))}",
+            "published_at": "2026-10-01T00:00:00Z", **extra}
+
+
+def test_failed_batch_does_not_fail_its_group(store):
+    committer = write_behind.GroupCommitter(window=0.5)  # wide window: one group for all three
+    try:
+        good = committer.submit([_event("A", 1), _event("A", 2)])
+        bad = committer.submit([_event("A", 3, tags={"not", "json"})])
+        later = committer.submit([_event("A", 4)])
+        assert good.result(timeout=10) == 2
+        assert later.result(timeout=10) == 1
+        with pytest.raises(TypeError):
+            bad.result(timeout=10)
+    finally:
+        committer.close()
+    assert sorted(e["title"] for e in store.query_events(company="A")) == ["A update 1", "A update 2", "A update 4"]
+
+
+def test_tenants_commit_on_separate_lanes(store, monkeypatch):
+    monkeypatch.setattr(write_behind, "WRITE_BEHIND", True)
+    fut = store.insert_events_async([_event("A", 1), _event("B", 1), _event("B", 2)])
+    assert fut.result(timeout=10) == 3
+    lanes = sorted(write_behind._committers)
+    assert len(lanes) == 2 and all(isinstance(write_behind._committers[k], write_behind.GroupCommitter) for k in lanes)
+    assert {store.count_events(company=c) for c in ("A", "B")} == {1, 2}
+    assert store.insert_events_async([_event("A", 2)]).result(timeout=10) == 1
+    assert sorted(write_behind._committers) == lanes  # a tenant keeps its committer
@@ -0,0 +1,104 @@
+# utils/assets.py
+from __future__ import annotations
+from functools import lru_cache
+from typing import Optional
+import base64
+import mimetypes
+import os
+
+# Theme assets for app.py. With server.enableStaticServing (see .streamlit/config.toml)
+# files under static/ are served by Streamlit at app/static/<name> and the browser caches
+# them, so a rerun only re-sends a few hundred bytes of CSS. Without static serving the
+# files are inlined as data: URIs, encoded once per process rather than on every rerun.
+#
+# static/img_bg.webp and static/img_bg.jpg are downscaled variants of assets/img_bg.jpg;
+# regenerate them with `python -m utils.assets` (needs Pillow, which the app itself does not).
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STATIC_DIR = os.path.join(ROOT, "static")
+BACKGROUND_SOURCE = os.path.join(ROOT, "assets", "img_bg.jpg")
+BACKGROUND_WIDTH = 1600
+FONTS = (
+    ("fonts/Argentumblack-8MG0.ttf", 900),
+    ("fonts/Argentumshine-Yzpo.ttf", 600),
+    ("fonts/Argentumwhite-rgL7.ttf", 300),
+)
+_MIME = {".ttf": "font/ttf", ".webp": "image/webp", ".jpg": "image/jpeg", ".jpeg": "image/jpeg", ".png": "image/png"}
+
+
+def _static_serving() -> bool:
+    try:
+        import streamlit as st
+        return bool(st.get_option("server.enableStaticServing"))
+    except Exception:
+        return False
+
+
+def _mime(path: str) -> str:
+    ext = os.path.splitext(path)[1].lower()
+    return _MIME.get(ext) or mimetypes.guess_type(path)[0] or "application/octet-stream"
+
+
+@lru_cache(maxsize=None)
+def data_uri(path: str) -> Optional[str]:
+    try:
+        with open(path, "rb") as f:
+            return f"data:{_mime(path)};base64,{base64.b64encode(f.read()).decode()}"
+    except OSError:
+        return None
+
+
+@lru_cache(maxsize=None)
+def asset_url(name: str) -> Optional[str]:
+    """URL for static/<name>: the static route when Streamlit serves it, else a cached data: URI."""
+    path = os.path.join(STATIC_DIR, name)
+    if not os.path.exists(path):
+        return None
+    if _static_serving():
+        return f"app/static/{name.replace(os.sep, '/')}"
+    return data_uri(path)
+
+
+@lru_cache(maxsize=None)
+def background_css() -> Optional[str]:
+    """`background` declarations for .stApp: WebP where supported, JPEG otherwise."""
+    jpg, webp = asset_url("img_bg.jpg"), asset_url("img_bg.webp")
+    if not jpg and not webp:
+        return None
+    if not _static_serving():
+        # Inlined: send a single variant (WebP is ~3x smaller and every current browser has it).
+        return f"background-image: url({webp or jpg});"
+    rules = [f"background-image: url({jpg or webp});"]
+    if jpg and webp:
+        rules.append(f'background-image: image-set(url({webp}) type("image/webp"), url({jpg}) type("image/jpeg"));')
+    return "\n".join(rules)
+
+
+@lru_cache(maxsize=None)
+def fonts_css() -> str:
+    rules = []
+    for name, weight in FONTS:
+        url = asset_url(name)
+        if url:
+            rules.append(f"@font-face{{font-family:'Argentum';src:url({url}) format('truetype');"
+                         f"font-weight:{weight};font-style:normal;font-display:swap;}}")
+    return "\n".join(rules)
+
+
+def build_background(source: str = BACKGROUND_SOURCE, width: int = BACKGROUND_WIDTH) -> None:
+    """Write static/img_bg.webp and static/img_bg.jpg from the full-size source image."""
+    from PIL import Image  # optional: only needed to regenerate the committed variants
+
+    os.makedirs(STATIC_DIR, exist_ok=True)
+    with Image.open(source) as im:
+        im = im.convert("RGB")
+        if im.width > width:
+            im = im.resize((width, round(im.height * width / im.width)), Image.LANCZOS)
+        im.save(os.path.join(STATIC_DIR, "img_bg.webp"), "WEBP", quality=72, method=6)
+        im.save(os.path.join(STATIC_DIR, "img_bg.jpg"), "JPEG", quality=78, optimize=True, progressive=True)
+
+
+if __name__ == "__main__":
+    build_background()
+    for name in ("img_bg.webp", "img_bg.jpg"):
+        path = os.path.join(STATIC_DIR, name)
+        print(f"{path}: {os.path.getsize(path) // 1024} KiB")
@@ -0,0 +1,231 @@
+# utils/logger.py
+from __future__ import annotations
+from collections import defaultdict
+from typing import Any, Dict, Optional
+import functools
+import json
+import os
+import threading
+import time
+
+# Timing spans and counters for the hot stages (feed fetch/parse, storage I/O, dedupe,
+# LLM round-trips, rendering). Off unless INTEL_AGENT_METRICS=1: span() then returns a
+# shared no-op context manager and incr() returns immediately.
+#
+#   with span("feed.fetch", url=url): ...
+#   @timed("storage.read")
+#   incr("llm.cache_hit")
+#
+# Exports: Prometheus text (prometheus_text(), written to INTEL_AGENT_METRICS_FILE and
+# served on INTEL_AGENT_METRICS_PORT if set, on INTEL_AGENT_METRICS_HOST / loopback), one
+# JSONL line per span in INTEL_AGENT_TRACE, and per-rerun breakdowns via begin_run()/end_run()
+# (the app keeps the result in its session state for the sidebar).
+ENABLED = os.environ.get("INTEL_AGENT_METRICS", "").lower() in ("1", "true", "yes", "on")
+METRICS_FILE = os.environ.get("INTEL_AGENT_METRICS_FILE", os.path.join(".intel_cache", "metrics.prom"))
+TRACE_FILE = os.environ.get("INTEL_AGENT_TRACE", os.path.join(".intel_cache", "trace.jsonl"))
+METRICS_PORT = int(os.environ.get("INTEL_AGENT_METRICS_PORT", "0") or 0)
+METRICS_HOST = os.environ.get("INTEL_AGENT_METRICS_HOST", "127.0.0.1")  # "0.0.0.0" for a remote scraper
+BUCKETS = (0.005, 0.025, 0.1, 0.5, 1.0, 2.5, 10.0, 30.0)
+
+_lock = threading.Lock()
+_stages: Dict[str, Dict[str, Any]] = {}
+_counters: Dict[str, float] = defaultdict(float)
+_trace = None
+
+
+class _Noop:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP = _Noop()
+
+
+class _Span:
+    __slots__ = ("name", "attrs", "start")
+
+    def __init__(self, name: str, attrs: Dict[str, Any]):
+        self.name = name
+        self.attrs = attrs
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        record(self.name, time.perf_counter() - self.start, error=exc_type is not None, **self.attrs)
+        return False
+
+
+def span(name: str, **attrs: Any):
+    """Context manager timing one stage; attrs go to the JSONL trace only."""
+    return _Span(name, attrs) if ENABLED else _NOOP
+
+
+def timed(name: str):
+    """Decorator form of span()."""
+    def wrap(fn):
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            if not ENABLED:
+                return fn(*args, **kwargs)
+            with _Span(name, {}):
+                return fn(*args, **kwargs)
+        return inner
+    return wrap
+
+
+def incr(name: str, n: float = 1) -> None:
+    if not ENABLED:
+        return
+    with _lock:
+        _counters[name] += n
+
+
+def record(name: str, seconds: float, error: bool = False, **attrs: Any) -> None:
+    """Add one finished span (also usable for durations measured elsewhere)."""
+    if not ENABLED:
+        return
+    with _lock:
+        agg = _stages.get(name)
+        if agg is None:
+            agg = _stages[name] = {"count": 0, "errors": 0, "seconds": 0.0, "max": 0.0, "buckets": [0] * len(BUCKETS)}
+        agg["count"] += 1
+        agg["errors"] += int(error)
+        agg["seconds"] += seconds
+        agg["max"] = max(agg["max"], seconds)
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                agg["buckets"][i] += 1
+                break
+        _write_trace({"ts": time.time(), "stage": name, "seconds": round(seconds, 6), "error": error,
+                      "thread": threading.current_thread().name, **attrs})
+
+
+def _write_trace(row: Dict[str, Any]) -> None:
+    global _trace
+    if not TRACE_FILE:
+        return
+    try:
+        if _trace is None:
+            os.makedirs(os.path.dirname(TRACE_FILE) or ".", exist_ok=True)
+            _trace = open(TRACE_FILE, "a", encoding="utf-8", buffering=1)
+        _trace.write(json.dumps(row, ensure_ascii=False, default=str) + "\n")
+    except Exception:
+        pass
+
+
+def snapshot() -> Dict[str, Any]:
+    with _lock:
+        return {
+            "stages": {k: {**v, "buckets": list(v["buckets"])} for k, v in _stages.items()},
+            "counters": dict(_counters),
+        }
+
+
+# ---- Prometheus -----------------------------------------------------------
+def _metric(name: str) -> str:
+    return "intel_agent_" + "".join(ch if ch.isalnum() else "_" for ch in name)
+
+
+def prometheus_text() -> str:
+    snap = snapshot()
+    out = [
+        "# HELP intel_agent_stage_seconds Time spent per instrumented stage.",
+        "# TYPE intel_agent_stage_seconds histogram",
+    ]
+    for stage, agg in sorted(snap["stages"].items()):
+        cumulative = 0
+        for bound, n in zip(BUCKETS, agg["buckets"]):
+            cumulative += n
+            out.append(f'intel_agent_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+        out.append(f'intel_agent_stage_seconds_bucket{{stage="{stage}",le="+Inf"}} {agg["count"]}')
+        out.append(f'intel_agent_stage_seconds_sum{{stage="{stage}"}} {agg["seconds"]:.6f}')
+        out.append(f'intel_agent_stage_seconds_count{{stage="{stage}"}} {agg["count"]}')
+    out.append("# TYPE intel_agent_stage_errors_total counter")
+    for stage, agg in sorted(snap["stages"].items()):
+        out.append(f'intel_agent_stage_errors_total{{stage="{stage}"}} {agg["errors"]}')
+    for name, value in sorted(snap["counters"].items()):
+        metric = _metric(name) + "_total"
+        out.append(f"# TYPE {metric} counter")
+        out.append(f"{metric} {value:g}")
+    return "\n".join(out) + "\n"
+
+
+def write_prometheus(path: Optional[str] = None) -> None:
+    """Write prometheus_text() atomically, e.g. for node_exporter's textfile collector."""
+    path = path or METRICS_FILE
+    if not ENABLED or not path:
+        return
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(prometheus_text())
+        os.replace(tmp, path)
+    except Exception:
+        pass
+
+
+_server = None
+
+
+def serve(port: int = METRICS_PORT) -> None:
+    """Expose /metrics on `port` from a daemon thread (once per process)."""
+    global _server
+    if not ENABLED or not port or _server is not None:
+        return
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = prometheus_text().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    with _lock:
+        if _server is not None:
+            return
+        try:
+            _server = ThreadingHTTPServer((METRICS_HOST, port), Handler)
+        except OSError:
+            _server = False  # port taken (another Streamlit process); keep the file export
+            return
+    threading.Thread(target=_server.serve_forever, name="metrics", daemon=True).start()
+
+
+# ---- per-rerun breakdown --------------------------------------------------
+def begin_run() -> Optional[Dict[str, Any]]:
+    """Mark the start of a rerun / worker cycle. Pass the result to end_run()."""
+    if not ENABLED:
+        return None
+    return {"start": time.perf_counter(), "snap": snapshot()}
+
+
+def end_run(run: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Stage totals since begin_run(). Concurrent sessions share the process-wide aggregates,
+    so their spans can appear in each other's breakdowns.
+    """
+    if run is None:
+        return {}
+    before, after = run["snap"], snapshot()
+    stages = {}
+    for name, agg in after["stages"].items():
+        prev = before["stages"].get(name, {"count": 0, "seconds": 0.0})
+        if agg["count"] > prev["count"]:
+            stages[name] = {"count": agg["count"] - prev["count"], "seconds": agg["seconds"] - prev["seconds"]}
+    counters = {k: v - before["counters"].get(k, 0) for k, v in after["counters"].items()
+                if v != before["counters"].get(k, 0)}
+    result = {"total": time.perf_counter() - run["start"], "stages": stages, "counters": counters}
+    write_prometheus()
+    return result
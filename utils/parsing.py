@@ -1,9 +1,21 @@
-import feedparser, requests
+from services.feeds import fetch_feed
 
-def fetch_rss(url: str, company: str):
-    feed = feedparser.parse(url)
+def fetch_rss(url: str, company: str, incremental: bool = True, cursors=None):
+    # incremental: only entries past this feed's high-water mark for `company` (services.highwater).
+    # The mark's advance is queued on `cursors` (a CursorBatch) for the caller to commit once
+    # the entries are stored, as services.ingest.rss_events does; without it this only peeks.
+    try:
+        feed = fetch_feed(url)
+    except Exception:
+        return []
+    entries = feed.entries[:12]
+    if incremental:
+        from services.highwater import commit_mark, new_entries
+        entries = new_entries(company, url, entries)
+        if cursors is not None:
+            cursors.defer(lambda fresh=entries: commit_mark(company, url, fresh))
     out = []
-    for e in feed.entries[:12]:
+    for e in entries:
         out.append({
             "company": company,
             "source_url": e.get("link"),
@@ -15,11 +27,14 @@ def fetch_rss(url: str, company: str):
     return out
 
 def fetch_github_releases(repo_url: str, company: str):
-    parts = repo_url.rstrip("/").split("/")
-    if len(parts) < 2: return []
-    owner, repo = parts[-2], parts[-1]
+    # Only releases newer than what the store recorded for this repo and company
+    # (services.github); a peek, so the cursor is left for the ingest paths that store them.
+    from services.github import new_releases, parse_repo
+    repo = parse_repo(repo_url)
+    if not repo:
+        return []
     try:
-        rel = requests.get(f"https://api.github.com/repos/{owner}/{repo}/releases", timeout=30).json()[:8]
+        rel, _ = new_releases(company, repo)
     except Exception:
         rel = []
     out = []
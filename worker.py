@@ -0,0 +1,63 @@
+# worker.py — headless ingest worker (run alongside `streamlit run app.py`)
+#
+#   python worker.py                      # poll every catalog feed forever
+#   python worker.py --industry CRM --once
+#
+# Polls each competitor feed from services.catalog / services.competitor on its own
+# adaptive schedule and writes through services.storage, so the UI only reads.
+
+import argparse
+import logging
+import os
+import signal
+import threading
+
+from utils import logger as metrics
+from services.scheduler import PollScheduler, catalog_sources, MIN_INTERVAL, MAX_INTERVAL, POLL_CONCURRENCY
+
+
+def _retention_loop(sched: PollScheduler, every: float) -> None:
+    from services.archive import run_retention
+
+    log = logging.getLogger("intel_agent.worker")
+    while not sched.stop_event.wait(every):
+        try:
+            res = run_retention()
+            log.info("retention: archived %d event(s), %d hot", res["expired"], res["hot"])
+        except Exception as e:
+            log.warning("retention failed: %s", e)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="INTEL-AGENT background feed poller")
+    ap.add_argument("--company", default=os.environ.get("INTEL_AGENT_COMPANY", "Acme CRM"))
+    ap.add_argument("--industry", action="append", help="limit to an industry (repeatable); default: all")
+    ap.add_argument("--once", action="store_true", help="poll every source once and exit")
+    ap.add_argument("--concurrency", type=int, default=POLL_CONCURRENCY)
+    ap.add_argument("--min-interval", type=float, default=MIN_INTERVAL)
+    ap.add_argument("--max-interval", type=float, default=MAX_INTERVAL)
+    ap.add_argument("--retention-hours", type=float, default=24.0,
+                    help="run services.archive retention every N hours (0 = never)")
+    ap.add_argument("--enrich", action="store_true",
+                    help="fill summary/impact/confidence/so_what with batched Groq calls before storing")
+    args = ap.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    sources = catalog_sources(args.industry)
+    metrics.serve()  # /metrics on INTEL_AGENT_METRICS_PORT when INTEL_AGENT_METRICS=1
+    sched = PollScheduler(sources, args.company, concurrency=args.concurrency,
+                          min_interval=args.min_interval, max_interval=args.max_interval,
+                          enrich=args.enrich)
+    signal.signal(signal.SIGTERM, lambda *_: sched.stop())
+    if args.retention_hours > 0 and not args.once:
+        threading.Thread(target=_retention_loop, args=(sched, args.retention_hours * 3600),
+                         name="retention", daemon=True).start()
+    logging.getLogger("intel_agent.worker").info("polling %d source(s) for %s", len(sources), args.company)
+    try:
+        sched.run(once=args.once)
+    except KeyboardInterrupt:
+        sched.stop()
+
+
+if __name__ == "__main__":
+    main()